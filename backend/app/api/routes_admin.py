@@ -6,6 +6,8 @@ from app.models.recall import Recall
 from app.core.constants import ConfidenceLevel, Region
 from app.api.deps import get_current_admin_user
 from app.models.user import User
+from app.services.dedup import TITLE_VERSION
+from app.services.watchlist_index import bump_version
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -34,6 +36,9 @@ def update_recall(
         setattr(recall, key, value)
         
     session.add(recall)
+    # Title/region edits are not visible to the in-memory dedup indexes
+    # (in the worker too): have them rebuilt
+    bump_version(session, TITLE_VERSION)
     session.commit()
     session.refresh(recall)
     return recall
@@ -1,9 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session, select
 from app.core.database import get_session
+from app.models.recall import Recall
 from app.models.user import Watchlist, User
 from app.api.deps import get_current_user
+from app.services.alerts import alert_digester
+from app.services.recall_search import BACKFILL_LIMIT, BACKFILL_MAX_DAYS, recall_search
+from app.services.watchlist_index import record_change, watchlist_index
 
 router = APIRouter()
 
@@ -18,6 +22,7 @@ def read_watchlists(
 @router.post("/", response_model=Watchlist)
 def create_watchlist(
     watchlist: Watchlist, 
+    backfill_days: Optional[int] = Query(None, ge=1, le=BACKFILL_MAX_DAYS),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -35,10 +40,34 @@ def create_watchlist(
         return existing
 
     session.add(watchlist)
+    session.flush()
+    # Stamp and log the change so matching processes pick it up
+    version = record_change(session, watchlist)
     session.commit()
     session.refresh(watchlist)
+    watchlist_index.apply(watchlist, version)
+
+    if backfill_days:
+        # Opt-in: matching recalls from before the watchlist existed go out with the next digest
+        recalls = recall_search.for_watchlist(session, watchlist, backfill_days)
+        alert_digester.backfill(session, watchlist, recalls)
+        session.refresh(watchlist)
     return watchlist
 
+@router.get("/{id}/matches", response_model=List[Recall])
+def read_watchlist_matches(
+    id: int,
+    days: int = Query(30, ge=1, le=BACKFILL_MAX_DAYS),
+    limit: int = Query(BACKFILL_LIMIT, ge=1, le=200),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Recalls from the last `days` days that this watchlist matches, newest first."""
+    watchlist = session.get(Watchlist, id)
+    if not watchlist or watchlist.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Watchlist item not found")
+    return recall_search.for_watchlist(session, watchlist, days, limit)
+
 @router.delete("/{id}")
 def delete_watchlist(
     id: int, 
@@ -50,5 +79,7 @@ def delete_watchlist(
         raise HTTPException(status_code=404, detail="Watchlist item not found")
     
     session.delete(watchlist)
+    version = record_change(session, watchlist, removed=True)
     session.commit()
+    watchlist_index.apply(watchlist, version, removed=True)
     return {"ok": True}
@@ -12,6 +12,61 @@ class Settings(BaseSettings):
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     DATABASE_URL: str = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(BASE_DIR, 'redalert_v4.db')}")
 
+    # Processing
+    NLP_CACHE_SIZE: int = int(os.getenv("NLP_CACHE_SIZE", "50000")) # In-process LRU entries
+
+    # Raw payload storage
+    RAW_PAYLOAD_CODEC: str = os.getenv("RAW_PAYLOAD_CODEC", "zlib") # zlib / zstd (if installed) / none
+    RAW_PAYLOAD_LEVEL: int = int(os.getenv("RAW_PAYLOAD_LEVEL", "6"))
+    RAW_RETENTION_DAYS: int = int(os.getenv("RAW_RETENTION_DAYS", "90")) # Dropped raw rows older than this are archived daily (0 = never)
+    RULES_PATH: str = os.getenv("RULES_PATH", "") # Classification rules JSON; empty = bundled default
+
+    # Ingestion pipeline (queue bound + workers per stage)
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "100"))
+    PIPELINE_BATCH_SIZE: int = int(os.getenv("PIPELINE_BATCH_SIZE", "100")) # Items per fetch -> persist batch
+    PIPELINE_FETCH_WORKERS: int = int(os.getenv("PIPELINE_FETCH_WORKERS", "0")) # 0 = one per source
+    PIPELINE_PERSIST_WORKERS: int = int(os.getenv("PIPELINE_PERSIST_WORKERS", "1"))
+    PIPELINE_PROCESS_WORKERS: int = int(os.getenv("PIPELINE_PROCESS_WORKERS", "1"))
+    PIPELINE_NOTIFY_WORKERS: int = int(os.getenv("PIPELINE_NOTIFY_WORKERS", "2"))
+    PROCESS_POOL_WORKERS: int = int(os.getenv("PROCESS_POOL_WORKERS", "0")) # Analysis processes for large backlogs (0/1 = serial)
+
+    # Outbound HTTP (shared ingestor client)
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "30"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    HTTP_PER_HOST_LIMIT: int = int(os.getenv("HTTP_PER_HOST_LIMIT", "4"))
+    HTTP_HTTP2: bool = os.getenv("HTTP_HTTP2", "true").lower() == "true" # Used when `h2` is installed
+    INGEST_GOVT_SOURCES: bool = os.getenv("INGEST_GOVT_SOURCES", "true").lower() == "true" # CPSC / FDA / NHTSA
+    SOURCE_TIMEOUT: float = float(os.getenv("SOURCE_TIMEOUT", "60")) # Time spent fetching one source (waits on later stages excluded)
+
+    # Adaptive per-source polling (seconds)
+    POLL_MIN_INTERVAL: float = float(os.getenv("POLL_MIN_INTERVAL", "900")) # 15 min
+    POLL_MAX_INTERVAL: float = float(os.getenv("POLL_MAX_INTERVAL", "43200")) # 12 h
+    POLL_INITIAL_INTERVAL: float = float(os.getenv("POLL_INITIAL_INTERVAL", "3600"))
+    POLL_JITTER: float = float(os.getenv("POLL_JITTER", "0.1")) # +/- fraction of the interval
+    POLL_MAX_CONCURRENT: int = int(os.getenv("POLL_MAX_CONCURRENT", "4"))
+
+    # Alerts: at most one digest per user per window (seconds, 0 = send every batch);
+    # CONFIRMED recalls skip the wait when ALERT_URGENT_BYPASS is on
+    ALERT_DIGEST_WINDOW: float = float(os.getenv("ALERT_DIGEST_WINDOW", "3600"))
+    ALERT_URGENT_BYPASS: bool = os.getenv("ALERT_URGENT_BYPASS", "true").lower() == "true"
+
+    # Notification outbox: sends in flight and sends started per second (0 = unlimited),
+    # per channel and per worker; failed sends retry with exponential backoff (seconds)
+    NOTIFY_EMAIL_CONCURRENCY: int = int(os.getenv("NOTIFY_EMAIL_CONCURRENCY", "4"))
+    NOTIFY_EMAIL_RATE: float = float(os.getenv("NOTIFY_EMAIL_RATE", "5"))
+    NOTIFY_WEBPUSH_CONCURRENCY: int = int(os.getenv("NOTIFY_WEBPUSH_CONCURRENCY", "16"))
+    NOTIFY_WEBPUSH_RATE: float = float(os.getenv("NOTIFY_WEBPUSH_RATE", "0"))
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "8"))
+    NOTIFY_RETRY_BASE: float = float(os.getenv("NOTIFY_RETRY_BASE", "30"))
+    NOTIFY_RETRY_MAX: float = float(os.getenv("NOTIFY_RETRY_MAX", "3600"))
+    NOTIFY_POLL_INTERVAL: float = float(os.getenv("NOTIFY_POLL_INTERVAL", "5"))
+
+    # Run the ingestion worker as a child process of the API (single-box installs)
+    EMBEDDED_WORKER: bool = os.getenv("EMBEDDED_WORKER", "false").lower() == "true"
+    # Workers elect one ingestion leader through a lease row (seconds)
+    JOB_LEASE_TTL: float = float(os.getenv("JOB_LEASE_TTL", "60"))
+
     class Config:
         case_sensitive = True
 
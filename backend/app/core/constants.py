@@ -20,3 +20,21 @@ class SourceType(str, Enum):
 # Minimum scores for confidence buckets
 SCORE_CONFIRMED = 80
 SCORE_PROBABLE = 50
+
+class ProcessOutcome(str, Enum):
+    CREATED = "created"      # New canonical Recall
+    MERGED = "merged"        # Added as a source of an existing Recall
+    DUPLICATE = "duplicate"  # Matched an existing Recall that already has this URL
+    NOISE = "noise"          # Dropped by the noise filter
+    FILTERED = "filtered"    # Dropped by the India food/medicine filter
+    ERROR = "error"
+
+class NotificationChannel(str, Enum):
+    EMAIL = "email"
+    WEBPUSH = "webpush"   # One job per push subscription
+
+class NotificationStatus(str, Enum):
+    PENDING = "pending"   # Waiting for its (next) attempt
+    SENDING = "sending"   # Claimed by a worker
+    SENT = "sent"
+    DEAD = "dead"         # Out of attempts, or undeliverable for good
@@ -1,6 +1,14 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import inspect
+from sqlalchemy.exc import DBAPIError
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = settings.DATABASE_URL
 
 # Railway/Render/DO often provide "postgres://", but SQLAlchemy wants "postgresql://"
@@ -18,5 +26,108 @@ def get_session():
     with Session(engine) as session:
         yield session
 
+# Job lease serializing schema changes across processes (see schema_lease)
+SCHEMA_LEASE = "schema"
+
+# backend/alembic.ini
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
+
 def init_db():
+    from app.services.recall_search import ensure_search_index
+
+    with schema_lease():
+        _create_and_migrate()
+        ensure_search_index()
+
+def ensure_schema():
+    """Creates missing tables and applies pending migrations (without the search index)."""
+    with schema_lease():
+        _create_and_migrate()
+
+def _create_and_migrate():
+    # create_all() makes tables that don't exist yet; changes to existing
+    # tables are alembic revisions in migrations/versions
     SQLModel.metadata.create_all(engine)
+    run_migrations()
+
+def run_migrations():
+    """alembic upgrade head; a no-op once the database is at the latest revision."""
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(ALEMBIC_INI), "head")
+
+@contextmanager
+def schema_lease():
+    """
+    Holds the schema job lease around DDL, so an API and a worker starting
+    together don't run the same migration side by side. A process that finds
+    the lease taken waits for the holder; by then there is nothing left to do.
+    """
+    from app.models.ingestion import JobLease
+    from app.services.lease import LeaseKeeper  # lease.py imports this module
+
+    try:
+        JobLease.__table__.create(engine, checkfirst=True)
+    except DBAPIError:
+        # Created by another process between the check and the CREATE
+        if not inspect(engine).has_table(JobLease.__tablename__):
+            raise
+    keeper = LeaseKeeper(SCHEMA_LEASE).start()
+    try:
+        if not keeper.wait_first_attempt():
+            logger.info(f"⏳ Waiting for {keeper.manager.holder_of(SCHEMA_LEASE)} to finish the schema update")
+            while not keeper.held():
+                time.sleep(1)
+        yield
+    finally:
+        keeper.stop()
+
+def insert_ignore(session: Session, table, rows, conflict_columns, return_ids: bool = False):
+    """
+    INSERT ... ON CONFLICT DO NOTHING for a list of row dicts, in one
+    executemany round trip. Supported on both Postgres and SQLite.
+    With return_ids, returns the primary keys of the rows actually inserted
+    (in no particular order).
+    """
+    if not rows:
+        return [] if return_ids else None
+    table = getattr(table, "__table__", table)
+    dialect = session.get_bind().dialect
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table).on_conflict_do_nothing(index_elements=conflict_columns)
+    if not return_ids:
+        session.execute(stmt, rows)
+        return None
+
+    pk = table.primary_key.columns.values()[0]
+    if dialect.insert_executemany_returning:
+        return list(session.execute(stmt.returning(pk), rows).scalars())
+    # Old SQLite without RETURNING: row by row, skipped rows report no change
+    ids = []
+    for row in rows:
+        result = session.execute(stmt, row)
+        if result.rowcount:
+            ids.append(result.inserted_primary_key[0])
+    return ids
+
+def bulk_insert_returning_ids(session: Session, table, rows):
+    """
+    Inserts row dicts and returns their primary keys in input order.
+    Uses one INSERT ... RETURNING (batched by insertmanyvalues) where the
+    dialect supports it (Postgres, SQLite >= 3.35); otherwise falls back to
+    row-by-row inserts inside the same transaction.
+    """
+    if not rows:
+        return []
+    from sqlalchemy import insert
+    table = getattr(table, "__table__", table)
+    pk = table.primary_key.columns.values()[0]
+    dialect = session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(table).returning(pk, sort_by_parameter_order=True)
+        return list(session.execute(stmt, rows).scalars())
+    return [session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
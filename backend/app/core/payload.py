@@ -0,0 +1,51 @@
+import zlib
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError: # Optional: zlib (stdlib) is always available
+    zstandard = None
+
+# Codec names stored in RawRecall.payload_codec
+ZLIB = "zlib"
+ZSTD = "zstd"
+NONE = "none"
+
+def available_codec(codec: Optional[str] = None) -> str:
+    """The configured codec, falling back to zlib when zstandard is not installed."""
+    codec = (codec or settings.RAW_PAYLOAD_CODEC).lower()
+    if codec == ZSTD and zstandard is None:
+        return ZLIB
+    return codec if codec in (ZLIB, ZSTD, NONE) else ZLIB
+
+def compress(text: str, codec: str) -> bytes:
+    data = text.encode("utf-8")
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=settings.RAW_PAYLOAD_LEVEL).compress(data)
+    return zlib.compress(data, settings.RAW_PAYLOAD_LEVEL)
+
+def decompress(blob: bytes, codec: str) -> str:
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Payload stored with zstd, but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(blob).decode("utf-8")
+    if codec == ZLIB:
+        return zlib.decompress(blob).decode("utf-8")
+    raise ValueError(f"Unknown payload codec: {codec}")
+
+def encode_payload(text: str, codec: Optional[str] = None) -> Dict[str, Any]:
+    """
+    RawRecall column values for a JSON payload. Compressed payloads leave
+    raw_payload empty (the column predates compression and is NOT NULL).
+    """
+    codec = available_codec(codec)
+    if codec == NONE:
+        return {"raw_payload": text, "payload_blob": None, "payload_codec": None}
+    return {"raw_payload": "", "payload_blob": compress(text, codec), "payload_codec": codec}
+
+def decode_payload(raw_payload: Optional[str], blob: Optional[bytes], codec: Optional[str]) -> str:
+    """The JSON text of a row, whichever way it is stored."""
+    if blob is not None and codec:
+        return decompress(bytes(blob), codec)
+    return raw_payload or ""
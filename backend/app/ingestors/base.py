@@ -1,28 +1,229 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional
+from contextlib import asynccontextmanager
 from datetime import datetime
+import asyncio
+import hashlib
 import logging
+import httpx
+from sqlmodel import Session
+from app.core.database import engine
+from app.core.payload import encode_payload
 from app.models.recall import RawRecall
+from app.models.ingestion import HTTPValidator, SourceState
 from app.core.constants import SourceType
+from app.ingestors.http import get_http_client, host_limit
 
 logger = logging.getLogger(__name__)
 
+# Bodies without ETag / Last-Modified up to this size are hashed before parsing
+HASH_BUFFER_LIMIT = 4 * 1024 * 1024
+
 class BaseIngestor(ABC):
-    def __init__(self, source_type: SourceType):
+    def __init__(self, source_type: SourceType, source_name: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
         self.source_type = source_type
+        self.source_name = source_name or type(self).__name__
+        # Overrides the shared pooled client (e.g. an httpx.MockTransport fixture)
+        self.client = client
+        # Incremental sync: high-water mark loaded before a fetch, and the
+        # one reached by it, saved together with the validators
+        self.cursor: Optional[str] = None
+        self._next_cursor: Optional[str] = None
+        # Validators from the last fetch, saved once its items are persisted
+        self._pending_validators: List[HTTPValidator] = []
+        # True when the last fetch() found every response unchanged
+        self.not_modified = False
+        self._changed = False
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        """fetch_latest() with per-fetch conditional GET bookkeeping reset."""
+        items = []
+        async for batch in self.fetch_batches():
+            items.extend(batch)
+        return items
+
+    async def fetch_batches(self, batch_size: int = 100) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Items from stream_items() in batches, so downstream stages can start on
+        the first part of a feed while the rest is still downloading.
+        """
+        self._pending_validators = []
+        self._changed = False
+        self.cursor = await asyncio.to_thread(self._load_cursor)
+        self._next_cursor = None
+        batch = []
+        async for item in self.stream_items():
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        self.not_modified = bool(self._pending_validators) and not self._changed
 
     @abstractmethod
     async def fetch_latest(self) -> List[Dict[str, Any]]:
         """Fetch raw data from the source (API/RSS). Returns list of Dicts."""
         pass
 
+    async def stream_items(self) -> AsyncIterator[Dict[str, Any]]:
+        """Items one at a time. Sources with an incremental parser override this."""
+        for item in await self.fetch_latest():
+            yield item
+
+    def http(self) -> httpx.AsyncClient:
+        return self.client or get_http_client()
+
+    def advance_cursor(self, value: Optional[str]):
+        """Raises the high-water mark reached by this fetch (values compare as strings)."""
+        if value and (self._next_cursor is None or value > self._next_cursor):
+            self._next_cursor = value
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """GET through the shared pooled client, within the per-host concurrency limit."""
+        async with host_limit(url):
+            response = await self.http().get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def conditional_get(self, url: str, params: Optional[Dict[str, Any]] = None, validator_key: Optional[str] = None,
+                              **kwargs) -> Optional[httpx.Response]:
+        """
+        GET that sends the stored ETag / Last-Modified and returns None when
+        the resource is unchanged (304, or a 200 with an identical body), so
+        callers can skip parsing and persisting entirely. Validators are
+        stored per full URL, or under `validator_key` for queries whose
+        parameters move with the cursor (one row per feed, not per cursor).
+        """
+        full_url = str(httpx.URL(url, params=params))
+        validator = await asyncio.to_thread(self._load_validator, validator_key or full_url)
+        headers = self._conditional_headers(validator, kwargs.pop("headers", None))
+
+        async with host_limit(full_url):
+            response = await self.http().get(full_url, headers=headers, **kwargs)
+
+        if response.status_code == 304:
+            self._record_validator(validator, None, None)
+            return None
+        response.raise_for_status()
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        changed = self._record_validator(validator, response, content_hash)
+        return response if changed else None
+
+    @asynccontextmanager
+    async def conditional_stream(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs):
+        """
+        Streaming variant of conditional_get(). Yields an async iterator over
+        the body chunks, or None when the resource is unchanged: a 304, or,
+        for servers that send no validators (so never a 304), a body of at
+        most HASH_BUFFER_LIMIT bytes whose hash matches the stored one, which
+        is buffered and compared before anything is parsed. Larger bodies are
+        streamed and only recorded as not modified once downloaded.
+        """
+        full_url = str(httpx.URL(url, params=params))
+        validator = await asyncio.to_thread(self._load_validator, full_url)
+        headers = self._conditional_headers(validator, kwargs.pop("headers", None))
+
+        async with host_limit(full_url):
+            async with self.http().stream("GET", full_url, headers=headers, **kwargs) as response:
+                if response.status_code == 304:
+                    self._record_validator(validator, None, None)
+                    yield None
+                    return
+                response.raise_for_status()
+
+                digest = hashlib.sha256()
+                body = response.aiter_bytes()
+                buffered: List[bytes] = []
+                complete = False
+                if not (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+                    size = 0
+                    async for chunk in body:
+                        digest.update(chunk)
+                        buffered.append(chunk)
+                        size += len(chunk)
+                        if size > HASH_BUFFER_LIMIT:
+                            break
+                    else:
+                        complete = True
+                    if complete and not self._record_validator(validator, response, digest.hexdigest()):
+                        yield None
+                        return
+
+                async def chunks():
+                    for chunk in buffered:
+                        yield chunk
+                    if not complete:
+                        async for chunk in body:
+                            digest.update(chunk)
+                            yield chunk
+
+                yield chunks()
+                if not complete:
+                    self._record_validator(validator, response, digest.hexdigest())
+
+    @staticmethod
+    def _conditional_headers(validator: HTTPValidator, headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+        headers = dict(headers or {})
+        if validator.etag:
+            headers["If-None-Match"] = validator.etag
+        if validator.last_modified:
+            headers["If-Modified-Since"] = validator.last_modified
+        return headers
+
+    def _record_validator(self, validator: HTTPValidator, response: Optional[httpx.Response], content_hash: Optional[str]) -> bool:
+        """Queues the validator for saving; returns True if the body changed."""
+        now = datetime.utcnow()
+        validator.checked_at = now
+        self._pending_validators.append(validator)
+        if response is None:
+            return False
+
+        validator.etag = response.headers.get("ETag")
+        validator.last_modified = response.headers.get("Last-Modified")
+        if content_hash == validator.content_hash:
+            return False
+        validator.content_hash = content_hash
+        validator.changed_at = now
+        self._changed = True
+        return True
+
+    def _load_validator(self, full_url: str) -> HTTPValidator:
+        with Session(engine) as session:
+            stored = session.get(HTTPValidator, full_url)
+            if stored:
+                session.expunge(stored)
+                return stored
+        return HTTPValidator(url=full_url, source_name=self.source_name)
+
+    def _load_cursor(self) -> Optional[str]:
+        with Session(engine) as session:
+            state = session.get(SourceState, self.source_name)
+            return state.cursor if state else None
+
+    def save_state(self):
+        """Persist validators and cursor from the last fetch. Call after its items are saved."""
+        if not self._pending_validators and self._next_cursor is None:
+            return
+        with Session(engine) as session:
+            for validator in self._pending_validators:
+                session.merge(validator)
+            if self._next_cursor is not None and (self.cursor is None or self._next_cursor > self.cursor):
+                state = session.get(SourceState, self.source_name) or SourceState(source_name=self.source_name)
+                state.cursor = self._next_cursor
+                state.updated_at = datetime.utcnow()
+                session.add(state)
+            session.commit()
+        self._pending_validators = []
+
     def create_raw_recall(self, source_id: str, payload: str) -> RawRecall:
         """Helper to create a RawRecall model"""
         return RawRecall(
             source_id=source_id,
             source_type=self.source_type,
-            raw_payload=payload,
-            ingested_at=datetime.utcnow()
+            ingested_at=datetime.utcnow(),
+            **encode_payload(payload)
         )
 
     async def run(self):
@@ -1,7 +1,7 @@
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime, timedelta
-import httpx
 import logging
+import httpx
 from app.ingestors.base import BaseIngestor
 from app.core.constants import SourceType
 
@@ -9,28 +9,45 @@ logger = logging.getLogger(__name__)
 
 class CPSCIngestor(BaseIngestor):
     BASE_URL = "https://www.saferproducts.gov/RestWebServices/Recall"
+    # Window for the very first sync; afterwards only recalls since the cursor
+    INITIAL_DAYS = 90
 
-    def __init__(self):
-        super().__init__(SourceType.GOVT)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(SourceType.GOVT, "CPSC", client=client)
 
     async def fetch_latest(self) -> List[Dict[str, Any]]:
-        # Fetch last 90 days by default for MVP
-        start_date = (datetime.utcnow() - timedelta(days=90)).strftime("%Y-%m-%d")
+        return [item async for item in self.stream_items()]
+
+    async def stream_items(self) -> AsyncIterator[Dict[str, Any]]:
+        # Cursor is the latest RecallDate already stored (inclusive, so
+        # same-day recalls published later are still picked up)
+        start_date = self.cursor or (datetime.utcnow() - timedelta(days=self.INITIAL_DAYS)).strftime("%Y-%m-%d")
         
         params = {
             "Format": "json",
             "RecallDateStart": start_date
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.BASE_URL, params=params, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            # CPSC returns a list directly or wrapped? 
-            # Usually strict list in JSON format from SaferProducts
-            return data if isinstance(data, list) else []
+        # Keyed on the base URL: the query changes with every cursor
+        response = await self.conditional_get(self.BASE_URL, params=params, validator_key=self.BASE_URL)
+        if response is None:
+            return
+        data = response.json()
+        
+        # SaferProducts returns a plain JSON list
+        for raw_item in data if isinstance(data, list) else []:
+            self.advance_cursor((raw_item.get("RecallDate") or "")[:10])
+            yield self.normalize(raw_item)
 
-    def normalize(self, raw_item: Dict[str, Any]):
-        # TODO: Implement normalization logic in Phase 2
-        pass
+    def normalize(self, raw_item: Dict[str, Any]) -> Dict[str, Any]:
+        """Adds the unified title/summary/link/published fields the processor reads."""
+        hazards = "; ".join(h.get("Name", "") for h in raw_item.get("Hazards") or [] if h.get("Name"))
+        summary = " ".join(part for part in [raw_item.get("Description"), hazards] if part)
+        return {
+            **raw_item,
+            "title": raw_item.get("Title") or "",
+            "summary": summary,
+            "link": raw_item.get("URL") or "",
+            "published": raw_item.get("RecallDate") or "",
+            "source_name": self.source_name,
+        }
@@ -1,6 +1,9 @@
-from typing import List, Dict, Any
-import httpx
+from typing import AsyncIterator, List, Dict, Any, Optional
+from datetime import datetime, timedelta
+import asyncio
 import logging
+from urllib.parse import quote
+import httpx
 from app.ingestors.base import BaseIngestor
 from app.core.constants import SourceType
 
@@ -9,23 +12,90 @@ logger = logging.getLogger(__name__)
 class FDAIngestor(BaseIngestor):
     # Food enforcement endpoint
     BASE_URL = "https://api.fda.gov/food/enforcement.json"
+    PAGE_SIZE = 1000 # openFDA maximum `limit`
+    MAX_SKIP = 25000 # openFDA rejects larger `skip`; the rest comes next cycle
+    INITIAL_DAYS = 90
 
-    def __init__(self):
-        super().__init__(SourceType.GOVT)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(SourceType.GOVT, "FDA", client=client)
 
     async def fetch_latest(self) -> List[Dict[str, Any]]:
-        # OpenFDA supports 'search' and 'limit'
-        # Fetch recent enforcements (Recall Initiation Date sorted desc)
+        return [item async for item in self.stream_items()]
+
+    async def stream_items(self) -> AsyncIterator[Dict[str, Any]]:
+        # Only enforcement reports since the stored report_date (inclusive),
+        # oldest first so a capped sync still advances the cursor without gaps
+        since = self.cursor or (datetime.utcnow() - timedelta(days=self.INITIAL_DAYS)).strftime("%Y%m%d")
+        until = datetime.utcnow().strftime("%Y%m%d")
         params = {
-            "search": "status:Ongoing", # Only active recalls
-            "sort": "report_date:desc",
-            "limit": 50
+            "search": f"status:Ongoing AND report_date:[{since} TO {until}]", # Only active recalls
+            "sort": "report_date:asc",
+            "limit": self.PAGE_SIZE
+        }
+
+        # The first page tells us the total; the remaining pages are fetched
+        # concurrently and streamed out in completion order. An unchanged
+        # first page (same meta.last_updated and total) means the dataset
+        # has not been refreshed since, so the rest is skipped.
+        first = await self._page(params, 0, conditional=True)
+        if first is None:
+            return
+        total = first.get("meta", {}).get("results", {}).get("total", 0)
+        for item in self._items(first):
+            yield item
+
+        last_skip = min(total - 1, self.MAX_SKIP)
+        if total > self.MAX_SKIP + self.PAGE_SIZE:
+            logger.warning(f"FDA: {total} reports since {since}, syncing the first {self.MAX_SKIP + self.PAGE_SIZE} this cycle")
+        pages = [asyncio.ensure_future(self._page(params, skip)) for skip in range(self.PAGE_SIZE, last_skip + 1, self.PAGE_SIZE)]
+        try:
+            for page in asyncio.as_completed(pages):
+                for item in self._items(await page):
+                    yield item
+        finally:
+            # A failed page or a consumer that stops early leaves the rest in flight
+            for page in pages:
+                page.cancel()
+            await asyncio.gather(*pages, return_exceptions=True)
+
+    async def _page(self, params: Dict[str, Any], skip: int, conditional: bool = False) -> Optional[Dict[str, Any]]:
+        try:
+            if conditional:
+                # Keyed on the base URL: the date range moves with the cursor and the day
+                response = await self.conditional_get(self.BASE_URL, params={**params, "skip": skip}, validator_key=self.BASE_URL)
+                if response is None:
+                    return None
+            else:
+                response = await self.get(self.BASE_URL, params={**params, "skip": skip})
+        except httpx.HTTPStatusError as e:
+            # openFDA answers "no matches" with a 404
+            if e.response.status_code == 404:
+                return {}
+            raise
+        return response.json()
+
+    def _items(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # OpenFDA returns { meta: ..., results: [...] }
+        items = []
+        for raw_item in data.get("results", []):
+            self.advance_cursor(raw_item.get("report_date"))
+            items.append(self.normalize(raw_item))
+        return items
+
+    def normalize(self, raw_item: Dict[str, Any]) -> Dict[str, Any]:
+        """Adds the unified title/summary/link/published fields the processor reads."""
+        report_date = raw_item.get("report_date") or ""
+        published = f"{report_date[:4]}-{report_date[4:6]}-{report_date[6:8]}" if len(report_date) == 8 else ""
+        firm = raw_item.get("recalling_firm") or ""
+        description = raw_item.get("product_description") or ""
+        number = raw_item.get("recall_number") or ""
+        # openFDA has no page per recall; link the record's own query
+        record_query = quote(f'"{number}"')
+        return {
+            **raw_item,
+            "title": f"{firm} recalls {description[:120]}".strip() if firm else description[:160],
+            "summary": raw_item.get("reason_for_recall") or "",
+            "link": f"{self.BASE_URL}?search=recall_number:{record_query}" if number else "",
+            "published": published,
+            "source_name": self.source_name,
         }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.BASE_URL, params=params, timeout=30.0)
-            response.raise_for_status()
-            data = response.json()
-            
-            # OpenFDA returns { meta: ..., results: [...] }
-            return data.get("results", [])
@@ -0,0 +1,54 @@
+import asyncio
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Shared client state. httpx clients (and asyncio semaphores) belong to the
+# event loop they were first used on, so both are recreated for a new loop.
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+def _http2_available() -> bool:
+    return settings.HTTP_HTTP2 and importlib.util.find_spec("h2") is not None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide pooled client (keep-alive, optional HTTP/2) shared by all ingestors."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            ),
+            headers={"User-Agent": f"{settings.PROJECT_NAME} ingestor"},
+            follow_redirects=True,
+        )
+        _client_loop = loop
+        _host_limits.clear()
+    return _client
+
+@asynccontextmanager
+async def host_limit(url: str):
+    """Caps concurrent requests per host at HTTP_PER_HOST_LIMIT."""
+    get_http_client()  # Resets per-loop state if needed
+    host = urlsplit(url).netloc
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(settings.HTTP_PER_HOST_LIMIT)
+    async with _host_limits[host]:
+        yield
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,41 @@
+import hashlib
+import json
+from typing import Any, Dict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track the click and never change the story
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ocid", "cmpid"}
+
+# Native record ids of the government APIs (CPSC, openFDA, NHTSA)
+NATIVE_ID_FIELDS = ("RecallID", "recall_number", "NHTSACampaignNumber")
+
+def canonical_url(url: str) -> str:
+    """Lowercased scheme/host, no fragment, no tracking params, sorted query."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+def identity_key(source_name: str, item: Dict[str, Any]) -> str:
+    """
+    Stable identity of a fetched item within its source: the API's own record
+    id, else the canonical link, else the feed GUID. Volatile fields (summary
+    edits, re-ordered JSON) no longer make a re-fetched item look new.
+    Only payloads with none of these fall back to hashing the whole item.
+    """
+    for field in NATIVE_ID_FIELDS:
+        if item.get(field):
+            basis = f"id:{item[field]}"
+            break
+    else:
+        if item.get("link"):
+            basis = f"link:{canonical_url(item['link'])}"
+        elif item.get("guid"):
+            basis = f"guid:{item['guid']}"
+        else:
+            payload = {k: v for k, v in item.items() if not k.startswith("_")}
+            basis = "payload:" + json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(f"{source_name}|{basis}".encode()).hexdigest()
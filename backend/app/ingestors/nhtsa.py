@@ -1,7 +1,9 @@
-from typing import List, Dict, Any
-from datetime import datetime
-import httpx
+from typing import AsyncIterator, List, Dict, Any, Optional
+from datetime import datetime, timezone
+import asyncio
 import logging
+import re
+import httpx
 from app.ingestors.base import BaseIngestor
 from app.core.constants import SourceType
 
@@ -10,28 +12,72 @@ logger = logging.getLogger(__name__)
 class NHTSAIngestor(BaseIngestor):
     # NHTSA Recall Query API
     BASE_URL = "https://api.nhtsa.gov/recalls/recallquery"
+    CAMPAIGN_URL = "https://www.nhtsa.gov/recalls?nhtsaId={}"
 
-    def __init__(self):
-        super().__init__(SourceType.GOVT)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(SourceType.GOVT, "NHTSA", client=client)
 
     async def fetch_latest(self) -> List[Dict[str, Any]]:
+        return [item async for item in self.stream_items()]
+
+    async def stream_items(self) -> AsyncIterator[Dict[str, Any]]:
         # Strategy: Fetch recalls for current and previous year
-        # This covers most relevant active recalls
+        # This covers most relevant active recalls. The API has no date
+        # filter, so unchanged years are skipped via conditional GET and
+        # only campaigns received since the cursor are passed on.
         years = [datetime.now().year, datetime.now().year - 1]
-        all_recalls = []
-        
-        async with httpx.AsyncClient() as client:
-            for year in years:
-                try:
-                    params = {"modelyear": str(year), "format": "json"}
-                    response = await client.get(self.BASE_URL, params=params, timeout=30.0)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    # NHTSA returns { Count: ..., Message: ..., Results: [...] }
-                    results = data.get("Results", [])
-                    all_recalls.extend(results)
-                except Exception as e:
-                    logger.error(f"Failed to fetch NHTSA recalls for year {year}: {e}")
         
-        return all_recalls
+        async def fetch_year(year: int):
+            try:
+                params = {"modelyear": str(year), "format": "json"}
+                response = await self.conditional_get(self.BASE_URL, params=params)
+                if response is None:
+                    return []
+                data = response.json()
+                
+                # NHTSA returns { Count: ..., Message: ..., Results: [...] }
+                return data.get("Results", [])
+            except Exception as e:
+                logger.error(f"Failed to fetch NHTSA recalls for year {year}: {e}")
+                raise
+
+        seen = set()
+        for year_results in asyncio.as_completed([fetch_year(year) for year in years]):
+            for raw_item in await year_results:
+                received = self._received_date(raw_item)
+                campaign = raw_item.get("NHTSACampaignNumber")
+                # A campaign spans model years; pass it on once
+                if campaign in seen or (self.cursor and received and received < self.cursor):
+                    continue
+                seen.add(campaign)
+                self.advance_cursor(received)
+                yield self.normalize(raw_item)
+
+    @staticmethod
+    def _received_date(raw_item: Dict[str, Any]) -> Optional[str]:
+        """ReportReceivedDate as YYYY-MM-DD; NHTSA sends ISO, "/Date(ms)/" or DD/MM/YYYY."""
+        value = raw_item.get("ReportReceivedDate") or ""
+        match = re.match(r"/Date\((-?\d+)", value)
+        if match:
+            return datetime.fromtimestamp(int(match.group(1)) / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        if re.match(r"\d{4}-\d{2}-\d{2}", value):
+            return value[:10]
+        try:
+            return datetime.strptime(value, "%d/%m/%Y").strftime("%Y-%m-%d")
+        except ValueError:
+            return None
+
+    def normalize(self, raw_item: Dict[str, Any]) -> Dict[str, Any]:
+        """Adds the unified title/summary/link/published fields the processor reads."""
+        campaign = raw_item.get("NHTSACampaignNumber") or ""
+        vehicle = " ".join(str(raw_item.get(k)) for k in ("Make", "Model", "ModelYear") if raw_item.get(k))
+        component = raw_item.get("Component") or ""
+        summary = " ".join(part for part in [raw_item.get("Summary"), raw_item.get("Consequence")] if part)
+        return {
+            **raw_item,
+            "title": f"{raw_item.get('Manufacturer') or vehicle} recall: {component}".strip(" :"),
+            "summary": summary,
+            "link": self.CAMPAIGN_URL.format(campaign) if campaign else "",
+            "published": self._received_date(raw_item) or "",
+            "source_name": self.source_name,
+        }
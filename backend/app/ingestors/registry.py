@@ -0,0 +1,40 @@
+from typing import List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.ingestors.base import BaseIngestor
+from app.ingestors.rss import RSSIngestor
+from app.ingestors.cpsc import CPSCIngestor
+from app.ingestors.fda import FDAIngestor
+from app.ingestors.nhtsa import NHTSAIngestor
+
+# News feeds: (url, source name). The name is stored as `_source_origin`
+# and drives region scoring in the processor (see app/rules/default_rules.json).
+NEWS_FEEDS = [
+    # Broad India Sources
+    ("https://news.google.com/rss/search?q=product+recall+india+when:15d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-General"),
+    # Regulatory & Specific Signals
+    ("https://news.google.com/rss/search?q=FSSAI+unsafe+sample+when:15d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-FSSAI"),
+    ("https://news.google.com/rss/search?q=food+safety+sample+failed+when:15d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-FoodSafety"),
+    ("https://news.google.com/rss/search?q=CDSCO+alert+drug+when:15d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-CDSCO"),
+    ("https://news.google.com/rss/search?q=drug+licence+cancelled+india+when:15d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-Pharma"),
+    ("https://news.google.com/rss/search?q=food+safety+seizure+india+when:15d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-Seizure"),
+    ("https://news.google.com/rss/search?q=WHO+medical+product+alert+India+when:30d&hl=en-IN&gl=IN&ceid=IN:en", "GoogleNews-IN-WHO"),
+    
+    # US Source (Unchanged)
+    ("https://news.google.com/rss/search?q=product+recall+usa+when:7d&hl=en-US&gl=US&ceid=US:en", "GoogleNews-US")
+]
+
+# Government APIs, synced incrementally from a stored cursor
+GOVT_INGESTORS = [CPSCIngestor, FDAIngestor, NHTSAIngestor]
+
+def build_sources(client: Optional[httpx.AsyncClient] = None) -> List[Tuple[str, BaseIngestor]]:
+    """Every scheduled source as (source name, ingestor)."""
+    sources: List[Tuple[str, BaseIngestor]] = [
+        (source_name, RSSIngestor(feed_url=url, source_name=source_name, client=client))
+        for url, source_name in NEWS_FEEDS
+    ]
+    if settings.INGEST_GOVT_SOURCES:
+        for ingestor_cls in GOVT_INGESTORS:
+            ingestor = ingestor_cls(client=client)
+            sources.append((ingestor.source_name, ingestor))
+    return sources
@@ -1,49 +1,88 @@
-from typing import List, Dict, Any
-import httpx
+from typing import AsyncIterator, List, Dict, Any, Optional
 import xml.etree.ElementTree as ET
 import logging
+import httpx
 from app.ingestors.base import BaseIngestor
 from app.core.constants import SourceType
 
 logger = logging.getLogger(__name__)
 
+# Feed elements that hold one story: RSS 2.0 <item>, Atom <entry>
+ITEM_TAGS = {"item", "entry"}
+
+def _local(tag: str) -> str:
+    """Tag name without its namespace ("{http://www.w3.org/2005/Atom}entry" -> "entry")."""
+    return tag.rsplit("}", 1)[-1]
+
 class RSSIngestor(BaseIngestor):
-    def __init__(self, feed_url: str, source_name: str = "RSS"):
-        super().__init__(SourceType.NEWS)
+    def __init__(self, feed_url: str, source_name: str = "RSS", client: Optional[httpx.AsyncClient] = None):
+        super().__init__(SourceType.NEWS, source_name, client=client)
         self.feed_url = feed_url
-        self.source_name = source_name
 
     async def fetch_latest(self) -> List[Dict[str, Any]]:
+        return [item async for item in self.stream_items()]
+
+    async def stream_items(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parses the feed incrementally as it downloads and yields each item as
+        soon as its closing tag arrives. Finished elements are dropped from the
+        tree, so memory stays flat however long the feed is.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.feed_url, timeout=30.0)
-                response.raise_for_status()
-                content = response.content
-
-            root = ET.fromstring(content)
-            items = []
-            
-            # Navigate standard RSS 2.0 structure: channel -> item
-            channel = root.find("channel")
-            if channel is None:
-                # Some feeds might be Atom, but Google News is typically RSS 2.0
-                return []
-
-            for item in channel.findall("item"):
-                title = item.find("title").text if item.find("title") is not None else ""
-                link = item.find("link").text if item.find("link") is not None else ""
-                pubDate = item.find("pubDate").text if item.find("pubDate") is not None else ""
-                description = item.find("description").text if item.find("description") is not None else ""
-                
-                items.append({
-                    "title": title,
-                    "link": link,
-                    "published": pubDate,
-                    "summary": description,
-                    "source_name": self.source_name
-                })
-            
-            return items
+            async with self.conditional_stream(self.feed_url) as chunks:
+                if chunks is None:
+                    # Feed unchanged since the last fetch
+                    return
+
+                parser = ET.XMLPullParser(events=("start", "end"))
+                path: List[ET.Element] = []
+                async for chunk in chunks:
+                    parser.feed(chunk)
+                    for item in self._drain(parser, path):
+                        yield item
+                parser.close()
+                for item in self._drain(parser, path):
+                    yield item
         except Exception as e:
             logger.error(f"Failed to fetch RSS from {self.feed_url}: {e}")
-            return []
+            # Surface the failure so the poller can back off this source
+            raise
+
+    def _drain(self, parser: ET.XMLPullParser, path: List[ET.Element]) -> List[Dict[str, Any]]:
+        items = []
+        for event, elem in parser.read_events():
+            if event == "start":
+                path.append(elem)
+                continue
+            path.pop()
+            if _local(elem.tag) not in ITEM_TAGS:
+                continue
+            items.append(self._parse_item(elem))
+            # Detach the finished item so the tree never holds more than one
+            if path:
+                path[-1].remove(elem)
+            elem.clear()
+        return items
+
+    def _parse_item(self, elem: ET.Element) -> Dict[str, Any]:
+        fields: Dict[str, Optional[str]] = {}
+        for child in elem:
+            name = _local(child.tag)
+            if name == "link" and child.get("href") is not None:
+                # Atom: <link href="..."/>, prefer the rel="alternate" (default) one
+                if child.get("rel", "alternate") == "alternate" or "link" not in fields:
+                    fields["link"] = child.get("href")
+            elif name not in fields:
+                fields[name] = child.text
+
+        item = {
+            "title": fields.get("title") or "",
+            "link": fields.get("link") or "",
+            "published": fields.get("pubDate") or fields.get("published") or fields.get("updated") or "",
+            "summary": fields.get("description") or fields.get("summary") or fields.get("content") or "",
+            "source_name": self.source_name
+        }
+        guid = fields.get("guid") or fields.get("id")
+        if guid:
+            item["guid"] = guid
+        return item
@@ -7,27 +7,23 @@ from app.api.routes_watchlists import router as watchlists_router
 from app.api.routes_admin import router as admin_router
 from app.core.config import settings
 from app.core.database import init_db
-from app.models.user import User, Watchlist  # Import to register with SQLModel metadata used in init_db
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from app.services.scheduler_service import run_ingestion_cycle
+from app.models.user import User, Watchlist, WatchlistChange  # Import to register with SQLModel metadata used in init_db
+from app.models.analysis import NLPAnalysisCache
+from app.models.ingestion import HTTPValidator, SourceState, JobLease, IndexVersion
+from app.models.alert import PendingAlert, NotificationJob
+from app.worker import spawn_embedded, stop_embedded
 
 # --- Lifespan (replaces deprecated @app.on_event) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     init_db()
-    scheduler = AsyncIOScheduler()
-    
-    # Run immediately on startup
-    scheduler.add_job(run_ingestion_cycle, "date")
-    
-    # And then run every 12 hours
-    scheduler.add_job(run_ingestion_cycle, "interval", hours=12)
-    scheduler.start()
-    print("🕒 Scheduler started: Ingestion pipeline running now and every 12 hours.")
+    # Ingestion and processing run in the worker process (python -m app.worker);
+    # single-box installs can have the API start it as a child process
+    worker = await spawn_embedded() if settings.EMBEDDED_WORKER else None
     yield
     # Shutdown
-    scheduler.shutdown()
+    await stop_embedded(worker)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
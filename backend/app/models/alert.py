@@ -0,0 +1,32 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import UniqueConstraint
+from sqlmodel import SQLModel, Field
+
+class PendingAlert(SQLModel, table=True):
+    """One watchlist hit waiting for (or included in) a user's alert digest"""
+    __table_args__ = (UniqueConstraint("user_id", "recall_id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    recall_id: int = Field(index=True)
+    watchlist_id: Optional[int] = None
+    match_value: str # Watched value that matched (first one, if several did)
+    urgent: bool = Field(default=False) # CONFIRMED recall: bypasses the digest window
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = Field(default=None, index=True) # NULL = not delivered yet
+
+class NotificationJob(SQLModel, table=True):
+    """One outbound notification in the delivery outbox (see app/services/outbox.py)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    channel: str = Field(index=True) # NotificationChannel
+    user_id: int = Field(foreign_key="user.id", index=True)
+    payload: str # JSON: email address/subject/body, or push subscription id + message
+    status: str = Field(default="pending", index=True) # NotificationStatus
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    locked_by: Optional[str] = None # Worker sending it
+    locked_until: Optional[datetime] = None # Claim expiry: a crashed worker's jobs are retried after it
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
@@ -0,0 +1,9 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+class NLPAnalysisCache(SQLModel, table=True):
+    """Persisted NLPEngine output, keyed by text hash and keyword-set version"""
+    text_hash: str = Field(primary_key=True)
+    keyword_version: str = Field(primary_key=True)
+    result: str # JSON row in the shape of BatchAnalysis.row()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
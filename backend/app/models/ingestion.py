@@ -0,0 +1,40 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+class HTTPValidator(SQLModel, table=True):
+    """Last seen HTTP validators for one request URL (conditional GET cache)"""
+    url: str = Field(primary_key=True) # Full URL including query string, or the base URL of a cursor query
+    source_name: Optional[str] = Field(default=None, index=True)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None # sha256 of the last body we processed
+    checked_at: Optional[datetime] = None
+    changed_at: Optional[datetime] = None
+
+class SourceState(SQLModel, table=True):
+    """Incremental sync state of one ingestion source"""
+    source_name: str = Field(primary_key=True)
+    cursor: Optional[str] = None # High-water mark of the last persisted fetch (date or id)
+    updated_at: Optional[datetime] = None
+
+    # Adaptive polling (see services/poller.py)
+    poll_interval: Optional[float] = None # Seconds between healthy polls (error backoff applies on top)
+    next_poll_at: Optional[datetime] = None
+    last_polled_at: Optional[datetime] = None
+    new_item_rate: Optional[float] = None # EMA of new items per poll
+    error_rate: Optional[float] = None # EMA of failed polls (0..1)
+    consecutive_errors: Optional[int] = None
+
+class JobLease(SQLModel, table=True):
+    """Time-limited claim on a cluster-wide job: only its holder runs it"""
+    name: str = Field(primary_key=True) # Job name, e.g. "ingestion"
+    holder: Optional[str] = None # host:pid:nonce of the owning process
+    acquired_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None # Anyone may take the lease over after this
+
+class IndexVersion(SQLModel, table=True):
+    """Change counter of a table mirrored by in-memory indexes in other processes"""
+    name: str = Field(primary_key=True) # e.g. "watchlist"
+    version: int = 0
+    updated_at: Optional[datetime] = None
@@ -2,6 +2,7 @@ from typing import Optional, List
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Relationship
 from app.core.constants import Region, ConfidenceLevel, SourceType
+from app.core.payload import decode_payload
 
 class RecallBase(SQLModel):
     title: str
@@ -20,6 +21,7 @@ class Recall(RecallBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    rule_version: Optional[str] = Field(default=None, index=True) # Processor/rules version that last classified it
     
     # Relationships
     sources: List["RecallSource"] = Relationship(back_populates="recall")
@@ -31,13 +33,34 @@ class RecallSource(SQLModel, table=True):
     url: str
     title: str
     published_at: Optional[datetime] = None
+    raw_id: Optional[int] = Field(default=None, foreign_key="rawrecall.id", index=True) # RawRecall it came from
     
     recall: Optional[Recall] = Relationship(back_populates="sources")
 
-class RawRecall(SQLModel, table=True):
-    """Raw ingestion payload before normalization"""
-    id: Optional[int] = Field(default=None, primary_key=True)
+class RawRecallBase(SQLModel):
     source_id: str = Field(index=True) # Unique ID from source (e.g., CPSC ID)
+    identity_key: Optional[str] = Field(default=None, unique=True, index=True) # See ingestors/identity.py
     source_type: SourceType
-    raw_payload: str # JSON string
+    raw_payload: str # JSON string ("" when stored compressed in payload_blob)
+    payload_blob: Optional[bytes] = None # Compressed JSON (see core/payload.py)
+    payload_codec: Optional[str] = None # "zlib" / "zstd"; NULL = plain raw_payload
     ingested_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Processing state (NULL processed_at = not yet seen by the processor)
+    processed_at: Optional[datetime] = Field(default=None, index=True)
+    outcome: Optional[str] = None # ProcessOutcome
+    rule_version: Optional[str] = None
+
+    def payload_json(self) -> str:
+        """The JSON payload text, decompressed if needed."""
+        return decode_payload(self.raw_payload, self.payload_blob, self.payload_codec)
+
+class RawRecall(RawRecallBase, table=True):
+    """Raw ingestion payload before normalization"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+class RawRecallArchive(RawRecallBase, table=True):
+    """Processed raw rows past retention that produced no recall (see scripts/archive_raw.py)"""
+    id: Optional[int] = Field(default=None, primary_key=True) # Same id as in RawRecall
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    exported_at: Optional[datetime] = None # Payload moved to an export file; the row stays as its identity's tombstone
@@ -35,3 +35,13 @@ class Watchlist(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     user: Optional[User] = Relationship(back_populates="watchlists")
+
+class WatchlistChange(SQLModel, table=True):
+    """One watchlist create/delete, keyed by the IndexVersion stamp it moved to, so other processes can catch up incrementally"""
+    version: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    watchlist_id: int
+    user_id: int
+    type: str
+    value: str
+    removed: bool = Field(default=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
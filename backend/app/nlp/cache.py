@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from sqlmodel import Session, select, delete
+from app.core.config import settings
+from app.core.database import insert_ignore
+from app.models.analysis import NLPAnalysisCache
+from app.nlp.engine import NLPEngine, BatchAnalysis
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class AnalysisCache:
+    """
+    Two-level cache in front of NLPEngine.analyze_many: an in-process LRU and
+    the NLPAnalysisCache table. Entries are keyed by (sha1 of the cleaned text,
+    NLPEngine.keyword_version()), so editing any keyword set changes the key
+    and old entries are simply never hit again.
+    """
+    # Keeps IN (...) lists under SQLite's bound-parameter limit
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, max_size: int = settings.NLP_CACHE_SIZE):
+        self.memory = LRUCache(max_size)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def analyze_many(self, session: Session, texts: List[str]) -> BatchAnalysis:
+        rows = self.lookup(session, texts)
+
+        # Compute the rest in one batch and persist it
+        todo = [i for i, row in enumerate(rows) if row is None]
+        if todo:
+            batch = NLPEngine.analyze_many([texts[i] for i in todo])
+            for j, i in enumerate(todo):
+                rows[i] = batch.row(j)
+            self.store_many(session, [(texts[i], rows[i]) for i in todo])
+
+        return BatchAnalysis.from_rows(rows)
+
+    def lookup(self, session: Session, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Cached analysis rows for `texts`, None where neither layer has one."""
+        version = NLPEngine.current_version()
+        hashes = [self.text_hash(t) for t in texts]
+        rows: List[Optional[Dict[str, Any]]] = [self.memory.get((h, version)) for h in hashes]
+
+        # Persisted layer for whatever the LRU did not have
+        missing = {h for h, row in zip(hashes, rows) if row is None}
+        if missing:
+            stored = self._load(session, missing, version)
+            for i, h in enumerate(hashes):
+                if rows[i] is None and h in stored:
+                    rows[i] = stored[h]
+                    self.memory.put((h, version), rows[i])
+
+        self.hits += sum(row is not None for row in rows)
+        return rows
+
+    def store_many(self, session: Session, results: List[tuple]):
+        """Records freshly computed (text, analysis row) pairs, here or in the process pool."""
+        version = NLPEngine.current_version()
+        new_rows = {}
+        for text, row in results:
+            key = (self.text_hash(text), version)
+            self.memory.put(key, row)
+            new_rows[key[0]] = row
+        self.misses += len(results)
+        if new_rows:
+            insert_ignore(session, NLPAnalysisCache, [
+                {"text_hash": h, "keyword_version": version, "result": json.dumps(row)}
+                for h, row in new_rows.items()
+            ], ["text_hash", "keyword_version"])
+
+    def _load(self, session: Session, hashes, version: str) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        hashes = list(hashes)
+        for start in range(0, len(hashes), self.LOOKUP_CHUNK):
+            chunk = hashes[start:start + self.LOOKUP_CHUNK]
+            statement = (
+                select(NLPAnalysisCache.text_hash, NLPAnalysisCache.result)
+                .where(NLPAnalysisCache.keyword_version == version)
+                .where(NLPAnalysisCache.text_hash.in_(chunk))
+            )
+            for text_hash, result in session.exec(statement):
+                found[text_hash] = json.loads(result)
+        return found
+
+    def purge_stale(self, session: Session) -> int:
+        """Delete persisted entries written under an older keyword version."""
+        version = NLPEngine.current_version()
+        result = session.exec(delete(NLPAnalysisCache).where(NLPAnalysisCache.keyword_version != version))
+        session.commit()
+        return result.rowcount
+
+# Singleton Instance
+analysis_cache = AnalysisCache()
@@ -1,5 +1,48 @@
 import re
-from typing import Dict, Any
+import hashlib
+from bisect import bisect_right
+from typing import Dict, Any, List
+from app.nlp.matcher import KeywordMatcher
+
+# Very basic regex for capitalized words (potential brands) - Stage 2 (Lite)
+# Captures "Brand Name" distinct from start of sentences
+ENTITY_PATTERN = re.compile(r'(?<!^)(?<!\. )[A-Z][a-z]+')
+
+class BatchAnalysis:
+    """
+    Column-oriented result of NLPEngine.analyze_many: one list per field,
+    indexed by the position of the text in the input batch.
+    """
+    COLUMNS = (
+        "is_recall", "intent_score", "intent_keywords", "is_india", "india_score",
+        "foreign_score", "is_food_med", "food_med_score", "entities"
+    )
+
+    def __init__(self, size: int):
+        self.size = size
+        self.intent_score: List[int] = [0] * size
+        self.intent_keywords: List[List[str]] = [[] for _ in range(size)]
+        self.india_score: List[int] = [0] * size
+        self.foreign_score: List[int] = [0] * size
+        self.food_med_score: List[int] = [0] * size
+        self.entities: List[List[str]] = [[] for _ in range(size)]
+        self.is_recall: List[bool] = []
+        self.is_india: List[bool] = []
+        self.is_food_med: List[bool] = []
+
+    def __len__(self):
+        return self.size
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Row view in the shape returned by analyze_text (plus "entities")."""
+        return {col: getattr(self, col)[i] for col in self.COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "BatchAnalysis":
+        batch = cls(len(rows))
+        for col in cls.COLUMNS:
+            setattr(batch, col, [row[col] for row in rows])
+        return batch
 
 class NLPEngine:
     # 5.1 Stage 1: Recall Intent Keywords
@@ -41,46 +84,77 @@ class NLPEngine:
         "paneer", "oil", "water", "juice", "bakery", "masala"
     }
 
+    # Keyword set attribute -> tag reported by the compiled matcher
+    KEYWORD_SETS = {
+        "intent": "RECALL_KEYWORDS",
+        "india_high": "INDIA_HIGH_SCORE_KEYWORDS",
+        "india_low": "INDIA_LOW_SCORE_KEYWORDS",
+        "foreign_high": "FOREIGN_HIGH_SCORE_KEYWORDS",
+        "foreign_low": "FOREIGN_LOW_SCORE_KEYWORDS",
+        "food_med": "FOOD_MED_KEYWORDS",
+    }
+
+    # Bump when scoring logic changes without a keyword change
+    # 2: entities in first-occurrence order
+    ANALYZER_VERSION = 2
+
+    _matcher: KeywordMatcher = None
+    _matcher_version: str = None
+
+    @classmethod
+    def get_matcher(cls) -> KeywordMatcher:
+        """Single-pass matcher over every keyword set, compiled on first use."""
+        if cls.__dict__.get("_matcher") is None:
+            cls._matcher = KeywordMatcher({
+                tag: getattr(cls, attr) for tag, attr in cls.KEYWORD_SETS.items()
+            })
+            cls._matcher_version = cls.keyword_version()
+        return cls._matcher
+
+    @classmethod
+    def reload_keywords(cls):
+        """Drop the compiled matcher so edited keyword sets take effect."""
+        cls._matcher = None
+
+    @classmethod
+    def keyword_version(cls) -> str:
+        """Fingerprint of every keyword set and the entity pattern."""
+        h = hashlib.sha1(f"v{cls.ANALYZER_VERSION}|{ENTITY_PATTERN.pattern}".encode())
+        for tag, attr in sorted(cls.KEYWORD_SETS.items()):
+            h.update(f"|{tag}:".encode())
+            h.update("\x00".join(sorted(getattr(cls, attr))).encode())
+        return h.hexdigest()[:16]
+
+    @classmethod
+    def current_version(cls) -> str:
+        """keyword_version(), recompiling the matcher if the keyword sets changed."""
+        version = cls.keyword_version()
+        if cls.__dict__.get("_matcher") is not None and cls._matcher_version != version:
+            cls.reload_keywords()
+        return version
+
     @classmethod
     def analyze_text(cls, text: str) -> Dict[str, Any]:
         text_lower = text.lower()
+        hits = cls.get_matcher().find_by_tag(text_lower)
+        empty = set()
         
         # 1. Intent Detection
-        intent_score = 0
-        found_keywords = []
-        for kw in cls.RECALL_KEYWORDS:
-            if re.search(rf'\b{re.escape(kw)}\b', text_lower):
-                intent_score += 1
-                found_keywords.append(kw)
+        intent_hits = hits.get("intent", empty)
+        intent_score = len(intent_hits)
+        # Keep the original (set iteration) ordering of reported keywords
+        found_keywords = [kw for kw in cls.RECALL_KEYWORDS if kw in intent_hits]
         
         is_recall = intent_score > 0 # Hard gate: must have at least one keyword
 
         # 2. Region Scoring (Replaces simple booleans)
-        india_score = 0
-        for kw in cls.INDIA_HIGH_SCORE_KEYWORDS:
-            if re.search(rf'\b{re.escape(kw)}\b', text_lower):
-                india_score += 5
-        
-        for kw in cls.INDIA_LOW_SCORE_KEYWORDS:
-            if re.search(rf'\b{re.escape(kw)}\b', text_lower):
-                india_score += 2
-                
-        foreign_score = 0
-        for kw in cls.FOREIGN_HIGH_SCORE_KEYWORDS:
-            if re.search(rf'\b{re.escape(kw)}\b', text_lower):
-                foreign_score += 5
-                
-        for kw in cls.FOREIGN_LOW_SCORE_KEYWORDS:
-            if re.search(rf'\b{re.escape(kw)}\b', text_lower):
-                foreign_score += 2
+        india_score = 5 * len(hits.get("india_high", empty)) + 2 * len(hits.get("india_low", empty))
+        foreign_score = 5 * len(hits.get("foreign_high", empty)) + 2 * len(hits.get("foreign_low", empty))
 
         is_india = india_score >= 5 and india_score >= (foreign_score + 2)
 
         # 3. Food/Medicine Context Detection
-        food_med_score = 0
-        for kw in cls.FOOD_MED_KEYWORDS:
-            if re.search(rf'\b{re.escape(kw)}\b', text_lower):
-                food_med_score += 1
+        food_med_score = len(hits.get("food_med", empty))
                 
         is_food_med = food_med_score > 0
 
@@ -95,9 +169,69 @@ class NLPEngine:
             "food_med_score": food_med_score
         }
 
+    @classmethod
+    def analyze_many(cls, texts: List[str]) -> BatchAnalysis:
+        """
+        Batch equivalent of analyze_text + extract_entity_candidates.
+        The lowercased texts are joined and scanned once; hits are mapped back
+        to their document by offset. Keywords never contain a newline, so the
+        separator cannot create or hide a match or a word boundary.
+        """
+        batch = BatchAnalysis(len(texts))
+        lowered = [t.lower() for t in texts]
+        starts = []
+        pos = 0
+        for t in lowered:
+            starts.append(pos)
+            pos += len(t) + 1
+
+        matcher = cls.get_matcher()
+        weights = {
+            "intent": (batch.intent_score, 1),
+            "india_high": (batch.india_score, 5),
+            "india_low": (batch.india_score, 2),
+            "foreign_high": (batch.foreign_score, 5),
+            "foreign_low": (batch.foreign_score, 2),
+            "food_med": (batch.food_med_score, 1),
+        }
+        # Hits arrive in offset order, so the owning document only moves forward
+        doc = 0
+        next_start = starts[1] if len(starts) > 1 else pos
+        seen = set()
+        tag_table = {
+            kw: [(tag,) + weights[tag] for tag in tags] for kw, tags in matcher.tags.items()
+        }
+        for start, kw in matcher.iter_hits("\n".join(lowered)):
+            if start >= next_start:
+                doc = bisect_right(starts, start) - 1
+                next_start = starts[doc + 1] if doc + 1 < len(starts) else pos
+                seen = set()
+            if kw in seen:
+                continue
+            seen.add(kw)
+            for tag, column, weight in tag_table[kw]:
+                column[doc] += weight
+                if tag == "intent":
+                    batch.intent_keywords[doc].append(kw)
+
+        # Keep the original (set iteration) ordering of reported keywords
+        order = {kw: i for i, kw in enumerate(cls.RECALL_KEYWORDS)}
+        for kws in batch.intent_keywords:
+            if len(kws) > 1:
+                kws.sort(key=order.__getitem__)
+
+        batch.is_recall = [score > 0 for score in batch.intent_score]
+        batch.is_india = [
+            india >= 5 and india >= (foreign + 2)
+            for india, foreign in zip(batch.india_score, batch.foreign_score)
+        ]
+        batch.is_food_med = [score > 0 for score in batch.food_med_score]
+        batch.entities = [cls.extract_entity_candidates(t) for t in texts]
+        return batch
+
     @classmethod
     def extract_entity_candidates(cls, text: str):
-        # Very basic regex for capitalized words (potential brands) - Stage 2 (Lite)
         # In a real app, this would be spaCy.
-        # Captures "Brand Name" distinct from start of sentences
-        return list(set(re.findall(r'(?<!^)(?<!\. )[A-Z][a-z]+', text)))
+        # Distinct, in order of appearance: the first one becomes the brand, so
+        # it must not depend on set order (which differs between processes)
+        return list(dict.fromkeys(ENTITY_PATTERN.findall(text)))
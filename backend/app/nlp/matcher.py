@@ -0,0 +1,203 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+class KeywordMatcher:
+    """
+    Compiles a tagged keyword list into a single trie-shaped regex so a text is
+    scanned once instead of once per keyword.
+
+    Semantics are identical to running ``re.search(rf'\\b{re.escape(kw)}\\b', text)``
+    for every keyword (or a plain ``kw in text`` when ``word_boundary=False``):
+    each start position reports the longest keyword that matches there, and the
+    shorter keywords that are prefixes of it (and would also match) are added
+    from a precomputed table.
+    """
+
+    def __init__(self, tagged_keywords: Dict[str, Iterable[str]], word_boundary: bool = True):
+        # keyword -> tags (a keyword may belong to several sets, e.g. "fda")
+        self.tags: Dict[str, Tuple[str, ...]] = {}
+        for tag, keywords in tagged_keywords.items():
+            for kw in keywords:
+                self.tags[kw] = self.tags.get(kw, ()) + (tag,)
+
+        self.word_boundary = word_boundary
+        self.implied = {kw: self._implied_prefixes(kw) for kw in self.tags}
+
+        if self.tags:
+            body = self._trie_pattern(sorted(self.tags))
+            if word_boundary:
+                self.pattern = re.compile(rf'\b(?=({body})\b)')
+            else:
+                self.pattern = re.compile(rf'(?=({body}))')
+        else:
+            self.pattern = None
+
+    def _implied_prefixes(self, kw: str) -> Tuple[str, ...]:
+        """Keywords that also match wherever `kw` matches (same start position)."""
+        implied = []
+        for other in self.tags:
+            if other == kw or not kw.startswith(other):
+                continue
+            if self.word_boundary and not self._boundary_at(kw, len(other)):
+                continue
+            implied.append(other)
+        return tuple(implied)
+
+    @staticmethod
+    def _boundary_at(s: str, i: int) -> bool:
+        is_word = lambda ch: ch.isalnum() or ch == "_"
+        return is_word(s[i - 1]) != is_word(s[i])
+
+    @classmethod
+    def _trie_pattern(cls, words: List[str]) -> str:
+        # Build a character trie, then emit it as nested alternations.
+        # Continuations come before the "end here" option so the regex prefers
+        # the longest keyword and backtracks to shorter ones on a failed \b.
+        trie: dict = {}
+        for w in words:
+            node = trie
+            for ch in w:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        return cls._emit(trie)
+
+    @classmethod
+    def _emit(cls, node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + cls._emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if terminal else body
+
+    def iter_hits(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yields (start, keyword) for every keyword occurrence, prefixes included."""
+        if self.pattern is None:
+            return
+        for m in self.pattern.finditer(text):
+            kw = m.group(1)
+            start = m.start()
+            yield start, kw
+            for prefix in self.implied[kw]:
+                yield start, prefix
+
+    def find(self, text: str) -> Set[str]:
+        """Distinct keywords present in `text` (already lowercased by the caller)."""
+        hits: Set[str] = set()
+        if self.pattern is None:
+            return hits
+        for m in self.pattern.finditer(text):
+            kw = m.group(1)
+            hits.add(kw)
+            hits.update(self.implied[kw])
+        return hits
+
+    def find_by_tag(self, text: str) -> Dict[str, Set[str]]:
+        """Keyword hits grouped by tag."""
+        grouped: Dict[str, Set[str]] = {}
+        for kw in self.find(text):
+            for tag in self.tags[kw]:
+                grouped.setdefault(tag, set()).add(kw)
+        return grouped
+
+class AhoCorasick:
+    """
+    Substring matcher over a fixed word list (Aho-Corasick): one pass over a
+    text finds every word it contains, however many words there are.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = list(dict.fromkeys(w for w in words if w))
+        # Per state: transitions, failure link, word ending here, nearest
+        # state down the failure chain that ends a word
+        self.goto: List[Dict[str, int]] = [{}]
+        self.ends: List[str] = [""]
+        for word in self.words:
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.ends.append("")
+                state = nxt
+            self.ends[state] = word
+
+        self.fail = [0] * len(self.goto)
+        self.output = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                target = self.fail[nxt]
+                self.output[nxt] = target if self.ends[target] else self.output[target]
+
+    def find(self, text: str) -> Set[str]:
+        hits: Set[str] = set()
+        goto, fail, ends, output = self.goto, self.fail, self.ends, self.output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = state if ends[state] else output[state]
+            while hit:
+                hits.add(ends[hit])
+                hit = output[hit]
+        return hits
+
+class GrowingSubstringMatcher:
+    """
+    Substring matcher over a word set that keeps changing. Each word goes through
+    O(log n) automaton builds over its lifetime: new words wait in a small
+    buffer (checked with ``in``), full buffers become Aho-Corasick automata,
+    and automata of equal size are merged, so there are only O(log n) of
+    them to scan. Removed words stay in their automaton and are filtered
+    out, until they outnumber the live ones and everything is rebuilt.
+    """
+
+    BUFFER = 32
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._reset(words)
+
+    def _reset(self, words: Iterable[str]):
+        self._live: Set[str] = {w for w in words if w}
+        self._indexed: Set[str] = set(self._live)
+        # Automata with the number of words each was built from, largest first
+        self._levels: List[Tuple[int, AhoCorasick]] = [(len(self._live), AhoCorasick(self._live))] if self._live else []
+        self._pending: List[str] = []
+
+    def __len__(self):
+        return len(self._live)
+
+    def add(self, word: str):
+        if not word or word in self._live:
+            return
+        self._live.add(word)
+        if word in self._indexed:
+            return
+        self._indexed.add(word)
+        self._pending.append(word)
+        if len(self._pending) >= self.BUFFER:
+            words, self._pending = self._pending, []
+            # Binary-counter merging: each word is rebuilt O(log n) times
+            while self._levels and self._levels[-1][0] <= len(words):
+                words = self._levels.pop()[1].words + words
+            self._levels.append((len(words), AhoCorasick(words)))
+
+    def discard(self, word: str):
+        self._live.discard(word)
+        if len(self._indexed) > 2 * max(len(self._live), self.BUFFER):
+            self._reset(self._live)
+
+    def find(self, text: str) -> Set[str]:
+        hits = {w for w in list(self._pending) if w in text}
+        for _, automaton in list(self._levels):
+            hits.update(automaton.find(text))
+        return {w for w in hits if w in self._live}
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.constants import Region, ConfidenceLevel
+from app.nlp.matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "default_rules.json")
+
+# Rule id prefixes (keyword tags in the shared matcher)
+NOISE = "noise."
+SIGNAL = "signal."
+CATEGORY = "category."
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _boundary(text: str, i: int) -> bool:
+    before = i > 0 and _is_word(text[i - 1])
+    after = i < len(text) and _is_word(text[i])
+    return before != after
+
+class RuleSet:
+    """
+    One compiled version of the classification rules.
+
+    Noise, India signal and category keywords share a single substring-mode
+    KeywordMatcher, so a document is scanned once for all of them. Noise
+    and category hits are then checked for word boundaries, which reproduces
+    the former ``re.search(rf'\\b{kw}\\b', text)`` test; signal hits stay
+    plain substring tests, as the ladder always used ``kw in text``.
+    """
+
+    def __init__(self, config: Dict[str, Any], digest: str = ""):
+        self.config = config
+        self.digest = digest
+        self.version = f"{config.get('version', 0)}.{digest[:8]}" if digest else str(config.get("version", 0))
+
+        tagged: Dict[str, list] = {}
+        for group, keywords in config.get("noise", {}).items():
+            tagged[NOISE + group] = keywords
+        self.ladder = config.get("india_signals", [])
+        for rung in self.ladder:
+            tagged[SIGNAL + rung["signal"]] = rung["keywords"]
+        self.categories = config.get("categories", [])
+        self.category_aliases: Dict[str, Tuple[str, ...]] = {}
+        for entry in self.categories:
+            tagged[CATEGORY + entry["category"]] = entry["keywords"]
+            names = [entry["category"]] + entry.get("aliases", [])
+            self.category_aliases[entry["category"]] = tuple(dict.fromkeys(n.lower() for n in names))
+        self.matcher = KeywordMatcher(tagged, word_boundary=False)
+        self.noise_order = [NOISE + group for group in config.get("noise", {})]
+
+        patterns = config.get("india_source_patterns", [])
+        self.india_source_pattern = re.compile("|".join(f"(?:{p})" for p in patterns)) if patterns else None
+        self._india_source_cache: Dict[str, bool] = {}
+        self.us_sources = set(config.get("us_sources", []))
+
+        region = config.get("region", {})
+        self.india_source_boost = region.get("india_source_boost", 0)
+        self.us_source_boost = region.get("us_source_boost", 0)
+        self.india_min_score = region.get("india_min_score", 0)
+        self.india_margin = region.get("india_margin", 0)
+        self.foreign_min_score = region.get("foreign_min_score", 0)
+
+        default = config.get("india_signal_default", {})
+        self.default_signal = default.get("signal")
+        self.default_confidence = ConfidenceLevel(default.get("confidence", ConfidenceLevel.WATCH.value))
+
+    def scan(self, lower_text: str) -> Dict[str, str]:
+        """One pass over the (lowercased) document: rule id -> first keyword that fired it."""
+        hits: Dict[str, str] = {}
+        for start, kw in self.matcher.iter_hits(lower_text):
+            for tag in self.matcher.tags[kw]:
+                if tag in hits:
+                    continue
+                if tag.startswith((NOISE, CATEGORY)) and not (_boundary(lower_text, start) and _boundary(lower_text, start + len(kw))):
+                    continue
+                hits[tag] = kw
+        return hits
+
+    def noise_rule(self, hits: Dict[str, str]) -> Optional[str]:
+        """The noise rule that fired (e.g. "noise.finance:raised"), if any."""
+        for tag in self.noise_order:
+            if tag in hits:
+                return f"{tag}:{hits[tag]}"
+        return None
+
+    def is_india_source(self, source_origin: str) -> bool:
+        """Whether the feed origin name marks an Indian source (cached per origin)."""
+        cached = self._india_source_cache.get(source_origin)
+        if cached is None:
+            o = source_origin.strip().lower()
+            cached = bool(self.india_source_pattern and self.india_source_pattern.search(o))
+            self._india_source_cache[source_origin] = cached
+        return cached
+
+    def region(self, source_origin: str, india_score: int, foreign_score: int) -> Tuple[Region, str]:
+        """Score-based region assignment; returns (region, rule id)."""
+        # Boost India score if the feed origin is explicitly Indian
+        if self.is_india_source(source_origin):
+            india_score += self.india_source_boost
+        # Boost Region.US (Foreign) if explicitly from a US feed or agency
+        if source_origin.strip() in self.us_sources:
+            foreign_score += self.us_source_boost
+
+        if india_score >= self.india_min_score and india_score >= (foreign_score + self.india_margin):
+            return Region.IN, "region.india_score"
+        if foreign_score >= self.foreign_min_score:
+            return Region.US, "region.foreign_score"
+        return Region.GLOBAL, "region.default"
+
+    def india_signal(self, hits: Dict[str, str]) -> Tuple[str, ConfidenceLevel, str]:
+        """First rung of the India signal ladder present in `hits`: (signal, confidence, rule id)."""
+        for rung in self.ladder:
+            tag = SIGNAL + rung["signal"]
+            if tag in hits:
+                return rung["signal"], ConfidenceLevel(rung["confidence"]), f"{tag}:{hits[tag]}"
+        return self.default_signal, self.default_confidence, "signal.default"
+
+    def category(self, hits: Dict[str, str]) -> Tuple[Optional[str], Optional[str]]:
+        """First configured category present in `hits`: (category, rule id)."""
+        for entry in self.categories:
+            tag = CATEGORY + entry["category"]
+            if tag in hits:
+                return entry["category"], f"{tag}:{hits[tag]}"
+        return None, None
+
+class RuleEngine:
+    """
+    Loads the rule config (RULES_PATH, else the bundled default) and
+    recompiles it when the file changes on disk, so rules can be edited
+    without a restart. Callers take a RuleSet snapshot per batch.
+    """
+
+    # Seconds between mtime checks
+    CHECK_INTERVAL = 5.0
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.RULES_PATH or DEFAULT_RULES_PATH
+        self._rules: Optional[RuleSet] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> RuleSet:
+        now = time.monotonic()
+        if self._rules is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return self._rules
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                if self._rules is None:
+                    raise
+                logger.error(f"Rules file {self.path} unavailable, keeping version {self._rules.version}: {e}")
+                return self._rules
+            if self._rules is None or mtime != self._mtime:
+                self._load(mtime)
+        return self._rules
+
+    def _load(self, mtime: float):
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        try:
+            rules = RuleSet(json.loads(raw), hashlib.sha1(raw).hexdigest())
+        except Exception as e:
+            # A broken edit must not take the processor down
+            if self._rules is None:
+                raise
+            logger.error(f"Invalid rules in {self.path}, keeping version {self._rules.version}: {e}")
+            self._mtime = mtime
+            return
+        self._rules, self._mtime = rules, mtime
+        logger.info(f"📏 Loaded classification rules v{rules.version} from {self.path}")
+
+    def version(self) -> str:
+        return self.current().version
+
+# Singleton Instance
+rule_engine = RuleEngine()
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.constants import ConfidenceLevel
+from app.core.database import engine, insert_ignore
+from app.models.alert import PendingAlert
+from app.models.recall import Recall
+from app.models.user import User, Watchlist
+from app.services.watchlist_index import watchlist_index
+
+logger = logging.getLogger(__name__)
+
+# Delivered alerts are kept this long (they define each user's last digest)
+SENT_KEEP_DAYS = 7
+
+class AlertDigester:
+    """
+    Batch matching and per-user alert digests.
+
+    match() joins a whole batch of new recalls against the watchlist index
+    and records one PendingAlert per (user, recall). flush() then sends each
+    user at most one digest per ALERT_DIGEST_WINDOW with everything pending
+    for them; hits on CONFIRMED recalls go out right away when
+    ALERT_URGENT_BYPASS is on. Digests are queued to the notification
+    outbox, which delivers them.
+    """
+
+    def __init__(self, window: float = settings.ALERT_DIGEST_WINDOW, urgent_bypass: bool = settings.ALERT_URGENT_BYPASS):
+        self.window = timedelta(seconds=window)
+        self.urgent_bypass = urgent_bypass
+
+    def match(self, session: Session, recalls: Iterable[Recall]) -> Set[int]:
+        """Records the batch's watchlist hits; returns the ids of the users hit."""
+        rows: Dict[tuple, Dict] = {}
+        for recall in recalls:
+            urgent = recall.confidence_level == ConfidenceLevel.CONFIRMED
+            for watchlist_id, user_id, value in watchlist_index.match(session, recall):
+                # Several watchlists of one user matching one recall make one line
+                rows.setdefault((user_id, recall.id), {
+                    "user_id": user_id,
+                    "recall_id": recall.id,
+                    "watchlist_id": watchlist_id,
+                    "match_value": value,
+                    "urgent": urgent,
+                    "created_at": datetime.utcnow(),
+                })
+                logger.info(f"!!! ALERT TRIGGERED !!! User {user_id} matched '{value}' in Recall '{recall.title}'")
+        insert_ignore(session, PendingAlert, list(rows.values()), ["user_id", "recall_id"])
+        session.commit()
+        return {user_id for user_id, _ in rows}
+
+    def backfill(self, session: Session, watchlist: Watchlist, recalls: Iterable[Recall]) -> int:
+        """Queues past recalls found for a new watchlist; they go out with the user's next digest."""
+        now = datetime.utcnow()
+        ids = insert_ignore(session, PendingAlert, [{
+            "user_id": watchlist.user_id,
+            "recall_id": recall.id,
+            "watchlist_id": watchlist.id,
+            "match_value": watchlist.value,
+            "urgent": False,
+            "created_at": now,
+        } for recall in recalls], ["user_id", "recall_id"], return_ids=True)
+        session.commit()
+        if ids:
+            logger.info(f"Backfilled {len(ids)} past recalls for watchlist {watchlist.id} ('{watchlist.value}')")
+        return len(ids)
+
+    async def flush(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        """Queues every digest that is due (for `user_ids`, or everyone); returns digests queued."""
+        # Blocking database work: keep it off the event loop
+        return await asyncio.to_thread(self.flush_sync, user_ids)
+
+    def flush_sync(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        from app.services.notifier import notifier
+
+        now = datetime.utcnow()
+        sent = 0
+        with Session(engine) as session:
+            statement = select(PendingAlert).where(PendingAlert.sent_at == None)  # noqa: E711
+            if user_ids is not None:
+                user_ids = list(user_ids)
+                if not user_ids:
+                    return 0
+                statement = statement.where(PendingAlert.user_id.in_(user_ids))
+            by_user: Dict[int, List[PendingAlert]] = {}
+            for alert in session.exec(statement.order_by(PendingAlert.id)):
+                by_user.setdefault(alert.user_id, []).append(alert)
+
+            if by_user:
+                # A user's window starts at their last digest (urgent sends do not count)
+                last_digest = dict(session.exec(
+                    select(PendingAlert.user_id, func.max(PendingAlert.sent_at))
+                    .where(PendingAlert.user_id.in_(list(by_user)), PendingAlert.urgent == False)  # noqa: E712
+                    .group_by(PendingAlert.user_id)
+                ).all())
+                users = {u.id: u for u in session.exec(select(User).where(User.id.in_(list(by_user))))}
+                titles = dict(session.exec(
+                    select(Recall.id, Recall.title)
+                    .where(Recall.id.in_({a.recall_id for alerts in by_user.values() for a in alerts}))
+                ).all())
+
+                for user_id, alerts in by_user.items():
+                    last = last_digest.get(user_id)
+                    if last is not None and now - last < self.window:
+                        if not self.urgent_bypass:
+                            continue
+                        alerts = [a for a in alerts if a.urgent]
+                    # Recalls deleted since they matched are dropped silently
+                    items = [(titles[a.recall_id], a.match_value) for a in alerts if a.recall_id in titles]
+                    user = users.get(user_id)
+                    if not alerts:
+                        continue
+                    if user and items:
+                        notifier.queue_digest(session, user, items)
+                        sent += 1
+                    for a in alerts:
+                        a.sent_at = now
+                        session.add(a)
+                # Jobs are queued in the transaction that marks the alerts sent:
+                # each digest reaches the outbox exactly once
+                session.commit()
+
+            if user_ids is None:
+                session.exec(delete(PendingAlert).where(PendingAlert.sent_at < now - timedelta(days=SENT_KEEP_DAYS)))
+                session.commit()
+        if sent:
+            logger.info(f"📬 Queued {sent} alert digests")
+        return sent
+
+# Singleton Instance
+alert_digester = AlertDigester()
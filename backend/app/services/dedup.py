@@ -0,0 +1,176 @@
+import logging
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Iterator, List, Optional
+from sqlalchemy import func
+from sqlmodel import Session, select
+from app.models.recall import Recall
+from app.services.watchlist_index import current_version
+
+logger = logging.getLogger(__name__)
+
+# Titles scoring above this SequenceMatcher ratio are the same story
+DUPLICATE_RATIO = 0.65
+
+# Share of a title's distinct trigrams another title needs to be checked
+# against it. Same-story titles (reworded, extended, words dropped or
+# swapped) share well over a third.
+MIN_SHARED_TRIGRAMS = 0.2
+
+# Titles shorter than this skip the trigram filter
+SHORT_TITLE = 8
+
+# IndexVersion row bumped by edits that change titles or regions in place
+TITLE_VERSION = "titles"
+
+# Provisional keys for recalls that are built but not inserted yet; they sort
+# after every real id, just as a freshly inserted row would.
+PENDING_ID_BASE = 1 << 62
+
+def _above(matches: int, total: int) -> bool:
+    """ratio() > DUPLICATE_RATIO for `matches` matched characters, computed the way difflib does."""
+    return (2.0 * matches / total if total else 1.0) > DUPLICATE_RATIO
+
+def trigrams(title: str) -> FrozenSet[str]:
+    return frozenset(title[i:i + 3] for i in range(len(title) - 2))
+
+def char_masks(text: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    for i, ch in enumerate(text):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+def lcs_length(text: str, masks: Dict[str, int], length: int) -> int:
+    """Longest common subsequence of `text` and the string behind `masks` (bit-parallel, one pass over `text`)."""
+    full = (1 << length) - 1
+    v = full
+    for ch in text:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return length - bin(v).count("1")
+
+class TitleIndex:
+    """
+    The (lowercased) titles of one region, with a posting list of ids (in
+    ascending order) per character trigram.
+
+    A query counts, over the posting lists of its trigrams, how many each
+    title shares. Only titles sharing at least MIN_SHARED_TRIGRAMS of them
+    go on to the length, LCS and exact ratio checks, in id order, so the
+    first match is the one a full scan would pick among them. The length and
+    LCS bounds never reject a duplicate: ratio() is 2*M / (len(a) + len(b)),
+    where the matching blocks M form a common subsequence. The trigram share
+    is a heuristic: edits that leave no three characters in a row intact
+    ("abc" vs "a#b#c") can still score above the ratio and are not found.
+    Titles shorter than SHORT_TITLE have too few trigrams to filter on and
+    are compared with every title.
+    """
+
+    def __init__(self):
+        self.titles: Dict[int, str] = {}
+        self.grams: Dict[int, FrozenSet[str]] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.ids: List[int] = []
+        self.max_id = 0
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, recall_id: int, title: str):
+        title = title.lower()
+        self.titles[recall_id] = title
+        self.grams[recall_id] = trigrams(title)
+        for ids in [self.ids] + [self.postings.setdefault(gram, []) for gram in self.grams[recall_id]]:
+            if not ids or ids[-1] < recall_id:
+                ids.append(recall_id)
+            else:
+                # Only a provisional entry renamed to its real id lands before the end
+                insort(ids, recall_id)
+        if recall_id < PENDING_ID_BASE:
+            self.max_id = max(self.max_id, recall_id)
+
+    def rename(self, old_id: int, new_id: int):
+        """Re-keys a provisional entry once its row has a real id."""
+        title = self.titles[old_id]
+        self.remove(old_id)
+        self.add(new_id, title)
+
+    def remove(self, recall_id: int):
+        title = self.titles.pop(recall_id, None)
+        if title is None:
+            return
+        del self.ids[bisect_left(self.ids, recall_id)]
+        for gram in self.grams.pop(recall_id):
+            ids = self.postings[gram]
+            del ids[bisect_left(ids, recall_id)]
+            if not ids:
+                del self.postings[gram]
+
+    def candidates(self, title_lower: str) -> Iterator[int]:
+        """Ids, in id order, sharing enough trigrams and leaving room for a ratio above DUPLICATE_RATIO."""
+        size = len(title_lower)
+        if size < SHORT_TITLE:
+            ids = self.ids
+        else:
+            grams = trigrams(title_lower)
+            need = max(1, math.ceil(MIN_SHARED_TRIGRAMS * len(grams)))
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+            # Only the few ids sharing enough trigrams get sorted
+            ids = sorted(rid for rid, count in shared.items() if count >= need)
+        masks = char_masks(title_lower)
+        for rid in ids:
+            title = self.titles[rid]
+            total = size + len(title)
+            if _above(min(size, len(title)), total) and _above(lcs_length(title, masks, size), total):
+                yield rid
+
+    def find_duplicate(self, title: str) -> Optional[int]:
+        """Id of the first indexed title whose ratio exceeds DUPLICATE_RATIO."""
+        title_lower = title.lower()
+        matcher = SequenceMatcher(None, title_lower, "")
+        for rid in self.candidates(title_lower):
+            matcher.set_seq2(self.titles[rid])
+            if matcher.ratio() > DUPLICATE_RATIO:
+                return rid
+        return None
+
+class TitleIndexRegistry:
+    """
+    Per-region TitleIndex, kept in memory and rebuilt when the table changed
+    underneath it: rows added or deleted (count / max id), or titles and
+    regions edited in place by any process (the TITLE_VERSION stamp).
+    """
+
+    def __init__(self, table=None):
+        # The recall table to index (a rebuild indexes its shadow copy)
+        self.table = table if table is not None else Recall.__table__
+        self._indexes: Dict[str, TitleIndex] = {}
+        self._version: Optional[int] = None
+
+    def get(self, session: Session, region) -> TitleIndex:
+        version = current_version(session, TITLE_VERSION)
+        if version != self._version:
+            self._indexes.clear()
+            self._version = version
+        index = self._indexes.get(region)
+        t = self.table.c
+        count, max_id = session.execute(
+            select(func.count(t.id), func.max(t.id)).where(t.region == region)
+        ).one()
+        if index is None or len(index) != count or index.max_id != (max_id or 0):
+            index = TitleIndex()
+            for rid, title in session.execute(select(t.id, t.title).where(t.region == region)):
+                index.add(rid, title)
+            self._indexes[region] = index
+            logger.info(f"Built dedup title index for {region}: {count} recalls")
+        return index
+
+    def invalidate(self):
+        self._indexes.clear()
+
+# Singleton Instance
+title_indexes = TitleIndexRegistry()
@@ -0,0 +1,147 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import case, or_, update
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.database import engine, insert_ignore
+from app.models.ingestion import JobLease
+
+logger = logging.getLogger(__name__)
+
+class LeaseLost(RuntimeError):
+    """Work guarded by a lease found the lease no longer held"""
+
+class LeaseManager:
+    """
+    Cluster-wide job leases on the shared database (Postgres or SQLite).
+
+    A lease row names its holder and an expiry. Acquiring is a single
+    conditional UPDATE (free, expired, or already ours), so of several
+    replicas racing for a job exactly one wins. The holder renews well
+    before expiry; when it dies, the lease lapses and another replica takes
+    it over on its next attempt.
+    """
+
+    def __init__(self, holder: Optional[str] = None, ttl: float = settings.JOB_LEASE_TTL):
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.ttl = ttl
+
+    def acquire(self, name: str) -> bool:
+        """Takes or renews the lease; True while this process holds it."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        with Session(engine) as session:
+            result = session.execute(
+                update(JobLease)
+                .where(JobLease.name == name)
+                .where(or_(JobLease.holder == self.holder, JobLease.expires_at == None, JobLease.expires_at < now))  # noqa: E711
+                .values(
+                    holder=self.holder,
+                    expires_at=expires_at,
+                    acquired_at=case((JobLease.holder == self.holder, JobLease.acquired_at), else_=now),
+                )
+            )
+            acquired = result.rowcount == 1
+            if not acquired:
+                # First claim ever on this job: the insert decides the race
+                acquired = bool(insert_ignore(
+                    session, JobLease,
+                    [{"name": name, "holder": self.holder, "acquired_at": now, "expires_at": expires_at}],
+                    ["name"], return_ids=True,
+                ))
+            session.commit()
+        return acquired
+
+    # Renewing is acquiring a lease we already hold
+    renew = acquire
+
+    def release(self, name: str):
+        """Lets the lease expire now so another replica can take over at once."""
+        with Session(engine) as session:
+            session.execute(
+                update(JobLease)
+                .where(JobLease.name == name, JobLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            session.commit()
+
+    def holder_of(self, name: str) -> Optional[str]:
+        with Session(engine) as session:
+            lease = session.get(JobLease, name)
+            if lease is None or lease.expires_at is None or lease.expires_at < datetime.utcnow():
+                return None
+            return lease.holder
+
+class LeaseKeeper:
+    """
+    Keeps trying to hold one lease from a background thread, renewing it
+    every quarter TTL whatever the event loop is busy with.
+
+    held() is True while the last successful renewal, timed from before its
+    UPDATE was sent, is less than three quarters of a TTL old. Past that the
+    row may expire at any moment, so guarded work calls check() before each
+    fetch and each processing commit and stops (LeaseLost) instead of
+    overlapping with the next leader.
+    """
+
+    def __init__(self, name: str, manager: Optional[LeaseManager] = None):
+        self.name = name
+        self.manager = manager or LeaseManager()
+        self.interval = self.manager.ttl / 4
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+        self._attempted = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def holder(self) -> str:
+        return self.manager.holder
+
+    def held(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    def check(self):
+        if not self.held():
+            raise LeaseLost(f"Lease '{self.name}' is no longer held by {self.holder}")
+
+    def start(self) -> "LeaseKeeper":
+        self._thread = threading.Thread(target=self._run, name=f"lease-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_first_attempt(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the first acquire attempt is done; returns held()."""
+        self._attempted.wait(timeout)
+        return self.held()
+
+    def stop(self, release: bool = True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if release and self.held():
+            self._valid_until = 0.0
+            self.manager.release(self.name)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                acquired = self.manager.acquire(self.name)
+            except Exception as e:
+                # Unknown outcome: the current renewal stays valid until it lapses
+                logger.error(f"Could not renew lease '{self.name}': {e}")
+                acquired = None
+            if acquired:
+                self._valid_until = started + self.manager.ttl * 3 / 4
+            elif acquired is False and self.held():
+                # Someone else holds it now: stop trusting our old renewal
+                logger.warning(f"Lease '{self.name}' was taken over from {self.holder}")
+                self._valid_until = 0.0
+            self._attempted.set()
+            self._stop.wait(self.interval)
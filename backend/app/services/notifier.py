@@ -1,10 +1,14 @@
 import os
+import asyncio
 import logging
 import json
 from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
 from app.models.user import User
 from sqlmodel import Session, select
+from app.core.constants import NotificationChannel
 from app.core.database import engine
+from app.models.alert import NotificationJob
 from app.models.subscription import PushSubscription
 
 logger = logging.getLogger(__name__)
@@ -29,52 +33,110 @@ class LogEmailProvider(BaseNotificationProvider):
         logger.info(f"Body: {content}")
         return True
 
+class PermanentDeliveryError(Exception):
+    """A send that cannot succeed on retry (the job goes straight to dead-letter)"""
+
+# Seconds a single push request / email hand-off may take
+PUSH_TIMEOUT = 10
+EMAIL_TIMEOUT = 30
+
 class NotificationService:
+    """
+    Builds alert messages and queues them as NotificationJob rows (one email,
+    plus one push per subscription) in the caller's transaction; the outbox
+    worker delivers them through deliver().
+    """
+
     def __init__(self, provider: BaseNotificationProvider = None):
         self.provider = provider or LogEmailProvider()
 
-    async def notify_user_alert(self, user: User, recall_title: str, match_keyword: str):
+    def queue_alert(self, session: Session, user: User, recall_title: str, match_keyword: str):
         # 1. Email
         subject = f"🔴 RedAlert: New recall for '{match_keyword}'"
         content = f"Recall matched: {recall_title}"
-        await self.provider.send_email(user.email, subject, content)
-        
+        self._queue_email(session, user, subject, content)
+
+        # 2. WebPush
+        self._queue_webpush(session, user.id, recall_title)
+
+    def queue_digest(self, session: Session, user: User, items: List[Tuple[str, str]]):
+        """One email + one push for several (recall title, matched keyword) hits."""
+        if len(items) == 1:
+            return self.queue_alert(session, user, *items[0])
+
+        # 1. Email
+        subject = f"🔴 RedAlert: {len(items)} new recalls match your watchlist"
+        content = "\n".join(f"- {title} (matched '{keyword}')" for title, keyword in items)
+        self._queue_email(session, user, subject, content)
+
         # 2. WebPush
-        self.send_webpush(user.id, recall_title)
+        self._queue_webpush(session, user.id, f"{len(items)} new recalls: " + "; ".join(title for title, _ in items[:3]))
+
+    def _queue(self, session: Session, channel: NotificationChannel, user_id: int, payload: Dict):
+        session.add(NotificationJob(channel=channel.value, user_id=user_id, payload=json.dumps(payload)))
 
-    def send_webpush(self, user_id: int, message: str):
+    def _queue_email(self, session: Session, user: User, subject: str, content: str):
+        self._queue(session, NotificationChannel.EMAIL, user.id, {"to": user.email, "subject": subject, "content": content})
+
+    def _queue_webpush(self, session: Session, user_id: int, message: str):
         if not VAPID_PRIVATE_KEY or not VAPID_PUBLIC_KEY:
             logger.warning("VAPID keys not configured — skipping push notification")
             return
-            
+        for subscription_id in session.exec(select(PushSubscription.id).where(PushSubscription.user_id == user_id)):
+            self._queue(session, NotificationChannel.WEBPUSH, user_id, {"subscription_id": subscription_id, "message": message})
+
+    async def deliver(self, job: NotificationJob):
+        """Sends one queued job; raises on failure (PermanentDeliveryError if retrying is pointless)."""
+        payload = json.loads(job.payload)
+        if job.channel == NotificationChannel.EMAIL:
+            # A hung mail server fails the attempt (and is retried) instead of holding a send slot
+            try:
+                sent = await asyncio.wait_for(
+                    self.provider.send_email(payload["to"], payload["subject"], payload["content"]), EMAIL_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                raise RuntimeError(f"Email provider timed out after {EMAIL_TIMEOUT}s")
+            if sent is False:
+                raise RuntimeError("Email provider did not accept the message")
+        elif job.channel == NotificationChannel.WEBPUSH:
+            # pywebpush is blocking: keep it off the event loop
+            await asyncio.to_thread(self.send_webpush, payload["subscription_id"], payload["message"])
+        else:
+            raise PermanentDeliveryError(f"Unknown notification channel '{job.channel}'")
+
+    def send_webpush(self, subscription_id: int, message: str):
+        """Blocking: one push to one subscription."""
         try:
             from pywebpush import webpush, WebPushException
-            
-            with Session(engine) as session:
-                subs = session.exec(select(PushSubscription).where(PushSubscription.user_id == user_id)).all()
-                for sub in subs:
-                    try:
-                        webpush(
-                            subscription_info={
-                                "endpoint": sub.endpoint,
-                                "keys": {
-                                    "p256dh": sub.p256dh,
-                                    "auth": sub.auth
-                                }
-                            },
-                            data=json.dumps({"title": "RedAlert", "body": message}),
-                            vapid_private_key=VAPID_PRIVATE_KEY,
-                            vapid_claims=VAPID_CLAIMS
-                        )
-                        logger.info(f"Push sent to {sub.id}")
-                    except WebPushException as ex:
-                        logger.error(f"WebPush failed: {ex}")
-                    except Exception as e:
-                        logger.warning(f"Push error: {e}")
         except ImportError:
-            logger.warning("pywebpush not installed — skipping push notifications")
-        except Exception as outer_e:
-            logger.error(f"Push db error: {outer_e}")
+            raise PermanentDeliveryError("pywebpush not installed")
+
+        with Session(engine) as session:
+            sub = session.get(PushSubscription, subscription_id)
+        if sub is None:
+            raise PermanentDeliveryError(f"Push subscription {subscription_id} no longer exists")
+
+        try:
+            webpush(
+                subscription_info={
+                    "endpoint": sub.endpoint,
+                    "keys": {
+                        "p256dh": sub.p256dh,
+                        "auth": sub.auth
+                    }
+                },
+                data=json.dumps({"title": "RedAlert", "body": message}),
+                vapid_private_key=VAPID_PRIVATE_KEY,
+                vapid_claims=VAPID_CLAIMS,
+                timeout=PUSH_TIMEOUT,
+            )
+        except WebPushException as ex:
+            status = getattr(ex.response, "status_code", None)
+            if status in (404, 410):
+                # The browser dropped the subscription
+                raise PermanentDeliveryError(f"Push subscription {sub.id} expired ({status})") from ex
+            raise
+        logger.info(f"Push sent to {sub.id}")
 
 # Singleton Instance
 notifier = NotificationService()
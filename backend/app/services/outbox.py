@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_, delete, or_, update
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.constants import NotificationChannel, NotificationStatus
+from app.core.database import engine
+from app.models.alert import NotificationJob
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claimed job stays ours; after that another worker may retry it
+CLAIM_TTL = 300
+
+# Delivered jobs are kept this long (dead ones stay until requeued or deleted)
+SENT_KEEP_DAYS = 7
+
+# Seconds between purges of delivered jobs
+PURGE_INTERVAL = 3600
+
+PENDING = NotificationStatus.PENDING.value
+SENDING = NotificationStatus.SENDING.value
+SENT = NotificationStatus.SENT.value
+DEAD = NotificationStatus.DEAD.value
+
+class ChannelLimiter:
+    """At most `concurrency` sends of one channel in flight, started at most `rate` per second."""
+
+    def __init__(self, concurrency: int, rate: float):
+        self.concurrency = max(1, concurrency)
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._next_start = 0.0
+
+    def batch_size(self) -> int:
+        """Jobs worth claiming at once: enough to keep the pool busy, few enough to start within the claim."""
+        size = self.concurrency * 4
+        if self.interval:
+            size = min(size, int(CLAIM_TTL / 2 / self.interval))
+        return max(1, size)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self.interval:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+
+class NotificationOutbox:
+    """
+    Delivers NotificationJob rows. Jobs are claimed with a conditional UPDATE
+    (so any number of workers can drain the same table) and sent by a
+    bounded pool per channel. A failed send is retried with exponential
+    backoff (NOTIFY_RETRY_BASE doubling up to NOTIFY_RETRY_MAX, +/-10%
+    jitter); after NOTIFY_MAX_ATTEMPTS, or on a permanent error, the job is
+    dead-lettered. A worker that dies mid-send leaves its claim to expire,
+    and the job is retried (delivery is at-least-once).
+    """
+
+    def __init__(
+        self,
+        holder: Optional[str] = None,
+        max_attempts: int = settings.NOTIFY_MAX_ATTEMPTS,
+        retry_base: float = settings.NOTIFY_RETRY_BASE,
+        retry_max: float = settings.NOTIFY_RETRY_MAX,
+    ):
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+    def limiters(self) -> Dict[NotificationChannel, ChannelLimiter]:
+        # Created per run: asyncio primitives belong to the loop that uses them
+        return {
+            NotificationChannel.EMAIL: ChannelLimiter(settings.NOTIFY_EMAIL_CONCURRENCY, settings.NOTIFY_EMAIL_RATE),
+            NotificationChannel.WEBPUSH: ChannelLimiter(settings.NOTIFY_WEBPUSH_CONCURRENCY, settings.NOTIFY_WEBPUSH_RATE),
+        }
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        return delay * random.uniform(0.9, 1.1)
+
+    def claim(self, channel: NotificationChannel, limit: int) -> List[NotificationJob]:
+        """Takes up to `limit` due jobs of one channel (pending, or abandoned by a dead worker)."""
+        now = datetime.utcnow()
+        due = or_(
+            and_(NotificationJob.status == PENDING, NotificationJob.next_attempt_at <= now),
+            and_(NotificationJob.status == SENDING, NotificationJob.locked_until < now),
+        )
+        with Session(engine) as session:
+            ids = session.exec(
+                select(NotificationJob.id)
+                .where(NotificationJob.channel == channel.value, due)
+                .order_by(NotificationJob.next_attempt_at, NotificationJob.id)
+                .limit(limit)
+            ).all()
+            if not ids:
+                return []
+            # Re-checked in the UPDATE: of several workers, one wins each job
+            session.execute(
+                update(NotificationJob)
+                .where(NotificationJob.id.in_(ids), due)
+                .values(
+                    status=SENDING,
+                    locked_by=self.holder,
+                    locked_until=now + timedelta(seconds=CLAIM_TTL),
+                    attempts=NotificationJob.attempts + 1,
+                )
+            )
+            session.commit()
+            return session.exec(
+                select(NotificationJob)
+                .where(NotificationJob.id.in_(ids), NotificationJob.status == SENDING, NotificationJob.locked_by == self.holder)
+                .order_by(NotificationJob.id)
+            ).all()
+
+    def finish(self, job: NotificationJob, error: Optional[BaseException] = None, permanent: bool = False) -> str:
+        now = datetime.utcnow()
+        if error is None:
+            values = {"status": SENT, "sent_at": now, "last_error": None}
+        elif permanent or job.attempts >= self.max_attempts:
+            values = {"status": DEAD, "last_error": str(error)[:500]}
+        else:
+            values = {
+                "status": PENDING,
+                "next_attempt_at": now + timedelta(seconds=self.backoff(job.attempts)),
+                "last_error": str(error)[:500],
+            }
+        with Session(engine) as session:
+            # Only if the claim is still ours (it may have expired and moved on)
+            session.execute(
+                update(NotificationJob)
+                .where(NotificationJob.id == job.id, NotificationJob.locked_by == self.holder, NotificationJob.status == SENDING)
+                .values(locked_by=None, locked_until=None, **values)
+            )
+            session.commit()
+        return values["status"]
+
+    async def _send(self, job: NotificationJob, limiter: ChannelLimiter) -> str:
+        from app.services.notifier import PermanentDeliveryError, notifier
+
+        async with limiter:
+            try:
+                await notifier.deliver(job)
+            except PermanentDeliveryError as e:
+                logger.error(f"Notification {job.id} ({job.channel}) undeliverable: {e}")
+                return await asyncio.to_thread(self.finish, job, e, True)
+            except Exception as e:
+                status = await asyncio.to_thread(self.finish, job, e)
+                if status == DEAD:
+                    logger.error(f"Notification {job.id} ({job.channel}) failed {job.attempts} times, dead-lettered: {e}")
+                else:
+                    logger.warning(f"Notification {job.id} ({job.channel}) attempt {job.attempts} failed, will retry: {e}")
+                return status
+        return await asyncio.to_thread(self.finish, job)
+
+    async def _drain_channel(self, channel: NotificationChannel, limiter: ChannelLimiter, stop: Optional[asyncio.Event]) -> Counter:
+        stats: Counter = Counter()
+        while stop is None or not stop.is_set():
+            jobs = await asyncio.to_thread(self.claim, channel, limiter.batch_size())
+            if not jobs:
+                return stats
+            stats.update(await asyncio.gather(*(self._send(job, limiter) for job in jobs)))
+        return stats
+
+    async def drain(
+        self,
+        limiters: Optional[Dict[NotificationChannel, ChannelLimiter]] = None,
+        stop: Optional[asyncio.Event] = None,
+    ) -> Counter:
+        """
+        Sends everything due now, all channels side by side; returns a count
+        per resulting status. With `stop`, returns after the batches in
+        flight once it is set.
+        """
+        limiters = limiters or self.limiters()
+        stats: Counter = Counter()
+        for counts in await asyncio.gather(*(self._drain_channel(c, l, stop) for c, l in limiters.items())):
+            stats.update(counts)
+        if stats:
+            logger.info(f"📨 Notification outbox: {dict(stats)}")
+        return stats
+
+    async def run(self, stop: asyncio.Event, poll_interval: float = settings.NOTIFY_POLL_INTERVAL):
+        """Drains the outbox until `stop` is set."""
+        limiters = self.limiters()
+        loop = asyncio.get_running_loop()
+        purge_due = loop.time()
+        while not stop.is_set():
+            try:
+                await self.drain(limiters, stop)
+                if loop.time() >= purge_due:
+                    purge_due = loop.time() + PURGE_INTERVAL
+                    await asyncio.to_thread(self.purge)
+            except Exception as e:
+                logger.error(f"Notification outbox error: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def purge(self) -> int:
+        with Session(engine) as session:
+            result = session.execute(
+                delete(NotificationJob)
+                .where(NotificationJob.status == SENT)
+                .where(NotificationJob.sent_at < datetime.utcnow() - timedelta(days=SENT_KEEP_DAYS))
+            )
+            session.commit()
+        return result.rowcount
+
+    def requeue_dead(self, ids: Optional[List[int]] = None) -> int:
+        """Gives dead-lettered jobs a fresh set of attempts."""
+        with Session(engine) as session:
+            statement = update(NotificationJob).where(NotificationJob.status == DEAD)
+            if ids:
+                statement = statement.where(NotificationJob.id.in_(ids))
+            result = session.execute(statement.values(status=PENDING, attempts=0, next_attempt_at=datetime.utcnow()))
+            session.commit()
+        logger.info(f"♻️ Requeued {result.rowcount} dead notifications")
+        return result.rowcount
+
+# Singleton Instance
+notification_outbox = NotificationOutbox()
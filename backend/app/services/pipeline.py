@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.database import engine, insert_ignore
+from app.ingestors.base import BaseIngestor
+from app.ingestors.identity import NATIVE_ID_FIELDS, identity_key
+from app.core.payload import encode_payload
+from app.models.recall import RawRecall, RawRecallArchive, Recall
+from app.services.lease import LeaseLost
+from app.services.processor import RecallProcessor
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker, one per downstream worker
+_STOP = object()
+
+class _SourceRun:
+    """Tracks one source's in-flight batches so its HTTP validators and sync
+    cursor are saved only after every batch of the fetch has been persisted."""
+
+    def __init__(self, source_name: str, ingestor: BaseIngestor):
+        self.source_name = source_name
+        self.ingestor = ingestor
+        self.outstanding = 0
+        self.fetched = False
+        self.failed = False
+
+    async def batch_done(self, ok: bool = True):
+        self.outstanding -= 1
+        self.failed = self.failed or not ok
+        await self.finish()
+
+    async def finish(self):
+        if self.fetched and self.outstanding == 0 and not self.failed:
+            await asyncio.to_thread(self.ingestor.save_state)
+
+class IngestionPipeline:
+    """
+    Staged ingestion: fetch -> persist -> process -> match/notify.
+    Stages are connected by bounded queues, so a fast feed's items flow all
+    the way to notification while slower feeds are still downloading, and a
+    slow stage applies backpressure to the ones before it.
+    """
+
+    def __init__(
+        self,
+        fetch_workers: int = settings.PIPELINE_FETCH_WORKERS,
+        persist_workers: int = settings.PIPELINE_PERSIST_WORKERS,
+        process_workers: int = settings.PIPELINE_PROCESS_WORKERS,
+        notify_workers: int = settings.PIPELINE_NOTIFY_WORKERS,
+        queue_size: int = settings.PIPELINE_QUEUE_SIZE,
+        batch_size: int = settings.PIPELINE_BATCH_SIZE,
+        lease=None,
+    ):
+        self.fetch_workers = fetch_workers
+        self.persist_workers = persist_workers
+        self.process_workers = process_workers
+        self.notify_workers = notify_workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        # LeaseKeeper to check before each fetch and processing write (None: unguarded)
+        self.lease = lease
+        self.stats = {"fetched": 0, "saved": 0, "created": 0, "matched": 0, "errors": 0}
+
+    async def run(self, ingestors: List[Tuple[str, BaseIngestor]]) -> Dict[str, int]:
+        fetch_q: asyncio.Queue = asyncio.Queue()
+        persist_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        process_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        notify_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        processor = RecallProcessor(match_queue=notify_q, lease=self.lease)
+
+        # Every source is fetched concurrently unless capped; the shared HTTP
+        # client's per-host limit bounds what actually hits each server.
+        fetch_workers = self.fetch_workers or max(1, len(ingestors))
+        for source in ingestors:
+            fetch_q.put_nowait(source)
+        for _ in range(fetch_workers):
+            fetch_q.put_nowait(_STOP)
+
+        stages = [
+            ([self._fetch_worker(fetch_q, persist_q) for _ in range(fetch_workers)], persist_q, self.persist_workers),
+            ([self._persist_worker(persist_q, process_q) for _ in range(self.persist_workers)], process_q, self.process_workers),
+            ([self._process_worker(process_q, processor) for _ in range(self.process_workers)], notify_q, self.notify_workers),
+            ([self._notify_worker(notify_q, processor) for _ in range(self.notify_workers)], None, 0),
+        ]
+        tasks = [[asyncio.create_task(w) for w in workers] for workers, _, _ in stages]
+
+        # Drain stage by stage: once every worker of a stage has finished,
+        # tell each worker of the next stage to stop.
+        try:
+            for stage_tasks, (_, next_q, next_workers) in zip(tasks, stages):
+                await asyncio.gather(*stage_tasks)
+                for _ in range(next_workers):
+                    await next_q.put(_STOP)
+        except BaseException:
+            for stage_tasks in tasks:
+                for t in stage_tasks:
+                    t.cancel()
+            raise
+
+        # Anything left unprocessed (e.g. rows from an interrupted cycle),
+        # matched inline now that the notify stage has shut down
+        try:
+            self.stats["created"] += await RecallProcessor(lease=self.lease).process_pending()
+        except LeaseLost as e:
+            logger.warning(f"Left pending rows to the new leader: {e}")
+        return self.stats
+
+    async def _fetch_worker(self, fetch_q: asyncio.Queue, persist_q: asyncio.Queue):
+        while True:
+            source = await fetch_q.get()
+            if source is _STOP:
+                return
+            source_name, ingestor = source
+            run = _SourceRun(source_name, ingestor)
+            try:
+                if self.lease is not None:
+                    self.lease.check()
+                count = await self._fetch_source(run, persist_q)
+                if ingestor.not_modified:
+                    logger.info(f"💤 {source_name}: not modified, skipping")
+                logger.info(f"📥 {source_name}: fetched {count} items")
+                run.fetched = True
+                await run.finish()
+            except LeaseLost as e:
+                logger.warning(f"Skipped {source_name}: {e}")
+            except asyncio.TimeoutError:
+                self.stats["errors"] += 1
+                logger.error(f"Timed out fetching {source_name} after {settings.SOURCE_TIMEOUT}s")
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error ingesting {source_name}: {e}")
+
+    async def _fetch_source(self, run: _SourceRun, persist_q: asyncio.Queue) -> int:
+        # Batches are handed on as they are parsed, before the download ends.
+        # SOURCE_TIMEOUT bounds the time spent fetching: waiting for room in
+        # persist_q (backpressure from slower stages) does not count.
+        loop = asyncio.get_running_loop()
+        budget = settings.SOURCE_TIMEOUT
+        batches = run.ingestor.fetch_batches(self.batch_size)
+        count = 0
+        try:
+            while True:
+                started = loop.time()
+                try:
+                    items = await asyncio.wait_for(batches.__anext__(), timeout=max(budget, 0))
+                except StopAsyncIteration:
+                    return count
+                budget -= loop.time() - started
+                count += len(items)
+                self.stats["fetched"] += len(items)
+                run.outstanding += 1
+                await persist_q.put((run, items))
+        finally:
+            await batches.aclose()
+
+    async def _persist_worker(self, persist_q: asyncio.Queue, process_q: asyncio.Queue):
+        while True:
+            batch = await persist_q.get()
+            if batch is _STOP:
+                return
+            run, items = batch
+            try:
+                # Synchronous DB work runs off the event loop so fetches keep going
+                new_ids = await asyncio.to_thread(self._persist, run.source_name, run.ingestor.source_type, items)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error saving {run.source_name}: {e}")
+                await run.batch_done(ok=False)
+                continue
+            self.stats["saved"] += len(new_ids)
+            try:
+                # Only remember the feed as seen once its items are safely stored
+                await run.batch_done()
+            except Exception as e:
+                # The items are stored; the next fetch just covers them again
+                self.stats["errors"] += 1
+                logger.error(f"Error saving sync state of {run.source_name}: {e}")
+            if new_ids:
+                await process_q.put(new_ids)
+
+    def _persist(self, source_name: str, source_type, items: List[Dict[str, Any]]) -> List[int]:
+        rows = {}
+        now = datetime.utcnow()
+        for item in items:
+            # Inject Source Origin for Processor
+            item["_source_origin"] = source_name
+            key = identity_key(source_name, item)
+            native_id = next((str(item[f]) for f in NATIVE_ID_FIELDS if item.get(f)), None)
+            # Later copies within the same batch lose, as they would against the table
+            rows.setdefault(key, {
+                "identity_key": key,
+                "source_id": native_id or key,
+                "source_type": source_type,
+                "ingested_at": now,
+                **encode_payload(json.dumps(item)),
+            })
+
+        # Deduplication happens in the INSERT itself: one round trip per batch
+        with Session(engine) as session:
+            # Identities moved to the archive by retention are still known
+            archived = set(session.exec(
+                select(RawRecallArchive.identity_key).where(RawRecallArchive.identity_key.in_(list(rows)))
+            ))
+            for key in archived:
+                del rows[key]
+            new_ids = insert_ignore(session, RawRecall, list(rows.values()), ["identity_key"], return_ids=True)
+            session.commit()
+        return sorted(new_ids)
+
+    async def _process_worker(self, process_q: asyncio.Queue, processor: RecallProcessor):
+        while True:
+            raw_ids = await process_q.get()
+            if raw_ids is _STOP:
+                return
+            try:
+                self.stats["created"] += await processor.process_raw_recalls(target_ids=raw_ids)
+            except LeaseLost as e:
+                logger.warning(f"Left {len(raw_ids)} rows pending: {e}")
+            except Exception as e:
+                logger.error(f"Error processing recalls: {e}")
+
+    async def _notify_worker(self, notify_q: asyncio.Queue, processor: RecallProcessor):
+        while True:
+            recall_ids = await notify_q.get()
+            if recall_ids is _STOP:
+                return
+            await self._match(processor, recall_ids)
+
+    async def _match(self, processor: RecallProcessor, recall_ids: List[int]):
+        """Matches one processing chunk's new recalls in a single pass."""
+        try:
+            with Session(engine) as session:
+                recalls = session.exec(select(Recall).where(Recall.id.in_(recall_ids)).order_by(Recall.id)).all()
+                if recalls:
+                    await processor.match_recalls(session, recalls)
+                    self.stats["matched"] += len(recalls)
+        except Exception as e:
+            logger.error(f"Error matching Recalls {recall_ids}: {e}")
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.database import engine
+from app.ingestors.base import BaseIngestor
+from app.ingestors.registry import build_sources
+from app.models.ingestion import SourceState
+from app.services.pipeline import IngestionPipeline
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest poll in the new-item / error moving averages
+EMA_ALPHA = 0.3
+
+# New items per poll (EMA) at or above which a source is active, and below
+# which it is quiet
+ACTIVE_RATE = 0.5
+QUIET_RATE = 0.1
+
+# Interval multipliers after a poll
+SHRINK_ON_NEW = 0.5 # Active: come back sooner
+GROW_ON_QUIET = 1.5 # Quiet: back off gently
+GROW_ON_ERROR = 2.0 # Failure: back off exponentially per consecutive error
+MAX_ERROR_STEPS = 6
+
+class AdaptivePoller:
+    """
+    Polls every source on its own schedule instead of one global cycle.
+    Each source's base interval shrinks while its new-item rate is high and
+    grows while it is low, within [POLL_MIN_INTERVAL, POLL_MAX_INTERVAL].
+    Failing sources back off exponentially from the base, which stays where
+    it was, and sources with a history of errors are polled a little less
+    often. Schedules are jittered so sources drift apart, and at most
+    POLL_MAX_CONCURRENT polls run at once.
+    """
+
+    def __init__(
+        self,
+        sources: Optional[List[Tuple[str, BaseIngestor]]] = None,
+        min_interval: float = settings.POLL_MIN_INTERVAL,
+        max_interval: float = settings.POLL_MAX_INTERVAL,
+        initial_interval: float = settings.POLL_INITIAL_INTERVAL,
+        jitter: float = settings.POLL_JITTER,
+        max_concurrent: int = settings.POLL_MAX_CONCURRENT,
+        lease=None,
+    ):
+        self.sources = sources if sources is not None else build_sources()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.jitter = jitter
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # LeaseKeeper guarding every fetch and processing write
+        self.lease = lease
+
+    def start(self):
+        """Starts one polling loop per source on the running event loop."""
+        for source_name, ingestor in self.sources:
+            self._tasks[source_name] = asyncio.create_task(self._loop(source_name, ingestor))
+        logger.info(f"🕒 Adaptive poller started for {len(self.sources)} sources")
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _loop(self, source_name: str, ingestor: BaseIngestor):
+        next_poll_at: Optional[datetime] = None
+        failures = 0
+        while True:
+            try:
+                if next_poll_at is None:
+                    state = await asyncio.to_thread(self._load_state, source_name)
+                    # A never-polled source (or one overdue after a restart) goes right away
+                    next_poll_at = state.next_poll_at or datetime.utcnow()
+                delay = (next_poll_at - datetime.utcnow()).total_seconds()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                async with self._semaphore:
+                    stats = await self.poll_once(source_name, ingestor)
+                next_poll_at = await asyncio.to_thread(self._record_poll, source_name, stats)
+                failures = 0
+            except Exception as e:
+                # Database trouble: keep the loop alive and try again later
+                failures += 1
+                retry = self._clamp(self.min_interval * GROW_ON_ERROR ** min(failures, MAX_ERROR_STEPS))
+                logger.error(f"Polling loop of {source_name} failed, retrying in {retry:.0f}s: {e}")
+                await asyncio.sleep(retry)
+
+    async def poll_once(self, source_name: str, ingestor: BaseIngestor) -> Dict[str, int]:
+        """One fetch -> persist -> process -> match run for a single source."""
+        try:
+            return await IngestionPipeline(lease=self.lease).run([(source_name, ingestor)])
+        except Exception as e:
+            logger.error(f"Error polling {source_name}: {e}")
+            return {"saved": 0, "errors": 1}
+
+    def next_interval(self, state: SourceState) -> Tuple[float, float]:
+        """
+        (base interval, interval until the next poll) for a state whose rates
+        and error count already include the latest poll.
+        """
+        base = state.poll_interval or self.initial_interval
+        if state.consecutive_errors:
+            # Failing: the base stays put and the backoff starts from it
+            return base, self._clamp(base * GROW_ON_ERROR ** min(state.consecutive_errors, MAX_ERROR_STEPS))
+        if (state.new_item_rate or 0) >= ACTIVE_RATE:
+            base *= SHRINK_ON_NEW
+        elif (state.new_item_rate or 0) < QUIET_RATE:
+            base *= GROW_ON_QUIET
+        base = self._clamp(base)
+        # Flaky sources, recovered for now, are polled less often
+        return base, self._clamp(base * (1 + (state.error_rate or 0)))
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _load_state(self, source_name: str) -> SourceState:
+        with Session(engine) as session:
+            state = session.get(SourceState, source_name)
+            if state is None:
+                state = SourceState(source_name=source_name)
+                session.add(state)
+                session.commit()
+                session.refresh(state)
+            session.expunge(state)
+            return state
+
+    def _record_poll(self, source_name: str, stats: Dict[str, int]) -> datetime:
+        """Updates the source's rates and interval; returns when to poll next."""
+        new_items = stats.get("saved", 0)
+        failed = stats.get("errors", 0) > 0
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            state = session.get(SourceState, source_name) or SourceState(source_name=source_name)
+            state.consecutive_errors = (state.consecutive_errors or 0) + 1 if failed else 0
+            state.new_item_rate = self._ema(state.new_item_rate, new_items)
+            state.error_rate = self._ema(state.error_rate, 1.0 if failed else 0.0)
+            state.poll_interval, interval = self.next_interval(state)
+
+            delay = interval * (1 + random.uniform(-self.jitter, self.jitter))
+            state.last_polled_at = now
+            state.next_poll_at = now + timedelta(seconds=delay)
+            session.add(state)
+            session.commit()
+
+            logger.info(
+                f"📡 {source_name}: {new_items} new{' (failed)' if failed else ''}, "
+                f"next poll in {delay / 60:.0f} min"
+            )
+            return state.next_poll_at
+
+    @staticmethod
+    def _ema(previous: Optional[float], value: float) -> float:
+        return value if previous is None else EMA_ALPHA * value + (1 - EMA_ALPHA) * previous
@@ -1,251 +1,576 @@
+import asyncio
 import logging
 import json
 import html
+import multiprocessing
 import re
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from sqlalchemy import insert
 from sqlmodel import Session, select
-from app.core.database import engine
+from app.core.config import settings
+from app.core.database import engine, bulk_insert_returning_ids
+from app.core.payload import decode_payload
 from app.models.recall import RawRecall, Recall, RecallSource
 from app.nlp.engine import NLPEngine
+from app.nlp.cache import analysis_cache
+from app.services.dedup import TitleIndexRegistry, title_indexes, PENDING_ID_BASE
+from app.rules.engine import RuleSet, rule_engine
 from app.scoring.confidence import ConfidenceScorer
-from app.core.constants import Region, ConfidenceLevel
+from app.core.constants import Region, ConfidenceLevel, ProcessOutcome
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 
 logger = logging.getLogger(__name__)
 
+# Bump when the processing code below changes in a way that affects outcomes
+# (rule config and keyword changes are versioned on their own)
+PROCESSOR_VERSION = 1
+
+def rule_version(rules: Optional[RuleSet] = None) -> str:
+    """Version stamp recorded on every processed RawRecall."""
+    rules = rules or rule_engine.current()
+    return f"p{PROCESSOR_VERSION}-{NLPEngine.current_version()}-r{rules.version}"
+
+def strip_tags(html_text):
+    return re.sub(r'<[^>]+>', '', html_text)
+
+def prepare_payload(raw_payload: str, rules: RuleSet) -> Dict:
+    """Parses and cleans one raw payload and runs the rule scan over its text."""
+    # 1. Parse Payload
+    payload = json.loads(raw_payload)
+    
+    # Unified Field extraction
+    raw_title = payload.get("title", "Unknown Title")
+    title = html.unescape(raw_title) # Fix &nbsp; and others
+    
+    raw_desc = payload.get("summary", "") or payload.get("description", "")
+    desc = strip_tags(html.unescape(raw_desc))
+    
+    # Combine text for NLP
+    full_text = f"{title} {desc}"
+    
+    # One scan finds both the noise rules and the India signals
+    hits = rules.scan(full_text.lower())
+    return {
+        "payload": payload,
+        "title": title,
+        "desc": desc,
+        "full_text": full_text,
+        "hits": hits,
+        "noise": rules.noise_rule(hits),
+    }
+
+def classify(rules: RuleSet, source_type, prepared: Dict, analysis: Dict) -> Dict:
+    """
+    Everything about an item's outcome that does not depend on other rows:
+    the India food/medicine filter, region, signal, confidence and category.
+    """
+    # STRICT FILTER: For India (which relies on broad news scraping), 
+    # we ONLY care about food, medicine, and consumable safety. 
+    # If it lacks context, drop it immediately to prevent political/general news.
+    source_origin = (prepared["payload"].get("_source_origin") or "").strip()
+    if (rules.is_india_source(source_origin) or analysis["is_india"]) and not analysis["is_food_med"]:
+        return {"filtered": True, "rule": "india.food_med_filter"}
+
+    # Score thresholds and feed boosts come from the rules
+    region, rule = rules.region(source_origin, analysis["india_score"], analysis["foreign_score"])
+
+    # Signal Logic (India Specific)
+    signal_type = None
+    confidence = ConfidenceLevel.WATCH # Default
+
+    # US and GLOBAL Defaults
+    if region != Region.IN:
+        score = ConfidenceScorer.calculate_score(source_type, analysis)
+        confidence = ConfidenceScorer.get_bucket(score)
+    else:
+        # INDIA SIGNAL LADDER (first rung whose keywords appear)
+        signal_type, confidence, rule = rules.india_signal(prepared["hits"])
+
+    # Product category from the same keyword scan (first configured match)
+    category, _ = rules.category(prepared["hits"])
+
+    return {"filtered": False, "region": region, "signal_type": signal_type, "confidence": confidence, "category": category, "rule": rule}
+
+def parse_published(payload: Dict) -> Optional[datetime]:
+    # Date Extraction
+    raw_date = payload.get("published") or payload.get("pubDate") or payload.get("date") or payload.get("published_at")
+    if not raw_date:
+        return None
+    try:
+        # Try ISO first (common in JSON APIs)
+        return datetime.fromisoformat(raw_date.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            # Try RSS/Email format (common in Feedparser)
+            return parsedate_to_datetime(raw_date)
+        except Exception:
+            logger.warning(f"Could not parse date: {raw_date}")
+            return None
+
+def _classify_entry(rules: RuleSet, source_type, entry: Dict, analysis: Dict):
+    # 3. Filter, Region & Signals (pure, see classify())
+    try:
+        entry["analysis"] = analysis
+        entry["result"] = classify(rules, source_type, entry["prepared"], analysis)
+    except Exception as e:
+        entry.clear()
+        entry["error"] = str(e)
+
+# Parallel analysis: rows per task, and rows per worker below which the pool
+# is not worth its IPC
+PARALLEL_CHUNK = 250
+PARALLEL_MIN_ROWS = 50
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared pool of analysis processes (spawned, so no event loop or DB connections are inherited)."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_process_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _pool_workers = workers
+    return _pool
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+# Compiled rules in a pool process, by version (rules travel as their config)
+_worker_rules: Dict[str, RuleSet] = {}
+
+def _pool_rules(rules_config: Dict, rules_digest: str) -> RuleSet:
+    rules = _worker_rules.get(rules_digest)
+    if rules is None:
+        _worker_rules.clear()
+        rules = _worker_rules[rules_digest] = RuleSet(rules_config, rules_digest)
+    return rules
+
+def prepare_rows(rules_config: Dict, rules_digest: str, rows: List[tuple]) -> List[Dict]:
+    """
+    Pool task: decode + prepare_payload for (raw id, source type, raw_payload,
+    payload_blob, payload_codec) rows, one entry per row in input order.
+    Compressed payloads are decompressed here, in the pool.
+    """
+    rules = _pool_rules(rules_config, rules_digest)
+    prepared: List[Dict] = []
+    for _, _, raw_payload, blob, codec in rows:
+        try:
+            prepared.append({"prepared": prepare_payload(decode_payload(raw_payload, blob, codec), rules)})
+        except Exception as e:
+            prepared.append({"error": str(e)})
+    return prepared
+
+def analyze_rows(rules_config: Dict, rules_digest: str, nlp_version: str, tasks: List[tuple]) -> List[Dict]:
+    """
+    Pool task: NLP + classify for (source type, prepared payload, cached
+    analysis or None) tasks, one {"analysis", "result"} or {"error"} per task
+    in input order. Only the tasks without a cached analysis run the NLP.
+    Pure, so a chunk gives the same result whichever process runs it.
+    """
+    rules = _pool_rules(rules_config, rules_digest)
+    if NLPEngine.current_version() != nlp_version:
+        raise RuntimeError(f"NLP keyword version mismatch in pool process: {NLPEngine.current_version()} != {nlp_version}")
+
+    todo = [i for i, (_, _, cached) in enumerate(tasks) if cached is None]
+    batch = NLPEngine.analyze_many([tasks[i][1]["full_text"] for i in todo])
+    fresh = {i: batch.row(j) for j, i in enumerate(todo)}
+
+    analyzed: List[Dict] = []
+    for i, (source_type, prepared, cached) in enumerate(tasks):
+        entry = {"prepared": prepared}
+        _classify_entry(rules, source_type, entry, cached if cached is not None else fresh[i])
+        entry.pop("prepared", None)
+        analyzed.append(entry)
+    return analyzed
+
+# Dedup and writes must see each other's results; one batch at a time per process
+_process_lock = asyncio.Lock()
+
 class RecallProcessor:
+    def __init__(
+        self,
+        chunk_size: int = 200,
+        match_queue: Optional[asyncio.Queue] = None,
+        recall_table=None,
+        source_table=None,
+        workers: Optional[int] = None,
+        lease=None,
+    ):
+        # Items written (and committed) together by the bulk write path
+        self.chunk_size = chunk_size
+        # Analysis processes for large batches (<= 1: serial)
+        self.workers = settings.PROCESS_POOL_WORKERS if workers is None else workers
+        # When set, created Recall ids are handed to this queue (the pipeline's
+        # match/notify stage) instead of being matched inline
+        self.match_queue = match_queue
+        # Tables written to: the live ones, or a rebuild's shadow copies
+        self.recall_table = recall_table if recall_table is not None else Recall.__table__
+        self.source_table = source_table if source_table is not None else RecallSource.__table__
+        self.title_indexes = title_indexes if recall_table is None else TitleIndexRegistry(self.recall_table)
+        # Watchlist matching for created recalls (off while building shadow tables)
+        self.notify = recall_table is None
+        # LeaseKeeper of the job this runs under: every batch and chunk checks it
+        # first, so a worker that lost the lease stops writing
+        self.lease = lease
+
     async def process_raw_recalls(self, limit: int = 50, target_ids: List[int] = None):
         """
-        Main loop to process raw ingested data into canonical Recalls.
-        In a real app, this would be an async worker or triggered by events.
+        Processes a specific set of raw rows (target_ids), or the first `limit`
+        rows regardless of their processing state.
         """
-        processed_count = 0
-        
         with Session(engine) as session:
-            # Fetch all raw recalls (In MVP, we process everything. Real app needs 'processed' flag)
-            statement = select(RawRecall)
+            statement = select(RawRecall).order_by(RawRecall.id)
             if target_ids:
                 statement = statement.where(RawRecall.id.in_(target_ids))
             else:
                 statement = statement.limit(limit)
                 
             raw_items = session.exec(statement).all()
-            
-            for raw in raw_items:
-                try:
-                    # 1. Parse Payload
-                    payload = json.loads(raw.raw_payload)
-                    
-                    # Unified Field extraction
-                    raw_title = payload.get("title", "Unknown Title")
-                    title = html.unescape(raw_title) # Fix &nbsp; and others
-                    
-                    raw_desc = payload.get("summary", "") or payload.get("description", "")
-                    
-                    def strip_tags(html_text):
-                        return re.sub(r'<[^>]+>', '', html_text)
-
-                    desc = strip_tags(html.unescape(raw_desc))
-                    
-                    # Combine text for NLP
-                    full_text = f"{title} {desc}"
-                    lower_full_text = full_text.lower()
-                    
-                    # NOISE FILTER (Explicit exclusion)
-                    noise_keywords = [
-                        "funding alert", "raised", "series a", "series b", "series c", "bags $", "mn round", # Finance
-                        "reviewed", "review:", "tested and reviewed", "best medical alert", "top 10", "buying guide", # Reviews
-                        "how it works", "how to", "feature update", "eligible for this", "watch face", "ios", "android" # Tech Tutorials
-                    ]
-                    
-                    if any(re.search(rf'\b{re.escape(nk)}\b', lower_full_text) for nk in noise_keywords):
-                        logger.info(f"🗑️ Skipped Noise: {title}")
-                        continue
-
-                    # 2. NLP Analysis
-                    analysis = NLPEngine.analyze_text(full_text)
-                    
-                    # STRICT FILTER: For India (which relies on broad news scraping), 
-                    # we ONLY care about food, medicine, and consumable safety. 
-                    # If it lacks context, drop it immediately to prevent political/general news.
-                    source_origin = (payload.get("_source_origin") or "").strip()
-                    o = source_origin.lower()
-                    is_india_source = (
-                        bool(re.search(r'(?<![a-z0-9])india(?![a-z0-9])', o)) or
-                        bool(re.search(r'(?<![a-z0-9])in(?![a-z0-9])', o)) or
-                        bool(re.search(r'\bgooglenews[-_ ]?in\b', o)) or
-                        bool(re.search(r'\bgnews[-_ ]?in\b', o))
+            return await self._process_batch(session, raw_items)
+
+    async def process_pending(self, batch_size: int = 500, max_batches: Optional[int] = None):
+        """
+        Incremental mode: processes RawRecall rows that have never been processed,
+        in id order, batch by batch until the backlog is caught up.
+        """
+        processed_count, _ = await self._process_in_order(batch_size, max_batches, pending_only=True)
+        return processed_count
+
+    async def process_all(self, after_id: int = 0, batch_size: int = 500):
+        """
+        Processes every row with id > after_id, whatever its state (used to
+        fill shadow tables). Returns (created count, last id seen).
+        """
+        return await self._process_in_order(batch_size, None, pending_only=False, after_id=after_id)
+
+    async def _process_in_order(self, batch_size: int, max_batches: Optional[int], pending_only: bool, after_id: int = 0):
+        processed_count = 0
+        last_id = after_id
+        batches = 0
+        with Session(engine) as session:
+            while max_batches is None or batches < max_batches:
+                statement = select(RawRecall).where(RawRecall.id > last_id)
+                if pending_only:
+                    statement = statement.where(RawRecall.processed_at == None)  # noqa: E711
+                raw_items = session.exec(statement.order_by(RawRecall.id).limit(batch_size)).all()
+                if not raw_items:
+                    break
+                self._check_lease()
+                # Advance past this batch even if some rows failed to be marked
+                last_id = raw_items[-1].id
+                processed_count += await self._process_batch(session, raw_items)
+                batches += 1
+                logger.info(f"Processed batch up to RawRecall {last_id}")
+        return processed_count, last_id
+
+    def _mark(self, session: Session, raw: RawRecall, outcome: ProcessOutcome, version: str):
+        raw.processed_at = datetime.utcnow()
+        raw.outcome = outcome.value
+        raw.rule_version = version
+        session.add(raw)
+
+    async def _process_batch(self, session: Session, raw_items: List[RawRecall]) -> int:
+        async with _process_lock:
+            return await self._process_batch_locked(session, raw_items)
+
+    async def _process_batch_locked(self, session: Session, raw_items: List[RawRecall]) -> int:
+        """
+        Main loop to process raw ingested data into canonical Recalls.
+        Every row ends up marked with its outcome and the rule version.
+        """
+        processed_count = 0
+        # One rules snapshot per batch, so every row matches its recorded version
+        rules = rule_engine.current()
+        version = rule_version(rules)
+
+        # 1-3. Parse, noise filter, NLP and classification: per-row work, run
+        # across the process pool for large batches
+        analyzed = None
+        if self.workers > 1 and len(raw_items) >= self.workers * PARALLEL_MIN_ROWS:
+            try:
+                analyzed = await self._analyze_parallel(session, raw_items, rules)
+            except Exception as e:
+                logger.error(f"Parallel analysis failed, falling back to serial: {e}")
+        if analyzed is None:
+            analyzed = await asyncio.to_thread(self._analyze_serial, session, raw_items, rules)
+
+        # Everything below is the deterministic reducer: raw id order, one writer
+        prepared = []
+        for raw, entry in zip(raw_items, analyzed):
+            if "error" in entry:
+                logger.error(f"Failed to process RawRecall {raw.id}: {entry['error']}")
+                self._mark(session, raw, ProcessOutcome.ERROR, version)
+            elif entry["prepared"]["noise"]:
+                # NOISE FILTER (Explicit exclusion)
+                logger.info(f"🗑️ Skipped Noise ({entry['prepared']['noise']}): {entry['prepared']['title']}")
+                self._mark(session, raw, ProcessOutcome.NOISE, version)
+            else:
+                prepared.append((raw, entry))
+
+        # Per-region dedup indexes, synced once per batch
+        title_index = {}
+
+        for chunk_start in range(0, len(prepared), self.chunk_size):
+            # Dedup, planning and the bulk write run in a thread: the event loop
+            # (and whatever else runs on it) is never blocked for a whole batch
+            created = await asyncio.to_thread(
+                self._process_chunk, session, prepared[chunk_start:chunk_start + self.chunk_size], title_index, version
+            )
+            processed_count += len(created)
+
+            if created and self.notify:
+                recalls = session.exec(select(Recall).where(Recall.id.in_(created)).order_by(Recall.id)).all()
+                for recall in recalls:
+                    logger.info(f"Created Recall: {recall.title} [{recall.confidence_level}] Signal: {recall.signal_type}")
+                # 6. MATCHING ENGINE (the whole chunk in one pass)
+                if self.match_queue is not None:
+                    await self.match_queue.put([recall.id for recall in recalls])
+                else:
+                    await self.match_recalls(session, recalls)
+        
+        session.commit()
+        return processed_count
+
+    def _process_chunk(self, session: Session, chunk: List[tuple], title_index: dict, version: str) -> List[int]:
+        """Dedups and writes one chunk of analyzed rows, one commit; returns created Recall ids."""
+        # Before touching the shared dedup indexes: a lost lease leaves nothing half-planned
+        self._check_lease()
+        plan = []
+        for raw, entry in chunk:
+            prepared_item, analysis, result = entry["prepared"], entry["analysis"], entry["result"]
+            payload, title, desc = prepared_item["payload"], prepared_item["title"], prepared_item["desc"]
+            try:
+                if result["filtered"]:
+                    logger.info(f"🗑️ Skipped Non-Food/Med India News: {title}")
+                    self._mark(session, raw, ProcessOutcome.FILTERED, version)
+                    continue
+                region = result["region"]
+
+                # 4. Create Canonical Recall
+                # Fuzzy Deduplication (trigram candidates, exact ratio check)
+                if region not in title_index:
+                    title_index[region] = self.title_indexes.get(session, region)
+                duplicate_id = title_index[region].find_duplicate(title)
+
+                pub_date = parse_published(payload)
+
+                item = {
+                    "raw": raw,
+                    "region": region,
+                    "link": payload.get("link"),
+                    "recall": None,
+                    "source": {
+                        "source_type": raw.source_type,
+                        "url": payload.get("link", payload.get("url", "#")),
+                        "title": title,
+                        "raw_id": raw.id,
+                    },
+                }
+                if duplicate_id:
+                    # MERGE: Add as new source to existing recall
+                    item["target"] = duplicate_id
+                else:
+                    # CREATE NEW (inserted together with the rest of the chunk)
+                    item["recall"] = Recall(
+                        title=title,
+                        hazard_summary=desc[:500],
+                        region=region,
+                        confidence_level=result["confidence"],
+                        signal_type=result["signal_type"],
+                        category=result["category"],
+                        brand=analysis["entities"][0] if analysis["entities"] else None,
+                        url=payload.get("link", payload.get("url", "#")),
+                        published_date=pub_date,
+                        rule_version=version
                     )
-                    
-                    if (is_india_source or analysis["is_india"]) and not analysis["is_food_med"]:
-                        logger.info(f"🗑️ Skipped Non-Food/Med India News: {title}")
-                        continue
-                        
-                    # Extract entities (basic regex from NLP engine)
-                    analysis["entities"] = NLPEngine.extract_entity_candidates(full_text)
-                    
-                    # 3. Signals & Region Logic
-                    o = source_origin.lower()
-                    
-                    india_score = analysis["india_score"]
-                    foreign_score = analysis["foreign_score"]
-                    
-                    # Boost India score if the feed origin is explicitly Indian
-                    if bool(re.search(r'(?<![a-z0-9])india(?![a-z0-9])', o)) or \
-                       bool(re.search(r'(?<![a-z0-9])in(?![a-z0-9])', o)) or \
-                       bool(re.search(r'\bgooglenews[-_ ]?in\b', o)) or \
-                       bool(re.search(r'\bgnews[-_ ]?in\b', o)):
-                        india_score += 2
-                        
-                    # Boost Region.US (Foreign) if explicitly from a US feed
-                    if source_origin == "GoogleNews-US":
-                        foreign_score += 5
-
-                    # Score-based assignment logic
-                    if india_score >= 5 and india_score >= (foreign_score + 2):
-                        region = Region.IN
-                    elif foreign_score >= 3:
-                        region = Region.US
-                    else:
-                        region = Region.GLOBAL  # Default fallback
-
-                    
-                    # Signal Logic (India Specific)
-                    signal_type = None
-                    confidence = ConfidenceLevel.WATCH # Default
-
-                    # US and GLOBAL Defaults
-                    if region != Region.IN:
-                         score = ConfidenceScorer.calculate_score(raw.source_type, analysis)
-                         confidence = ConfidenceScorer.get_bucket(score)
-                    else:
-                        # INDIA SIGNAL LADDER
-                        lower_text = full_text.lower()
-                        
-                        # A. Define Signals
-                        if any(k in lower_text for k in ["ban", "banned", "cancelled", "suspended", "seized", "ordered to withdraw"]):
-                            signal_type = "Regulatory Action"
-                        elif any(k in lower_text for k in ["sample failed", "substandard", "not of standard quality", "adulterated", "unsafe"]):
-                            signal_type = "Sample Failure"
-                        elif any(k in lower_text for k in ["probe", "investigation", "complaint", "show cause"]):
-                            signal_type = "Investigation"
-                        elif "recall" in lower_text:
-                            signal_type = "Recall"
-                        
-                        # B. Assign Confidence based on Signal
-                        if signal_type == "Regulatory Action":
-                            confidence = ConfidenceLevel.CONFIRMED
-                        elif signal_type == "Sample Failure":
-                            confidence = ConfidenceLevel.PROBABLE
-                        elif signal_type == "Recall": 
-                             confidence = ConfidenceLevel.CONFIRMED
-                        else:
-                            # Investigations or weak signals -> Watch
-                             signal_type = signal_type or "Investigation" # Default
-                             confidence = ConfidenceLevel.WATCH
-                    
-                    # 4. Create Canonical Recall
-                    # Fuzzy Deduplication (MVP)
-                    candidates = session.exec(select(Recall).where(Recall.region == region)).all()
-                    
-                    from difflib import SequenceMatcher
-                    
-                    existing_recall = None
-                    for cand in candidates:
-                        ratio = SequenceMatcher(None, title.lower(), cand.title.lower()).ratio()
-                        if ratio > 0.65: # Threshold
-                            existing_recall = cand
-                            break
-                    
-                    from email.utils import parsedate_to_datetime
-                    
-                    # Date Extraction
-                    pub_date = None
-                    raw_date = payload.get("published") or payload.get("pubDate") or payload.get("date") or payload.get("published_at")
-                    
-                    if raw_date:
-                        try:
-                            # Try ISO first (common in JSON APIs)
-                            pub_date = datetime.fromisoformat(raw_date.replace("Z", "+00:00"))
-                        except ValueError:
-                            try:
-                                # Try RSS/Email format (common in Feedparser)
-                                pub_date = parsedate_to_datetime(raw_date)
-                            except Exception:
-                                logger.warning(f"Could not parse date: {raw_date}")
-                                pub_date = None
-
-                    if existing_recall:
-                        # MERGE: Add as new source to existing recall
-                        existing_source = session.exec(select(RecallSource).where(RecallSource.recall_id == existing_recall.id).where(RecallSource.url == payload.get("link"))).first()
-                        if not existing_source:
-                            source = RecallSource(
-                                recall_id=existing_recall.id,
-                                source_type=raw.source_type,
-                                url=payload.get("link", payload.get("url", "#")),
-                                title=title
-                            )
-                            session.add(source)
-                            logger.info(f"Merged duplicate into Recall {existing_recall.id}: {title}")
-                    else:
-                        # CREATE NEW
-                        recall = Recall(
-                            title=title,
-                            hazard_summary=desc[:500],
-                            region=region,
-                            confidence_level=confidence,
-                            signal_type=signal_type, 
-                            brand=analysis["entities"][0] if analysis["entities"] else None,
-                            url=payload.get("link", payload.get("url", "#")),
-                            published_date=pub_date
-                        )
-                        session.add(recall)
-                        session.commit()
-                        session.refresh(recall)
-                        
-                        source = RecallSource(
-                            recall_id=recall.id,
-                            source_type=raw.source_type,
-                            url=payload.get("link", payload.get("url", "#")),
-                            title=title
-                        )
-                        session.add(source)
-                        processed_count += 1
-                        logger.info(f"Created Recall: {title} [{confidence}] Signal: {signal_type}")
-
-                        # 6. MATCHING ENGINE
-                        await self.check_matches(session, recall)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process RawRecall {raw.id}: {e}")
-            
-            session.commit()
-            return processed_count
+                    # Later items in this batch must be able to merge into it
+                    item["target"] = PENDING_ID_BASE + raw.id
+                    title_index[region].add(item["target"], title)
+                plan.append(item)
+
+            except Exception as e:
+                logger.error(f"Failed to process RawRecall {raw.id}: {e}")
+                self._mark(session, raw, ProcessOutcome.ERROR, version)
+
+        # 5. Write the chunk: bulk inserts, one commit
+        created = self._write_chunk(session, plan, title_index, version)
+        session.commit()
+        return created
+
+    def _check_lease(self):
+        if self.lease is not None:
+            self.lease.check()
+
+    def _analyze_serial(self, session: Session, raw_items: List[RawRecall], rules: RuleSet) -> List[Dict]:
+        """Per-row analysis in this process, NLP results served from the analysis cache."""
+        analyzed: List[Dict] = []
+        todo = []
+        for raw in raw_items:
+            try:
+                item = prepare_payload(raw.payload_json(), rules)
+            except Exception as e:
+                analyzed.append({"error": str(e)})
+                continue
+            analyzed.append({"prepared": item})
+            if not item["noise"]:
+                todo.append((raw, analyzed[-1]))
+
+        # 2. NLP Analysis (one batched pass over all surviving texts, cached by content)
+        batch = analysis_cache.analyze_many(session, [entry["prepared"]["full_text"] for _, entry in todo])
+        for i, (raw, entry) in enumerate(todo):
+            _classify_entry(rules, raw.source_type, entry, batch.row(i))
+        return analyzed
+
+    async def _analyze_parallel(self, session: Session, raw_items: List[RawRecall], rules: RuleSet) -> List[Dict]:
+        """
+        The same per-row analysis as _analyze_serial, in chunks across the
+        process pool. Payloads are prepared in the pool, looked up in the
+        analysis cache here, and only the cache misses run the NLP in the
+        pool; their results are written through to the cache. Results come
+        back in input order.
+        """
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool(self.workers)
+
+        def chunked(items: list) -> List[list]:
+            size = max(1, min(PARALLEL_CHUNK, -(-len(items) // self.workers)))
+            return [items[start:start + size] for start in range(0, len(items), size)]
+
+        # 1. Parse and noise filter
+        rows = [(raw.id, raw.source_type, raw.raw_payload, raw.payload_blob, raw.payload_codec) for raw in raw_items]
+        analyzed = [
+            entry
+            for chunk in await asyncio.gather(*[
+                loop.run_in_executor(pool, prepare_rows, rules.config, rules.digest, part) for part in chunked(rows)
+            ])
+            for entry in chunk
+        ]
+        todo = [
+            (raw, entry) for raw, entry in zip(raw_items, analyzed)
+            if "prepared" in entry and not entry["prepared"]["noise"]
+        ]
+        if not todo:
+            return analyzed
+
+        # 2-3. NLP (cache misses only) and classification
+        texts = [entry["prepared"]["full_text"] for _, entry in todo]
+        cached = await asyncio.to_thread(analysis_cache.lookup, session, texts)
+        tasks = [(raw.source_type, entry["prepared"], row) for (raw, entry), row in zip(todo, cached)]
+        results = [
+            result
+            for chunk in await asyncio.gather(*[
+                loop.run_in_executor(pool, analyze_rows, rules.config, rules.digest, NLPEngine.current_version(), part)
+                for part in chunked(tasks)
+            ])
+            for result in chunk
+        ]
+        for (_, entry), result in zip(todo, results):
+            if "error" in result:
+                entry.clear()
+            entry.update(result)
+
+        await asyncio.to_thread(analysis_cache.store_many, session, [
+            (text, entry["analysis"])
+            for text, row, (_, entry) in zip(texts, cached, todo)
+            if row is None and "analysis" in entry
+        ])
+        return analyzed
+
+    def _write_chunk(self, session: Session, plan: List[dict], title_index: dict, version: str) -> List[int]:
+        """
+        Writes a chunk's new Recalls and RecallSources with bulk statements.
+        If the bulk write fails, it is retried item by item (each in its own
+        SAVEPOINT) so one bad row only costs itself. Returns created Recall ids.
+        """
+        id_map: Dict[int, int] = {}
+        try:
+            with session.begin_nested():
+                created = self._write_plan(session, plan, id_map, version)
+        except Exception as e:
+            logger.error(f"Bulk write failed, retrying {len(plan)} items one by one: {e}")
+            id_map.clear()
+            created = []
+            for item in plan:
+                try:
+                    with session.begin_nested():
+                        created += self._write_plan(session, [item], id_map, version)
+                except Exception as item_error:
+                    logger.error(f"Failed to process RawRecall {item['raw'].id}: {item_error}")
+                    self._mark(session, item["raw"], ProcessOutcome.ERROR, version)
+
+        # Swap provisional index keys for the real ids (or drop them)
+        for item in plan:
+            if item["recall"] is not None:
+                index = title_index[item["region"]]
+                if item["target"] in id_map:
+                    index.rename(item["target"], id_map[item["target"]])
+                else:
+                    index.remove(item["target"])
+        return created
+
+    def _write_plan(self, session: Session, plan: List[dict], id_map: Dict[int, int], version: str) -> List[int]:
+        # 1. New recalls: one INSERT ... RETURNING for the whole chunk
+        creates = [item for item in plan if item["recall"] is not None]
+        ids = bulk_insert_returning_ids(
+            session, self.recall_table, [item["recall"].model_dump(exclude={"id"}) for item in creates]
+        )
+        for item, recall_id in zip(creates, ids):
+            id_map[item["target"]] = recall_id
+
+        # 2. Source URLs already attached to the merge targets, in one query
+        targets = list({item["target"] for item in plan if item["recall"] is None and item["target"] < PENDING_ID_BASE})
+        seen = set()
+        source = self.source_table.c
+        for start in range(0, len(targets), 500):
+            seen.update(tuple(row) for row in session.execute(
+                select(source.recall_id, source.url)
+                .where(source.recall_id.in_(targets[start:start + 500]))
+            ).all())
+
+        # 3. Sources for created and merged items
+        sources = []
+        for item in plan:
+            recall_id = id_map.get(item["target"], item["target"])
+            if recall_id >= PENDING_ID_BASE:
+                raise ValueError(f"Recall for RawRecall {item['raw'].id} was not written")
+            if item["recall"] is None and item["link"] is not None and (recall_id, item["link"]) in seen:
+                self._mark(session, item["raw"], ProcessOutcome.DUPLICATE, version)
+                continue
+            sources.append({**item["source"], "recall_id": recall_id})
+            seen.add((recall_id, item["source"]["url"]))
+            if item["recall"] is None:
+                logger.info(f"Merged duplicate into Recall {recall_id}: {item['source']['title']}")
+                self._mark(session, item["raw"], ProcessOutcome.MERGED, version)
+            else:
+                self._mark(session, item["raw"], ProcessOutcome.CREATED, version)
+        if sources:
+            session.execute(insert(self.source_table), sources)
+        session.flush()
+        return ids
 
     async def check_matches(self, session: Session, recall: Recall):
-        from app.models.user import Watchlist
-        from app.services.notifier import notifier
-        from app.models.user import User
-        
-        watchlists = session.exec(select(Watchlist)).all()
-        
-        for w in watchlists:
-            match = False
-            if w.type == "BRAND" and recall.brand and w.value.lower() in recall.brand.lower():
-                match = True
-            elif w.type == "PRODUCT" and w.value.lower() in recall.title.lower():
-                match = True
-                
-            if match:
-                logger.info(f"!!! ALERT TRIGGERED !!! User {w.user_id} matched '{w.value}' in Recall '{recall.title}'")
-                
-                user = session.get(User, w.user_id)
-                if user:
-                    await notifier.notify_user_alert(user, recall.title, w.value)
+        await self.match_recalls(session, [recall])
+
+    async def match_recalls(self, session: Session, recalls: List[Recall]):
+        """
+        Joins a batch of new recalls against the watchlists (indexed lookup,
+        cost follows each recall's brand/title, not the watchlist count) and
+        sends whatever digests are due for the users hit.
+        """
+        from app.services.alerts import alert_digester
+
+        user_ids = await asyncio.to_thread(alert_digester.match, session, recalls)
+        if user_ids:
+            await alert_digester.flush(user_ids)
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    import asyncio
     processor = RecallProcessor()
-    count = asyncio.run(processor.process_raw_recalls())
+    count = asyncio.run(processor.process_pending())
     print(f"Processed {count} new canonical recalls.")
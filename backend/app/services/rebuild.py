@@ -0,0 +1,263 @@
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Column, ForeignKey, Index, MetaData, Table, and_, bindparam, delete, func, inspect, select, text, update
+from sqlmodel import Session
+from app.core.database import engine
+from app.core.constants import ProcessOutcome
+from app.models.alert import PendingAlert
+from app.models.recall import Recall, RecallSource, RawRecall
+from app.services.dedup import TITLE_VERSION
+from app.services.recall_search import create_search_indexes
+from app.services.processor import RecallProcessor
+from app.services.watchlist_index import bump_version
+
+logger = logging.getLogger(__name__)
+
+class ShadowProcessor(RecallProcessor):
+    """
+    RecallProcessor writing into shadow tables. Raw outcomes are collected
+    in memory instead of being written, so the live rows keep describing the
+    live tables until the swap applies them.
+    """
+
+    def __init__(self, recall_table: Table, source_table: Table, chunk_size: int = 200, workers: Optional[int] = None, lease=None):
+        super().__init__(chunk_size=chunk_size, recall_table=recall_table, source_table=source_table, workers=workers, lease=lease)
+        self.outcomes: Dict[int, Tuple[str, str, datetime]] = {}
+
+    def _mark(self, session, raw: RawRecall, outcome: ProcessOutcome, version: str):
+        self.outcomes[raw.id] = (outcome.value, version, datetime.utcnow())
+
+class ShadowRebuild:
+    """
+    Rebuilds recall/recallsource from every RawRecall into shadow tables
+    while the live ones keep serving, then swaps them in with renames inside
+    one transaction:
+
+    1. create recall_<suffix> / recallsource_<suffix> (no secondary indexes)
+    2. process all raw rows into them (no notifications, analysis optionally
+       spread over a process pool), catching up on rows ingested meanwhile
+    3. build the indexes
+    4. in one transaction: give every rebuilt recall the id of the live
+       recall it shares the most raw rows with (so links and PendingAlert
+       rows stay valid), point alerts of recalls that were merged away at
+       their successor, rename live -> *_old_<suffix>, shadow -> live, apply
+       the collected raw outcomes, and send rows that arrived after the last
+       catch-up back to pending
+    5. drop the old tables
+    """
+
+    def __init__(self, suffix: Optional[str] = None, batch_size: int = 500, keep_old: bool = False, workers: Optional[int] = None, lease=None):
+        self.suffix = suffix or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        self.batch_size = batch_size
+        self.keep_old = keep_old
+        # Analysis processes (None: PROCESS_POOL_WORKERS)
+        self.workers = workers
+        # LeaseKeeper checked before every chunk and before the swap (None: unguarded)
+        self.lease = lease
+        self.metadata = MetaData()
+        self.recall = self._copy_table(Recall.__table__, f"recall_{self.suffix}")
+        self.source = self._copy_table(RecallSource.__table__, f"recallsource_{self.suffix}")
+
+    def _copy_table(self, table: Table, name: str) -> Table:
+        """
+        Column-for-column copy; foreign keys to recall point at the shadow
+        recall, checked at commit so the swap can renumber recall ids.
+        """
+        columns = []
+        for col in table.columns:
+            fks = []
+            for fk in col.foreign_keys:
+                target = fk.column
+                if target.table is Recall.__table__:
+                    fks.append(ForeignKey(self.recall.c[target.name], deferrable=True, initially="DEFERRED"))
+                else:
+                    fks.append(ForeignKey(target))
+            columns.append(Column(
+                col.name, col.type, *fks,
+                primary_key=col.primary_key, nullable=col.nullable, autoincrement=col.autoincrement,
+            ))
+        return Table(name, self.metadata, *columns)
+
+    def _shadow_indexes(self, table: Table, shadow: Table) -> List[Index]:
+        return [
+            Index(
+                f"ix_{shadow.name}_{'_'.join(col.name for col in index.columns)}",
+                *[shadow.c[col.name] for col in index.columns],
+                unique=index.unique,
+            )
+            for index in table.indexes
+        ]
+
+    async def run(self) -> Dict[str, int]:
+        logger.info(f"🏗️ Shadow rebuild {self.suffix}: creating shadow tables")
+        with engine.begin() as conn:
+            self.recall.create(conn)
+            self.source.create(conn)
+
+        try:
+            processor = ShadowProcessor(self.recall, self.source, workers=self.workers, lease=self.lease)
+            created, last_id = await processor.process_all(batch_size=self.batch_size)
+            # Catch up on rows ingested while the bulk of the rebuild ran
+            while True:
+                more, new_last_id = await processor.process_all(after_id=last_id, batch_size=self.batch_size)
+                if new_last_id == last_id:
+                    break
+                created, last_id = created + more, new_last_id
+
+            logger.info(f"🏗️ Shadow rebuild {self.suffix}: {created} recalls built, creating indexes")
+            with engine.begin() as conn:
+                for index in self._shadow_indexes(Recall.__table__, self.recall) + self._shadow_indexes(RecallSource.__table__, self.source):
+                    index.create(conn)
+                create_search_indexes(conn, self.recall.name)
+
+            self._swap(processor.outcomes, last_id)
+        except BaseException:
+            logger.error(f"Shadow rebuild {self.suffix} failed, dropping shadow tables")
+            with engine.begin() as conn:
+                self.source.drop(conn, checkfirst=True)
+                self.recall.drop(conn, checkfirst=True)
+            raise
+
+        if not self.keep_old:
+            self._drop_old()
+        return {"created": created, "raw_rows": len(processor.outcomes), "last_raw_id": last_id}
+
+    def _swap(self, outcomes: Dict[int, Tuple[str, str, datetime]], last_id: int):
+        preparer = engine.dialect.identifier_preparer
+        q = preparer.quote
+        renames = [
+            ("recallsource", f"recallsource_old_{self.suffix}"),
+            ("recall", f"recall_old_{self.suffix}"),
+            (self.recall.name, "recall"),
+            (self.source.name, "recallsource"),
+        ]
+        raw = RawRecall.__table__
+        set_outcome = (
+            update(raw)
+            .where(raw.c.id == bindparam("raw_id"))
+            .values(processed_at=bindparam("at"), outcome=bindparam("result"), rule_version=bindparam("version"))
+        )
+        rows = [{"raw_id": rid, "result": o, "version": v, "at": at} for rid, (o, v, at) in outcomes.items()]
+
+        if self.lease is not None:
+            self.lease.check()
+        with engine.connect() as conn:
+            if engine.dialect.name == "sqlite":
+                # pysqlite does not open a transaction for DDL by itself
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                final_ids, successors = self._id_plan(conn)
+                self._renumber(conn, final_ids)
+                self._remap_alerts(conn, successors)
+                for old, new in renames:
+                    conn.execute(text(f"ALTER TABLE {q(old)} RENAME TO {q(new)}"))
+                # SQLite's search index follows the table name: re-point and rebuild it
+                create_search_indexes(conn)
+                for start in range(0, len(rows), 1000):
+                    conn.execute(set_outcome, rows[start:start + 1000])
+                # Rows that arrived after the last catch-up were at most
+                # processed into the old tables: process them again
+                conn.execute(
+                    update(raw).where(raw.c.id > last_id)
+                    .values(processed_at=None, outcome=None, rule_version=None)
+                )
+                # Dedup indexes in every process rebuild from the new table
+                bump_version(Session(bind=conn), TITLE_VERSION)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        logger.info(f"🔀 Shadow rebuild {self.suffix}: swapped in new recall tables")
+
+    def _id_plan(self, conn) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        (shadow id -> final id, live id left without a rebuilt recall -> final
+        id of the one holding most of its rows). Pairs are matched greedily,
+        most shared raw rows first; rebuilt recalls without a live
+        counterpart get ids above every live one, so an old link never leads
+        to an unrelated recall.
+        """
+        live, shadow = RecallSource.__table__, self.source
+        shared: Counter = Counter()
+        for on in (
+            live.c.raw_id == shadow.c.raw_id,
+            # Rows stored before sources recorded their raw id
+            and_(live.c.raw_id == None, live.c.url == shadow.c.url, live.c.title == shadow.c.title),  # noqa: E711
+        ):
+            pairs = conn.execute(
+                select(live.c.recall_id, shadow.c.recall_id, func.count())
+                .select_from(live.join(shadow, on))
+                .group_by(live.c.recall_id, shadow.c.recall_id)
+            )
+            for old, new, count in pairs:
+                if old is not None and new is not None:
+                    shared[(old, new)] += count
+        ranked = sorted(shared, key=lambda pair: (-shared[pair], pair))
+
+        final_ids: Dict[int, int] = {}
+        kept = set()
+        for old, new in ranked:
+            if new not in final_ids and old not in kept:
+                final_ids[new] = old
+                kept.add(old)
+        next_id = max(
+            conn.execute(select(func.max(Recall.__table__.c.id))).scalar() or 0,
+            conn.execute(select(func.max(self.recall.c.id))).scalar() or 0,
+        ) + 1
+        for (new,) in conn.execute(select(self.recall.c.id).order_by(self.recall.c.id)):
+            if new not in final_ids:
+                final_ids[new] = next_id
+                next_id += 1
+
+        successors: Dict[int, int] = {}
+        for old, new in ranked:
+            if old not in kept and old not in successors:
+                successors[old] = final_ids[new]
+        return final_ids, successors
+
+    def _renumber(self, conn, final_ids: Dict[int, int]):
+        recall, source = self.recall, self.source
+        moves = [{"shadow_id": new, "final_id": final} for new, final in final_ids.items() if new != final]
+        if moves:
+            # Through negative ids, so no two rows ever hold the same id
+            for start in range(0, len(moves), 1000):
+                ids = [m["shadow_id"] for m in moves[start:start + 1000]]
+                conn.execute(update(recall).where(recall.c.id.in_(ids)).values(id=-recall.c.id))
+                conn.execute(update(source).where(source.c.recall_id.in_(ids)).values(recall_id=-source.c.recall_id))
+            conn.execute(
+                update(recall).where(recall.c.id == -bindparam("shadow_id")).values(id=bindparam("final_id")), moves
+            )
+            conn.execute(
+                update(source).where(source.c.recall_id == -bindparam("shadow_id")).values(recall_id=bindparam("final_id")), moves
+            )
+            logger.info(f"🔢 Shadow rebuild {self.suffix}: renumbered {len(moves)} recalls to their live ids")
+        if engine.dialect.name == "postgresql":
+            # Explicit ids bypassed the sequence: continue after the highest
+            conn.execute(
+                text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :value)"),
+                {"table": recall.name, "value": max(final_ids.values(), default=0) or 1},
+            )
+
+    def _remap_alerts(self, conn, successors: Dict[int, int]):
+        alert = PendingAlert.__table__
+        for old, new in successors.items():
+            # (user, recall) is unique: keep the alert already on the successor
+            conn.execute(
+                update(alert)
+                .where(alert.c.recall_id == old)
+                .where(alert.c.user_id.not_in(select(alert.c.user_id).where(alert.c.recall_id == new)))
+                .values(recall_id=new)
+            )
+        # Recalls gone entirely (every row now filtered out)
+        conn.execute(delete(alert).where(alert.c.recall_id.not_in(select(self.recall.c.id))))
+
+    def _drop_old(self):
+        inspector = inspect(engine)
+        q = engine.dialect.identifier_preparer.quote
+        with engine.begin() as conn:
+            for name in (f"recallsource_old_{self.suffix}", f"recall_old_{self.suffix}"):
+                if inspector.has_table(name):
+                    conn.execute(text(f"DROP TABLE {q(name)}"))
+        logger.info(f"🧹 Shadow rebuild {self.suffix}: dropped the previous tables")
@@ -0,0 +1,173 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import column, func, or_, text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, select
+from app.core.database import engine
+from app.models.recall import Recall
+from app.models.user import Watchlist
+from app.rules.engine import rule_engine
+from app.services.watchlist_index import REGION_ALIASES, brand_key, brand_matches
+
+logger = logging.getLogger(__name__)
+
+# SQLite: FTS5 table (trigram tokenizer) over recall.title / recall.brand,
+# kept in sync by triggers on the live recall table
+FTS_TABLE = "recall_fts"
+FTS_TRIGGERS = {
+    f"{FTS_TABLE}_ai": (
+        f"AFTER INSERT ON recall BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, brand) VALUES (new.id, new.title, new.brand); END"
+    ),
+    f"{FTS_TABLE}_ad": (
+        f"AFTER DELETE ON recall BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, brand) VALUES ('delete', old.id, old.title, old.brand); END"
+    ),
+    f"{FTS_TABLE}_au": (
+        f"AFTER UPDATE OF title, brand ON recall BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, brand) VALUES ('delete', old.id, old.title, old.brand); "
+        f"INSERT INTO {FTS_TABLE}(rowid, title, brand) VALUES (new.id, new.title, new.brand); END"
+    ),
+}
+
+# Trigram indexes cannot narrow down shorter values
+MIN_TRIGRAM = 3
+
+# Backfill bounds (days of history, recalls returned)
+BACKFILL_MAX_DAYS = 365
+BACKFILL_LIMIT = 50
+
+def _sqlite_index(conn) -> bool:
+    try:
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, brand, content='recall', content_rowid='id', tokenize='trigram')"
+        )
+    except DBAPIError as e: # SQLite < 3.34 or built without FTS5
+        logger.warning(f"Recall search index unavailable ({e.orig}), backfills fall back to LIKE scans")
+        return False
+    attached = dict(conn.exec_driver_sql(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+        tuple(FTS_TRIGGERS),
+    ).all())
+    if all(attached.get(name) == "recall" for name in FTS_TRIGGERS):
+        return True
+    # New index, or the triggers stayed on a table a shadow rebuild swapped out
+    for name in attached:
+        conn.exec_driver_sql(f"DROP TRIGGER {name}")
+    for name, body in FTS_TRIGGERS.items():
+        conn.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    logger.info("🔎 Rebuilt the recall search index")
+    return True
+
+def _postgres_index(conn, table: str) -> bool:
+    try:
+        with conn.begin_nested():
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DBAPIError as e: # Needs a role allowed to create extensions
+        logger.warning(f"pg_trgm unavailable ({e.orig}), backfills fall back to LIKE scans")
+        return False
+    existing = conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table"), {"table": table}
+    ).scalars().all()
+    for col in ("title", "brand"):
+        # Matched on the suffix: a swapped-in shadow table keeps its own index names
+        if any(name.endswith(f"_{col}_trgm") for name in existing):
+            continue
+        conn.exec_driver_sql(f'CREATE INDEX "ix_{table}_{col}_trgm" ON "{table}" USING gin (lower({col}) gin_trgm_ops)')
+        logger.info(f"🔎 Created trigram index on {table}.{col}")
+    return True
+
+def create_search_indexes(conn, table: str = "recall") -> bool:
+    """
+    Builds the substring search index of a recall table: pg_trgm GIN indexes
+    on Postgres (also for a shadow table before its swap), the FTS5 trigram
+    table on SQLite (live table only). Returns False when the database
+    cannot provide one.
+    """
+    if conn.dialect.name == "postgresql":
+        return _postgres_index(conn, table)
+    if conn.dialect.name == "sqlite" and table == "recall":
+        return _sqlite_index(conn)
+    return False
+
+def ensure_search_index():
+    with engine.begin() as conn:
+        create_search_indexes(conn)
+
+class RecallSearch:
+    """
+    Indexed lookups of past recalls for one watchlist (history backfill).
+    Matching follows live matching: PRODUCT values are substrings of the
+    title, BRAND values runs of whole words of the brand, REGION and CATEGORY
+    values go through the same aliases. Substring lookups are served by the
+    trigram index (for BRAND, on the longest word, the rest checked here);
+    values too short for it are a LIKE scan bounded by the window and the
+    limit.
+    """
+
+    def __init__(self):
+        self._fts_ready: Optional[bool] = None
+
+    def _fts(self, session: Session) -> bool:
+        if self._fts_ready is None:
+            self._fts_ready = session.get_bind().dialect.name == "sqlite" and session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first() is not None
+        return self._fts_ready
+
+    def for_watchlist(self, session: Session, watchlist: Watchlist, days: int, limit: int = BACKFILL_LIMIT) -> List[Recall]:
+        """Recalls from the last `days` days the watchlist would have matched, newest first."""
+        value = (watchlist.value or "").strip().lower()
+        if not value:
+            return []
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        statement = select(Recall).where(func.coalesce(Recall.published_date, Recall.created_at) >= cutoff)
+
+        if watchlist.type in ("BRAND", "PRODUCT"):
+            field = Recall.brand if watchlist.type == "BRAND" else Recall.title
+            if watchlist.type == "BRAND":
+                words = brand_key(value).split()
+                if not words:
+                    return []
+                value = max(words, key=len)
+            # lower(col) LIKE '%value%': what the pg_trgm indexes serve
+            statement = statement.where(func.lower(field).contains(value, autoescape=True))
+            if len(value) >= MIN_TRIGRAM and not set(value) & {"%", "_"} and self._fts(session):
+                statement = statement.where(Recall.id.in_(
+                    text(f"SELECT rowid FROM {FTS_TABLE} WHERE {field.key} LIKE :fts_pattern")
+                    .bindparams(fts_pattern=f"%{value}%")
+                    .columns(column("rowid"))
+                ))
+            if watchlist.type == "BRAND":
+                return self._whole_words(session, statement, watchlist.value, limit)
+        elif watchlist.type == "REGION":
+            regions = [r for r, aliases in REGION_ALIASES.items() if value == r.value.lower() or value in aliases]
+            if not regions:
+                return []
+            statement = statement.where(Recall.region.in_(regions))
+        elif watchlist.type == "CATEGORY":
+            categories = [c for c, aliases in rule_engine.current().category_aliases.items() if value in aliases]
+            statement = statement.where(or_(Recall.category.in_(categories), func.lower(Recall.category) == value))
+        else:
+            return []
+
+        return session.exec(statement.order_by(Recall.id.desc()).limit(limit)).all()
+
+    def _whole_words(self, session: Session, statement, value: str, limit: int) -> List[Recall]:
+        """Pages through the substring candidates, keeping brands where `value` is whole words."""
+        found: List[Recall] = []
+        before = None
+        while len(found) < limit:
+            page = statement if before is None else statement.where(Recall.id < before)
+            batch = session.exec(page.order_by(Recall.id.desc()).limit(limit)).all()
+            found += [recall for recall in batch if brand_matches(value, recall.brand)]
+            if len(batch) < limit:
+                break
+            before = batch[-1].id
+        return found[:limit]
+
+# Singleton Instance
+recall_search = RecallSearch()
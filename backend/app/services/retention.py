@@ -0,0 +1,142 @@
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, exists, update
+from sqlmodel import Session, select
+from app.core.config import settings
+from app.core.constants import ProcessOutcome
+from app.core.database import engine, insert_ignore
+from app.core.payload import encode_payload
+from app.models.recall import RawRecall, RawRecallArchive, RecallSource
+
+logger = logging.getLogger(__name__)
+
+# Outcomes whose rows contributed nothing to a Recall: the only ones retention
+# moves, since rebuilds and reprocessing need every row behind a recall
+ARCHIVABLE = (ProcessOutcome.NOISE.value, ProcessOutcome.FILTERED.value, ProcessOutcome.ERROR.value)
+
+# Columns shared by RawRecall and RawRecallArchive
+_COLUMNS = [name for name in RawRecall.__table__.columns.keys()]
+_PAYLOAD_COLUMNS = ("raw_payload", "payload_blob", "payload_codec")
+
+def _row(raw) -> Dict:
+    row = {name: getattr(raw, name) for name in _COLUMNS}
+    if not row["payload_codec"]:
+        # Archive payloads are always stored compressed
+        row.update(encode_payload(row["raw_payload"]))
+    return row
+
+class RawRetention:
+    """
+    Keeps RawRecall small: processed rows older than RAW_RETENTION_DAYS that
+    were dropped (noise / filtered / error) move to RawRecallArchive, and
+    archived rows can be exported to gzipped JSONL files or restored. The
+    pipeline still treats archived identities as seen, exported ones too:
+    export only strips the payload and keeps the row as a tombstone.
+    """
+
+    def __init__(self, days: int = settings.RAW_RETENTION_DAYS, batch_size: int = 1000):
+        self.days = days
+        self.batch_size = batch_size
+
+    def archive(self, dry_run: bool = False) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=self.days)
+        moved = 0
+        last_id = 0
+        while True:
+            with Session(engine) as session:
+                raws = session.exec(
+                    select(RawRecall)
+                    .where(RawRecall.id > last_id)
+                    .where(RawRecall.processed_at < cutoff)
+                    .where(RawRecall.outcome.in_(ARCHIVABLE))
+                    # Never move a row a recall still points at
+                    .where(~exists().where(RecallSource.raw_id == RawRecall.id))
+                    .order_by(RawRecall.id)
+                    .limit(self.batch_size)
+                ).all()
+                if not raws:
+                    break
+                last_id = raws[-1].id
+                moved += len(raws)
+                if dry_run:
+                    continue
+                now = datetime.utcnow()
+                insert_ignore(session, RawRecallArchive, [dict(_row(raw), archived_at=now) for raw in raws], ["id"])
+                session.exec(delete(RawRecall).where(RawRecall.id.in_([raw.id for raw in raws])))
+                session.commit()
+        if moved:
+            logger.info(f"🗄️ {'Would archive' if dry_run else 'Archived'} {moved} dropped raw rows older than {self.days} days")
+        return moved
+
+    def export(self, path: str, archived_before: Optional[datetime] = None) -> int:
+        """
+        Moves archived payloads into a gzipped JSONL file (one row per line,
+        payload decoded). The rows stay behind without payload, marked
+        exported, so their identity keys are still seen by the pipeline.
+        """
+        exported = 0
+        last_id = 0
+        with gzip.open(path, "at", encoding="utf-8") as out:
+            while True:
+                with Session(engine) as session:
+                    statement = (
+                        select(RawRecallArchive)
+                        .where(RawRecallArchive.id > last_id)
+                        .where(RawRecallArchive.exported_at.is_(None))
+                    )
+                    if archived_before is not None:
+                        statement = statement.where(RawRecallArchive.archived_at < archived_before)
+                    rows = session.exec(statement.order_by(RawRecallArchive.id).limit(self.batch_size)).all()
+                    if not rows:
+                        break
+                    last_id = rows[-1].id
+                    for row in rows:
+                        record = {
+                            name: getattr(row, name) for name in _COLUMNS + ["archived_at"]
+                            if name not in _PAYLOAD_COLUMNS
+                        }
+                        record["payload"] = json.loads(row.payload_json())
+                        out.write(json.dumps(record, default=str) + "\n")
+                    # Written before stripped: a crash can duplicate a line, never lose one
+                    out.flush()
+                    session.exec(
+                        update(RawRecallArchive)
+                        .where(RawRecallArchive.id.in_([row.id for row in rows]))
+                        .values(raw_payload="", payload_blob=None, payload_codec=None, exported_at=datetime.utcnow())
+                    )
+                    session.commit()
+                    exported += len(rows)
+        logger.info(f"📦 Exported {exported} archived raw rows to {path}")
+        return exported
+
+    def restore(self, ids: Optional[List[int]] = None) -> int:
+        """
+        Moves archived rows back to RawRecall as unprocessed, so current rules
+        see them again. Exported rows have no payload left and stay put.
+        """
+        restored = 0
+        last_id = 0
+        while True:
+            with Session(engine) as session:
+                statement = (
+                    select(RawRecallArchive)
+                    .where(RawRecallArchive.id > last_id)
+                    .where(RawRecallArchive.exported_at.is_(None))
+                )
+                if ids:
+                    statement = statement.where(RawRecallArchive.id.in_(ids))
+                rows = session.exec(statement.order_by(RawRecallArchive.id).limit(self.batch_size)).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                insert_ignore(session, RawRecall, [
+                    dict(_row(row), processed_at=None, outcome=None, rule_version=None) for row in rows
+                ], ["id"])
+                session.exec(delete(RawRecallArchive).where(RawRecallArchive.id.in_([row.id for row in rows])))
+                session.commit()
+                restored += len(rows)
+        logger.info(f"♻️ Restored {restored} archived raw rows for reprocessing")
+        return restored
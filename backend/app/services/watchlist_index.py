@@ -0,0 +1,234 @@
+import logging
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, update
+from sqlmodel import Session, select
+from app.core.constants import Region
+from app.core.database import insert_ignore
+from app.models.ingestion import IndexVersion
+from app.models.recall import Recall
+from app.models.user import Watchlist, WatchlistChange
+from app.nlp.matcher import GrowingSubstringMatcher
+from app.rules.engine import rule_engine
+
+logger = logging.getLogger(__name__)
+
+# IndexVersion row bumped by every watchlist change
+WATCHLIST_VERSION = "watchlist"
+
+# WatchlistChange rows kept; an index further behind than this reloads in full
+CHANGE_LOG_SIZE = 10000
+
+# (watchlist id, user id, watched value as entered)
+Hit = Tuple[int, int, str]
+
+# Watch values (lowercased) accepted for each recall region
+REGION_ALIASES = {
+    Region.US: ("us", "usa", "u.s.", "united states"),
+    Region.IN: ("in", "india"),
+    Region.GLOBAL: ("global", "worldwide"),
+}
+
+# Words of a brand, for BRAND watches
+_TOKEN = re.compile(r"\w+")
+
+def brand_tokens(text: str) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+def brand_key(value: str) -> str:
+    """A BRAND watch value as matched: its lowercased words, single-spaced."""
+    return " ".join(brand_tokens(value))
+
+def brand_matches(value: str, brand: Optional[str]) -> bool:
+    """Whether a BRAND watch value is a run of whole words in `brand`."""
+    key, tokens = brand_key(value), brand_tokens(brand)
+    width = len(key.split())
+    return bool(key) and any(" ".join(tokens[i:i + width]) == key for i in range(len(tokens) - width + 1))
+
+def bump_version(session: Session, name: str = WATCHLIST_VERSION) -> int:
+    """Increments a version stamp inside the caller's transaction; returns the new version."""
+    insert_ignore(session, IndexVersion, [{"name": name, "version": 0}], ["name"])
+    session.execute(
+        update(IndexVersion)
+        .where(IndexVersion.name == name)
+        .values(version=IndexVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    return session.exec(select(IndexVersion.version).where(IndexVersion.name == name)).one()
+
+def current_version(session: Session, name: str = WATCHLIST_VERSION) -> int:
+    return session.exec(select(IndexVersion.version).where(IndexVersion.name == name)).first() or 0
+
+def record_change(session: Session, watchlist: Watchlist, removed: bool = False) -> int:
+    """Stamps a watchlist create/delete and logs it, in the caller's transaction; returns the new version."""
+    version = bump_version(session)
+    session.add(WatchlistChange(
+        version=version,
+        watchlist_id=watchlist.id,
+        user_id=watchlist.user_id,
+        type=watchlist.type,
+        value=watchlist.value,
+        removed=removed,
+    ))
+    session.exec(delete(WatchlistChange).where(WatchlistChange.version <= version - CHANGE_LOG_SIZE))
+    return version
+
+class WatchlistIndex:
+    """
+    In-memory index of the watchlists, so matching a recall costs time
+    proportional to its brand/title, not to the number of watchlists:
+
+    - BRAND: value -> watchlists hash map, probed with the token n-grams of
+      the recall's brand (up to the longest watched value), so a value
+      matches a run of whole words of the brand ("acme" matches "Acme
+      Foods", not "Acmeco")
+    - PRODUCT: a GrowingSubstringMatcher (Aho-Corasick) over every distinct
+      value, scanning the title once; values are added and removed in place
+      instead of recompiling the matcher
+    - REGION / CATEGORY: value -> watchlists hash maps, probed with the
+      recall's region / category and their aliases; a broad subscription is
+      one bucket, so its fan-out costs nothing beyond the hits themselves
+
+    The index tracks the IndexVersion stamp of the watchlist table. Changes
+    made in this process are applied as they commit; changes made by another
+    process are read back from the WatchlistChange log on the next match. It
+    only reloads in full when the log no longer covers the gap.
+    """
+
+    def __init__(self):
+        self.brands: Dict[str, Dict[int, Hit]] = {}
+        self.products: Dict[str, Dict[int, Hit]] = {}
+        self.regions: Dict[str, Dict[int, Hit]] = {}
+        self.categories: Dict[str, Dict[int, Hit]] = {}
+        self.version: Optional[int] = None
+        self._product_matcher = GrowingSubstringMatcher()
+        # Most words in a watched brand: the longest n-gram worth probing
+        self._brand_width = 0
+        self._lock = threading.Lock()
+
+    def _table(self, kind: str) -> Optional[Dict[str, Dict[int, Hit]]]:
+        return {
+            "BRAND": self.brands,
+            "PRODUCT": self.products,
+            "REGION": self.regions,
+            "CATEGORY": self.categories,
+        }.get(kind)
+
+    @staticmethod
+    def _key(kind: str, value: str) -> str:
+        return brand_key(value) if kind == "BRAND" else (value or "").strip().lower()
+
+    def _add(self, watchlist_id: int, user_id: int, kind: str, value: str):
+        table = self._table(kind)
+        key = self._key(kind, value)
+        if table is None or not key:
+            return
+        if key not in table:
+            table[key] = {}
+            if table is self.products:
+                self._product_matcher.add(key)
+            elif table is self.brands:
+                self._brand_width = max(self._brand_width, len(key.split()))
+        table[key][watchlist_id] = (watchlist_id, user_id, value)
+
+    def _remove(self, watchlist_id: int, kind: str, value: str):
+        table = self._table(kind)
+        key = self._key(kind, value)
+        if table is None or key not in table:
+            return
+        table[key].pop(watchlist_id, None)
+        if not table[key]:
+            del table[key]
+            if table is self.products:
+                self._product_matcher.discard(key)
+
+    def reload(self, session: Session):
+        version = current_version(session)
+        self.brands, self.products, self.regions, self.categories = {}, {}, {}, {}
+        self._brand_width = 0
+        self._product_matcher = GrowingSubstringMatcher()
+        rows = session.exec(select(Watchlist.id, Watchlist.user_id, Watchlist.type, Watchlist.value)).all()
+        for watchlist_id, user_id, kind, value in rows:
+            self._add(watchlist_id, user_id, kind, value)
+        # One automaton over every value, not the levels left by adding them one by one
+        self._product_matcher = GrowingSubstringMatcher(self.products)
+        self.version = version
+        logger.info(
+            f"Built watchlist index v{version}: {len(self.brands)} brands, {len(self.products)} products, "
+            f"{len(self.regions)} regions, {len(self.categories)} categories"
+        )
+
+    def sync(self, session: Session):
+        """Catches up with changes other processes made since the index was built."""
+        version = current_version(session)
+        if version != self.version:
+            with self._lock:
+                if version != self.version and not self._catch_up(session, version):
+                    self.reload(session)
+
+    def _catch_up(self, session: Session, version: int) -> bool:
+        """Applies the logged changes up to `version`; False if the log does not hold all of them."""
+        if self.version is None or version < self.version:
+            return False
+        changes = session.exec(
+            select(WatchlistChange)
+            .where(WatchlistChange.version > self.version, WatchlistChange.version <= version)
+            .order_by(WatchlistChange.version)
+        ).all()
+        if [change.version for change in changes] != list(range(self.version + 1, version + 1)):
+            return False
+        for change in changes:
+            if change.removed:
+                self._remove(change.watchlist_id, change.type, change.value)
+            else:
+                self._add(change.watchlist_id, change.user_id, change.type, change.value)
+        self.version = version
+        logger.info(f"Applied {len(changes)} watchlist changes to the index (v{version})")
+        return True
+
+    def apply(self, watchlist: Watchlist, version: int, removed: bool = False):
+        """
+        Applies one committed create/delete (stamped `version`) in place.
+        If the index missed an earlier change it is left to reload instead.
+        """
+        with self._lock:
+            if self.version is None or version != self.version + 1:
+                return
+            if removed:
+                self._remove(watchlist.id, watchlist.type, watchlist.value)
+            else:
+                self._add(watchlist.id, watchlist.user_id, watchlist.type, watchlist.value)
+            self.version = version
+
+    def match(self, session: Session, recall: Recall) -> List[Hit]:
+        """Watchlists matching the recall, in watchlist id order."""
+        self.sync(session)
+        hits: Dict[int, Hit] = {}
+
+        if recall.brand and self.brands:
+            tokens = brand_tokens(recall.brand)
+            for i in range(len(tokens)):
+                for j in range(i + 1, min(len(tokens), i + self._brand_width) + 1):
+                    found = self.brands.get(" ".join(tokens[i:j]))
+                    if found:
+                        hits.update(found)
+
+        if recall.title and self.products:
+            for value in self._product_matcher.find(recall.title.lower()):
+                hits.update(self.products.get(value, {}))
+
+        if recall.region and recall.region != Region.UNKNOWN and self.regions:
+            region = Region(recall.region)
+            for key in (region.value.lower(),) + REGION_ALIASES.get(region, ()):
+                hits.update(self.regions.get(key, {}))
+
+        if recall.category and self.categories:
+            aliases = rule_engine.current().category_aliases.get(recall.category, (recall.category.lower(),))
+            for key in aliases:
+                hits.update(self.categories.get(key, {}))
+
+        return [hits[watchlist_id] for watchlist_id in sorted(hits)]
+
+# Singleton Instance
+watchlist_index = WatchlistIndex()
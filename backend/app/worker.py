@@ -0,0 +1,225 @@
+"""
+Ingestion worker: fetches, persists, classifies and matches recalls in its
+own process, so the API's event loop only ever serves requests.
+
+    python -m app.worker             # poll every source on its adaptive schedule
+    python -m app.worker --once      # run one full ingestion cycle, then exit
+    python -m app.worker --process   # process pending raw rows, then exit
+
+Single-box installs can let the API start it instead (EMBEDDED_WORKER=true):
+it still runs as a child process, never on the API's event loop.
+
+Any number of workers may run (replicas, one per uvicorn worker): they
+elect one leader through a lease row in the database, and only the leader
+polls. Every worker delivers queued notifications from the outbox.
+"""
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import signal
+import sys
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds an embedded worker gets to finish its current poll on shutdown
+EMBEDDED_STOP_TIMEOUT = 15
+
+# Lease that makes one worker in the cluster the ingestion leader
+INGESTION_LEASE = "ingestion"
+
+# Seconds between raw retention passes run by the leader
+RETENTION_INTERVAL = 24 * 3600
+
+# Seconds between due-digest flushes run by the leader
+DIGEST_INTERVAL = 20
+
+# Seconds between checks of the lease keeper (start/stop the poller)
+LEADER_CHECK_INTERVAL = 1
+
+async def _while_leader(keeper, stop: asyncio.Event, interval: float, job, name: str):
+    """Runs `job` every `interval` seconds, whenever this worker holds the ingestion lease."""
+    loop = asyncio.get_running_loop()
+    due = loop.time()
+    while not stop.is_set():
+        if keeper.held() and loop.time() >= due:
+            due = loop.time() + interval
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"{name} failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), min(interval, LEADER_CHECK_INTERVAL))
+        except asyncio.TimeoutError:
+            pass
+
+async def run_poller():
+    """
+    Polls while this worker holds the ingestion lease; replicas without it
+    stand by and take over once the leader's lease lapses.
+
+    The lease is renewed by a LeaseKeeper thread every quarter TTL, whatever
+    the event loop is doing. The poller checks it before every fetch and
+    every processing chunk, and stops trusting a renewal three quarters of a
+    TTL after it was sent, before the row can expire. So a new leader can
+    only overlap with a fetch in flight (raw inserts are idempotent) or with
+    a chunk that started earlier and runs longer than a quarter TTL.
+
+    The leader also queues due alert digests and runs the daily raw
+    retention pass, each in its own task; every worker drains the
+    notification outbox in the background.
+    """
+    from app.core.config import settings
+    from app.services.lease import LeaseKeeper
+    from app.services.poller import AdaptivePoller
+    from app.services.retention import RawRetention
+    from app.services.alerts import alert_digester
+    from app.services.outbox import notification_outbox
+    from app.ingestors.http import close_http_client
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
+
+    keeper = LeaseKeeper(INGESTION_LEASE).start()
+    poller: Optional[AdaptivePoller] = None
+    background = [asyncio.create_task(notification_outbox.run(stop))]
+    # Digests whose window closed since the last batch
+    background.append(asyncio.create_task(
+        _while_leader(keeper, stop, DIGEST_INTERVAL, alert_digester.flush, "Alert digest flush")
+    ))
+    if settings.RAW_RETENTION_DAYS:
+        background.append(asyncio.create_task(_while_leader(
+            keeper, stop, RETENTION_INTERVAL, lambda: asyncio.to_thread(RawRetention().archive), "Raw retention"
+        )))
+    try:
+        while not stop.is_set():
+            leader = keeper.held()
+            if leader and poller is None:
+                logger.info(f"👑 {keeper.holder} is the ingestion leader")
+                poller = AdaptivePoller(lease=keeper)
+                poller.start()
+            elif not leader and poller is not None:
+                logger.warning(f"Lost the ingestion lease, {keeper.holder} stops polling")
+                await poller.stop()
+                poller = None
+            elif not leader:
+                logger.debug("Standing by: another worker holds the ingestion lease")
+
+            try:
+                await asyncio.wait_for(stop.wait(), LEADER_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        logger.info("🛑 Worker stopping...")
+        # The outbox finishes the batches it has claimed, then stops
+        stop.set()
+        await asyncio.gather(*background)
+        if poller is not None:
+            await poller.stop()
+        await asyncio.to_thread(keeper.stop)
+        await close_http_client()
+
+async def run_leased(job, force: bool = False):
+    """
+    Runs a one-shot job unless a polling leader is active (or with force).
+    The job is called with lease=<LeaseKeeper> (None with force): the lease
+    is renewed from a thread for as long as the job runs, and the job
+    checks it before writing.
+    """
+    from app.services.lease import LeaseKeeper, LeaseLost
+
+    if force:
+        return await job(lease=None)
+    keeper = LeaseKeeper(INGESTION_LEASE).start()
+    try:
+        if not await asyncio.to_thread(keeper.wait_first_attempt):
+            holder = await asyncio.to_thread(keeper.manager.holder_of, INGESTION_LEASE)
+            logger.warning(f"Skipped: the ingestion lease is held by {holder} (use --force to run anyway)")
+            return
+        return await job(lease=keeper)
+    except LeaseLost as e:
+        logger.error(f"Stopped before finishing: {e}")
+    finally:
+        await asyncio.to_thread(keeper.stop)
+
+async def run_once(lease=None):
+    from app.services.scheduler_service import run_ingestion_cycle
+    from app.services.alerts import alert_digester
+    from app.services.outbox import notification_outbox
+    from app.ingestors.http import close_http_client
+
+    try:
+        await run_ingestion_cycle(lease=lease)
+        await alert_digester.flush()
+        await notification_outbox.drain()
+    finally:
+        await close_http_client()
+
+async def run_processing(workers: Optional[int] = None, lease=None):
+    from app.services.processor import RecallProcessor, shutdown_process_pool
+
+    try:
+        created = await RecallProcessor(workers=workers, lease=lease).process_pending()
+    finally:
+        shutdown_process_pool()
+    logger.info(f"✅ Processed pending raw rows: {created} new canonical recalls.")
+
+async def spawn_embedded() -> asyncio.subprocess.Process:
+    """Starts the worker as a child of the API process (EMBEDDED_WORKER)."""
+    proc = await asyncio.create_subprocess_exec(sys.executable, "-m", "app.worker", cwd=BACKEND_DIR)
+    logger.info(f"🧵 Embedded ingestion worker started (pid {proc.pid})")
+    return proc
+
+async def stop_embedded(proc: Optional[asyncio.subprocess.Process]):
+    if proc is None or proc.returncode is not None:
+        return
+    proc.terminate()
+    try:
+        await asyncio.wait_for(proc.wait(), EMBEDDED_STOP_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Embedded worker {proc.pid} did not stop in {EMBEDDED_STOP_TIMEOUT}s, killing it")
+        proc.kill()
+        await proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="RedAlert ingestion worker.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="Run one ingestion cycle over every source and exit")
+    mode.add_argument("--process", action="store_true", help="Process pending raw rows and exit")
+    parser.add_argument("--workers", type=int, default=None, help="Analysis processes for --process (default: PROCESS_POOL_WORKERS)")
+    parser.add_argument("--force", action="store_true", help="Run --once/--process even while another worker holds the ingestion lease")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from app.core.database import init_db
+    # Import to register with SQLModel metadata used in init_db
+    from app.models.recall import Recall, RecallSource, RawRecall  # noqa: F401
+    from app.models.user import User, Watchlist, WatchlistChange  # noqa: F401
+    from app.models.analysis import NLPAnalysisCache  # noqa: F401
+    from app.models.ingestion import HTTPValidator, SourceState, JobLease, IndexVersion  # noqa: F401
+    from app.models.alert import PendingAlert, NotificationJob  # noqa: F401
+    init_db()
+
+    if args.once:
+        asyncio.run(run_leased(run_once, force=args.force))
+    elif args.process:
+        asyncio.run(run_leased(functools.partial(run_processing, args.workers), force=args.force))
+    else:
+        logger.info("🕒 Worker started: each source is polled on its own adaptive interval.")
+        try:
+            asyncio.run(run_poller())
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from alembic import context
+from sqlmodel import SQLModel
+from app.core.database import engine
+# Import to register with SQLModel metadata (used by --autogenerate)
+from app.models.recall import Recall, RecallSource, RawRecall  # noqa: F401
+from app.models.user import User, Watchlist, WatchlistChange  # noqa: F401
+from app.models.analysis import NLPAnalysisCache  # noqa: F401
+from app.models.ingestion import HTTPValidator, SourceState, JobLease, IndexVersion  # noqa: F401
+from app.models.alert import PendingAlert, NotificationJob  # noqa: F401
+
+target_metadata = SQLModel.metadata
+
+def run_migrations_online():
+    # Same engine (and DATABASE_URL normalization) as the app
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+# Revisions inspect the live schema, so there is no offline (--sql) mode
+run_migrations_online()
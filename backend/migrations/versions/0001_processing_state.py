@@ -0,0 +1,67 @@
+"""RawRecall processing state and the other columns added to existing tables
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Tables that did not exist yet are made by create_all() before migrations
+run. Databases from before this revision got some or all of these columns
+from create_all() (new installs) or the former ensure_schema(), so each
+step is skipped when its column or index is already there.
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    # Processing state
+    ("rawrecall", sa.Column("processed_at", sa.DateTime(), nullable=True)),
+    ("rawrecall", sa.Column("outcome", sqlmodel.AutoString(), nullable=True)),
+    ("rawrecall", sa.Column("rule_version", sqlmodel.AutoString(), nullable=True)),
+    ("recall", sa.Column("rule_version", sqlmodel.AutoString(), nullable=True)),
+    # Cross-source identity and compressed payloads
+    ("rawrecall", sa.Column("identity_key", sqlmodel.AutoString(), nullable=True)),
+    ("rawrecall", sa.Column("payload_blob", sa.LargeBinary(), nullable=True)),
+    ("rawrecall", sa.Column("payload_codec", sqlmodel.AutoString(), nullable=True)),
+    # Raw row a source came from (keeps recall ids across rebuilds)
+    ("recallsource", sa.Column("raw_id", sa.Integer(), nullable=True)),
+]
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_rawrecall_processed_at", "rawrecall", ["processed_at"], False),
+    ("ix_rawrecall_identity_key", "rawrecall", ["identity_key"], True),
+    ("ix_recall_rule_version", "recall", ["rule_version"], False),
+    ("ix_recallsource_raw_id", "recallsource", ["raw_id"], False),
+]
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, column in COLUMNS:
+        if column.name in {col["name"] for col in inspector.get_columns(table)}:
+            continue
+        op.add_column(table, column)
+        if (table, column.name) == ("recallsource", "raw_id") and bind.dialect.name != "sqlite":
+            # SQLite cannot add a constraint to an existing table
+            op.create_foreign_key("fk_recallsource_raw_id_rawrecall", "recallsource", "rawrecall", ["raw_id"], ["id"])
+
+    for name, table, columns, unique in INDEXES:
+        # Matched on columns, not names: tables swapped in by a shadow
+        # rebuild carry suffixed index names
+        if tuple(columns) in {tuple(ix["column_names"]) for ix in inspector.get_indexes(table)}:
+            continue
+        op.create_index(name, table, columns, unique=unique)
+
+def downgrade():
+    for name, table, _, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    # Dropping raw_id drops its foreign key with it
+    for table, column in reversed(COLUMNS):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(column.name)
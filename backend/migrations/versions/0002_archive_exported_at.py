@@ -0,0 +1,26 @@
+"""RawRecallArchive.exported_at: exported rows stay as identity tombstones
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Export used to delete archived rows, so re-fetched items they covered were
+ingested again. Rows now stay behind without payload, marked exported.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # New installs got the column from create_all()
+    if "exported_at" not in {col["name"] for col in inspector.get_columns("rawrecallarchive")}:
+        op.add_column("rawrecallarchive", sa.Column("exported_at", sa.DateTime(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("rawrecallarchive") as batch:
+        batch.drop_column("exported_at")
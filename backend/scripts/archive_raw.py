@@ -0,0 +1,37 @@
+import sys
+import os
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.config import settings
+from app.core.database import init_db
+from app.models.recall import RawRecall, RawRecallArchive, RecallSource  # noqa: F401
+from app.services.retention import RawRetention
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raw payload retention: archive, export or restore dropped raw rows.")
+    parser.add_argument("--days", type=int, default=settings.RAW_RETENTION_DAYS, help="Archive dropped rows processed before this many days ago")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be archived")
+    parser.add_argument("--export", metavar="FILE.jsonl.gz", help="Move archived payloads into a gzipped JSONL file (identities stay archived)")
+    parser.add_argument("--export-older-than", type=int, default=0, metavar="DAYS", help="Only export rows archived at least this many days ago")
+    parser.add_argument("--restore", action="store_true", help="Move every archived row back for reprocessing")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    init_db()
+    retention = RawRetention(days=args.days, batch_size=args.batch_size)
+    if args.restore:
+        retention.restore()
+    elif args.export:
+        before = datetime.utcnow() - timedelta(days=args.export_older_than) if args.export_older_than else None
+        retention.export(args.export, archived_before=before)
+    else:
+        moved = retention.archive(dry_run=args.dry_run)
+        logger.info(f"✅ {'Would archive' if args.dry_run else 'Archived'} {moved} raw rows.")
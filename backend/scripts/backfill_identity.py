@@ -0,0 +1,60 @@
+import sys
+import os
+import json
+import logging
+from sqlmodel import Session, select, update
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.database import engine, ensure_schema
+from app.core.payload import decode_payload
+from app.models.recall import RawRecall
+from app.ingestors.identity import identity_key
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+def backfill_identity():
+    """
+    Fills RawRecall.identity_key for rows ingested before it existed.
+    The oldest row of each identity gets the key; later re-ingested copies
+    keep NULL, since the unique index allows only one of them.
+    """
+    ensure_schema()
+    filled = skipped = 0
+    last_id = 0
+    with Session(engine) as session:
+        seen = set(session.exec(select(RawRecall.identity_key).where(RawRecall.identity_key.is_not(None))))
+        while True:
+            rows = session.exec(
+                select(RawRecall.id, RawRecall.raw_payload, RawRecall.payload_blob, RawRecall.payload_codec)
+                .where(RawRecall.identity_key.is_(None), RawRecall.id > last_id)
+                .order_by(RawRecall.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for raw_id, payload_str, blob, codec in rows:
+                try:
+                    payload = json.loads(decode_payload(payload_str, blob, codec))
+                except json.JSONDecodeError:
+                    skipped += 1
+                    continue
+                key = identity_key(payload.get("_source_origin") or "", payload)
+                if key in seen:
+                    skipped += 1
+                    continue
+                seen.add(key)
+                session.exec(update(RawRecall).where(RawRecall.id == raw_id).values(identity_key=key))
+                filled += 1
+            session.commit()
+
+    logger.info(f"✅ Backfilled {filled} identity keys ({skipped} duplicate or unreadable rows left without one).")
+
+if __name__ == "__main__":
+    backfill_identity()
@@ -7,6 +7,7 @@ sys.path.append(os.path.join(os.getcwd(), 'backend'))
 
 from app.core.database import engine
 from app.models.recall import Recall
+from app.rules.engine import rule_engine
 
 # Configure Logger
 logging.basicConfig(level=logging.INFO)
@@ -15,11 +16,8 @@ logger = logging.getLogger(__name__)
 def cleanup_noise():
     print("🧹 Cleaning up noisy records...")
     
-    noise_keywords = [
-        "funding alert", "raised", "series a", "series b", "series c", "bags $", "mn round", # Finance
-        "reviewed", "review:", "tested and reviewed", "best medical alert", "top 10", "buying guide", # Reviews
-        "how it works", "how to", "feature update", "eligible for this", "watch face", "ios", "android" # Tech
-    ]
+    # Same noise rules the processor applies (app/rules)
+    rules = rule_engine.current()
     
     deleted_count = 0
     
@@ -28,9 +26,9 @@ def cleanup_noise():
         recalls = session.exec(select(Recall)).all()
         
         for r in recalls:
-            title_lower = r.title.lower()
-            if any(nk in title_lower for nk in noise_keywords):
-                print(f"❌ Deleting: {r.title}")
+            noise = rules.noise_rule(rules.scan(r.title.lower()))
+            if noise:
+                print(f"❌ Deleting ({noise}): {r.title}")
                 session.delete(r)
                 deleted_count += 1
         
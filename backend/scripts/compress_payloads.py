@@ -0,0 +1,73 @@
+import sys
+import os
+import argparse
+import logging
+from sqlalchemy import bindparam, or_, update
+from sqlmodel import Session, select
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.database import engine, ensure_schema
+from app.core.payload import available_codec, decode_payload, encode_payload
+from app.models.recall import RawRecall
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def compress_payloads(codec: str = None, batch_size: int = 1000, recompress: bool = False):
+    """
+    Moves existing RawRecall payloads into compressed payload_blob storage.
+    Rows already compressed are left alone unless --recompress is given and
+    they use another codec (e.g. zlib -> zstd). Safe to interrupt and rerun.
+    """
+    ensure_schema()
+    codec = available_codec(codec)
+    raw = RawRecall.__table__
+    store = (
+        update(raw)
+        .where(raw.c.id == bindparam("raw_id"))
+        .values(raw_payload=bindparam("text"), payload_blob=bindparam("blob"), payload_codec=bindparam("codec"))
+    )
+    converted = before = after = 0
+    last_id = 0
+    while True:
+        with Session(engine) as session:
+            condition = RawRecall.payload_codec == None  # noqa: E711
+            if recompress:
+                condition = or_(condition, RawRecall.payload_codec != codec)
+            rows = session.exec(
+                select(RawRecall.id, RawRecall.raw_payload, RawRecall.payload_blob, RawRecall.payload_codec)
+                .where(RawRecall.id > last_id)
+                .where(condition)
+                .order_by(RawRecall.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            params = []
+            for raw_id, text, blob, old_codec in rows:
+                text = decode_payload(text, blob, old_codec)
+                values = encode_payload(text, codec)
+                before += len(blob) if blob is not None else len(text.encode("utf-8"))
+                after += len(values["payload_blob"]) if values["payload_blob"] is not None else len(values["raw_payload"].encode("utf-8"))
+                params.append({"raw_id": raw_id, "text": values["raw_payload"], "blob": values["payload_blob"], "codec": values["payload_codec"]})
+            session.execute(store, params)
+            session.commit()
+            converted += len(rows)
+            logger.info(f"Compressed up to RawRecall {last_id}")
+
+    ratio = f" ({before / 1024:.0f} KiB -> {after / 1024:.0f} KiB)" if converted else ""
+    logger.info(f"✅ Stored {converted} payloads with {codec}{ratio}.")
+    if converted:
+        logger.info("Run VACUUM (SQLite) or VACUUM FULL rawrecall (Postgres) to return the freed space to the OS.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress existing RawRecall payloads.")
+    parser.add_argument("--codec", choices=["zlib", "zstd", "none"], default=None, help="Default: RAW_PAYLOAD_CODEC")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--recompress", action="store_true", help="Also convert rows stored with another codec")
+    args = parser.parse_args()
+    compress_payloads(codec=args.codec, batch_size=args.batch_size, recompress=args.recompress)
@@ -1,43 +1,42 @@
 import sys
 import os
+import argparse
 import logging
 import asyncio
-from sqlmodel import Session, delete
+import functools
+from typing import Optional
 
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from app.core.database import engine
-from app.models.recall import Recall, RecallSource, RawRecall
 from app.services.scheduler_service import run_ingestion_cycle
+from app.worker import run_leased
+from scripts.rebuild_data import rebuild_shadow
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def hard_reset():
-    logger.info("🧨 WARNING: Performing a HARD RESET of the database...")
-    with Session(engine) as session:
-        # Delete sources first (foreign key)
-        logger.info("Wiping RecallSource...")
-        session.exec(delete(RecallSource))
-        
-        # Delete canonical recalls
-        logger.info("Wiping Recall...")
-        session.exec(delete(Recall))
-        
-        # Delete raw payloads
-        logger.info("Wiping RawRecall...")
-        session.exec(delete(RawRecall))
-        
-        session.commit()
-        logger.info("✅ All existing data (Raw and Canonical) has been WIPED.")
-        
+async def hard_reset(workers: Optional[int] = None, lease=None):
+    """
+    Fresh ingestion cycle, then every canonical recall rebuilt from scratch.
+    The rebuild goes through shadow tables swapped in atomically, so the API
+    keeps serving the current recalls until the new ones are complete.
+    Raw rows are kept: they are what the rebuild starts from, and their
+    identity keys stop re-fetched items from being stored twice.
+    """
     logger.info("⚙️ Starting fresh ingestion cycle...")
     try:
-        await run_ingestion_cycle()
-        logger.info("✅ Hard reset and fresh ingestion complete!")
+        await run_ingestion_cycle(lease=lease)
     except Exception as e:
-        logger.error(f"❌ Error during fresh ingestion: {e}")
+        logger.error(f"❌ Error during fresh ingestion (rebuilding from the stored rows anyway): {e}")
+
+    logger.info("🧨 Rebuilding every recall from the raw rows...")
+    await rebuild_shadow(workers=workers, lease=lease)
+    logger.info("✅ Hard reset and fresh ingestion complete!")
 
 if __name__ == "__main__":
-    asyncio.run(hard_reset())
+    parser = argparse.ArgumentParser(description="Fresh ingestion, then rebuild every canonical recall behind the live tables.")
+    parser.add_argument("--workers", type=int, default=None, help="Analysis processes (default: PROCESS_POOL_WORKERS; 1 = serial)")
+    parser.add_argument("--force", action="store_true", help="Run even while a worker holds the ingestion lease")
+    args = parser.parse_args()
+    asyncio.run(run_leased(functools.partial(hard_reset, args.workers), force=args.force))
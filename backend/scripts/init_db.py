@@ -1,13 +1,15 @@
-from sqlmodel import SQLModel
-from app.core.database import engine
+from app.core.database import init_db
 # Import all models to ensure metadata is registered
 from app.models.recall import Recall, RecallSource, RawRecall
-from app.models.user import User, Watchlist
+from app.models.user import User, Watchlist, WatchlistChange
+from app.models.analysis import NLPAnalysisCache
+from app.models.ingestion import HTTPValidator, SourceState, JobLease, IndexVersion
+from app.models.alert import PendingAlert, NotificationJob
 
 def main():
-    print("Creating tables in database...")
-    SQLModel.metadata.create_all(engine)
-    print("Tables created successfully!")
+    print("Creating tables and applying migrations...")
+    init_db()
+    print("Database schema is up to date!")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,38 @@
+import sys
+import os
+import argparse
+import logging
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from collections import Counter
+from sqlmodel import Session, select
+from app.core.constants import NotificationStatus
+from app.core.database import engine, init_db
+from app.models.user import User  # noqa: F401
+from app.models.alert import NotificationJob
+from app.services.outbox import notification_outbox
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notification outbox: show its state, requeue dead-lettered jobs.")
+    parser.add_argument("--dead", action="store_true", help="List dead-lettered jobs with their last error")
+    parser.add_argument("--requeue", action="store_true", help="Retry dead-lettered jobs (all, or those given with --id)")
+    parser.add_argument("--id", type=int, action="append", dest="ids", help="Job id (repeatable)")
+    args = parser.parse_args()
+
+    init_db()
+    if args.requeue:
+        notification_outbox.requeue_dead(args.ids)
+    with Session(engine) as session:
+        counts = Counter(session.exec(select(NotificationJob.status, NotificationJob.channel)).all())
+        for (status, channel), count in sorted(counts.items()):
+            logger.info(f"{channel:8} {status:8} {count}")
+        if args.dead:
+            for job in session.exec(
+                select(NotificationJob).where(NotificationJob.status == NotificationStatus.DEAD.value).order_by(NotificationJob.id)
+            ):
+                logger.info(f"#{job.id} {job.channel} user {job.user_id}, {job.attempts} attempts: {job.last_error}")
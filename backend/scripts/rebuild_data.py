@@ -1,39 +1,48 @@
 import sys
 import os
+import argparse
 import logging
 import asyncio
-from sqlmodel import Session, select, delete
+import functools
+from typing import Optional
+from sqlmodel import Session
 
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from app.core.database import engine
-from app.models.recall import Recall, RecallSource, RawRecall
-from app.services.processor import RecallProcessor
+from app.core.database import engine, ensure_schema
+from app.services.rebuild import ShadowRebuild
+from app.nlp.cache import analysis_cache
+from app.worker import run_leased
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def rebuild_data():
-    logger.info("🧹 Step 1: Clearing all existing canonical recalls...")
-    with Session(engine) as session:
-        # Delete sources first (foreign key)
-        session.exec(delete(RecallSource))
-        # Delete recalls
-        session.exec(delete(Recall))
-        session.commit()
-        logger.info("✅ Cleared canonical recalls.")
-        
-        # Check raw recalls count
-        raw_count = session.exec(select(RawRecall)).all()
-        logger.info(f"📦 Found {len(raw_count)} Raw Recalls ready for processing.")
+async def rebuild_shadow(batch_size: int = 500, keep_old: bool = False, workers: Optional[int] = None, lease=None):
+    """
+    Builds fresh recall tables next to the live ones and swaps them in
+    atomically: the API keeps serving the old data until the swap, a failed
+    rebuild leaves it untouched, and rebuilt recalls keep their ids.
+    """
+    ensure_schema()
+    result = await ShadowRebuild(batch_size=batch_size, keep_old=keep_old, workers=workers, lease=lease).run()
+    logger.info(f"✅ Rebuild complete! Swapped in {result['created']} clean canonical recalls from {result['raw_rows']} raw rows.")
+    _report_cache()
+
+def _report_cache():
+    logger.info(f"🧠 NLP cache: {analysis_cache.hits} hits, {analysis_cache.misses} misses.")
 
-    logger.info("⚙️ Step 2: Reprocessing all Raw Recalls with updated NLP logic...")
-    processor = RecallProcessor()
-    # Process up to 5000 to ensure everything existing is handled
-    processed_count = await processor.process_raw_recalls(limit=5000)
-    
-    logger.info(f"✅ Rebuild complete! Generated {processed_count} new clean canonical recalls.")
+    with Session(engine) as session:
+        purged = analysis_cache.purge_stale(session)
+        if purged:
+            logger.info(f"🧹 Purged {purged} NLP cache entries from older keyword versions.")
 
 if __name__ == "__main__":
-    asyncio.run(rebuild_data())
+    parser = argparse.ArgumentParser(description="Rebuild canonical recalls from every raw row.")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the replaced tables as recall_old_<stamp> / recallsource_old_<stamp>")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None, help="Analysis processes (default: PROCESS_POOL_WORKERS; 1 = serial)")
+    parser.add_argument("--force", action="store_true", help="Run even while a worker holds the ingestion lease")
+    args = parser.parse_args()
+    job = functools.partial(rebuild_shadow, args.batch_size, args.keep_old, args.workers)
+    asyncio.run(run_leased(job, force=args.force))
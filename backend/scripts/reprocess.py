@@ -0,0 +1,250 @@
+import sys
+import os
+import argparse
+import json
+import logging
+import asyncio
+import functools
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import or_
+from sqlmodel import Session, select, delete, func
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.core.database import engine, ensure_schema
+from app.core.constants import ProcessOutcome
+from app.models.recall import Recall, RecallSource, RawRecall
+from app.nlp.cache import analysis_cache
+from app.rules.engine import rule_engine
+from app.services.dedup import TITLE_VERSION
+from app.services.processor import RecallProcessor, prepare_payload, classify, rule_version
+from app.services.watchlist_index import bump_version
+from app.worker import run_leased
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Outcomes that left the row attached to a canonical Recall
+KEPT = {ProcessOutcome.CREATED.value, ProcessOutcome.MERGED.value, ProcessOutcome.DUPLICATE.value}
+
+async def reprocess(batch_size: int = 500, dry_run: bool = False, lease=None) -> Counter:
+    """
+    Brings processed rows up to the current rule version without a rebuild.
+    Every row stamped with an older version is reclassified (noise, India
+    filter, region, signal, confidence): the version is a digest of the whole
+    rule set, so there is no telling which rows an edit affects, and a rule
+    change means one pass over all processed rows. NLP results come from the
+    analysis cache, so the pass costs the rules, not the analysis. Only the
+    differences are applied, in place and batch by batch, while the API keeps
+    serving:
+
+    - dropped before, accepted now -> reset to pending and processed normally
+    - accepted before, dropped now -> its source is detached (and the Recall
+      deleted once it has no sources left)
+    - created a Recall whose classification (incl. category) changed -> the
+      Recall is updated; if its region moved, the rows merged into it are
+      detached and deduplicated again, since dedup is per region
+    - merged into a Recall of another region than its own now -> detached
+      and deduplicated again
+    - anything else -> only the version stamp moves
+
+    Rows stay with the recall they were merged into otherwise, so which row
+    of a story created its Recall is not replayed: the result can differ
+    from a full rebuild (scripts/rebuild_data.py) where the rules change
+    which row of a story comes first.
+    """
+    ensure_schema()
+    rules = rule_engine.current()
+    version = rule_version(rules)
+    stats: Counter = Counter()
+    last_id = 0
+    logger.info(f"🔁 Reprocessing every processed row not yet at rule version {version}")
+
+    while True:
+        if lease is not None:
+            lease.check()
+        with Session(engine) as session:
+            raws = session.exec(
+                select(RawRecall)
+                .where(RawRecall.processed_at != None)  # noqa: E711
+                .where(or_(RawRecall.rule_version == None, RawRecall.rule_version != version))  # noqa: E711
+                .where(RawRecall.id > last_id)
+                .order_by(RawRecall.id)
+                .limit(batch_size)
+            ).all()
+            if not raws:
+                break
+            last_id = raws[-1].id
+
+            new_results = _reclassify(session, rules, raws)
+            sources = _sources_by_raw(session, rules, raws)
+            now = datetime.utcnow()
+            # Recalls of this batch whose region moved (titles never change here)
+            regions_moved = False
+            # Rows of this batch already sent back to pending with their recall
+            released = set()
+
+            for raw in raws:
+                if raw.id in released:
+                    continue
+                outcome, result = new_results[raw.id]
+                was_kept = raw.outcome in KEPT
+
+                if outcome is None and not was_kept:
+                    # Now accepted: dedup and write it like a fresh row
+                    raw.processed_at, raw.outcome, raw.rule_version = None, None, None
+                    stats["revived"] += 1
+                elif outcome is not None and was_kept:
+                    _detach(session, sources.get(raw.id, []))
+                    raw.outcome, raw.rule_version, raw.processed_at = outcome.value, version, now
+                    stats["dropped"] += 1
+                elif outcome is not None:
+                    if raw.outcome != outcome.value:
+                        stats["reclassified"] += 1
+                    raw.outcome, raw.rule_version = outcome.value, version
+                elif raw.outcome == ProcessOutcome.CREATED.value:
+                    recall = _recall_of(session, sources.get(raw.id, []))
+                    changed = _update_recall(session, recall, result, version)
+                    if changed:
+                        stats["updated"] += 1
+                    if "region" in changed:
+                        regions_moved = True
+                        members = _release_members(session, recall.id, raw.id)
+                        released.update(members)
+                        stats["remerged"] += len(members)
+                    raw.rule_version = version
+                else:
+                    recall = _recall_of(session, sources.get(raw.id, []))
+                    if recall is not None and recall.region != result["region"]:
+                        # Merged across what is now a region boundary
+                        _detach(session, sources[raw.id])
+                        raw.processed_at, raw.outcome, raw.rule_version = None, None, None
+                        stats["remerged"] += 1
+                    else:
+                        raw.rule_version = version
+                stats["checked"] += 1
+                session.add(raw)
+
+            if dry_run:
+                session.rollback()
+            else:
+                if regions_moved:
+                    # Dedup indexes are per region: every process rebuilds them
+                    bump_version(session, TITLE_VERSION)
+                session.commit()
+            logger.info(f"Checked up to RawRecall {last_id}: {dict(stats)}")
+
+    if not dry_run:
+        if stats["revived"] or stats["remerged"]:
+            stats["created"] = await RecallProcessor(lease=lease).process_pending()
+    return stats
+
+def _reclassify(session: Session, rules, raws: List[RawRecall]) -> Dict[int, tuple]:
+    """raw id -> (drop outcome or None when accepted, classify() result)."""
+    results: Dict[int, tuple] = {}
+    prepared = []
+    for raw in raws:
+        try:
+            item = prepare_payload(raw.payload_json(), rules)
+        except Exception:
+            results[raw.id] = (ProcessOutcome.ERROR, None)
+            continue
+        if item["noise"]:
+            results[raw.id] = (ProcessOutcome.NOISE, None)
+        else:
+            prepared.append((raw, item))
+
+    batch = analysis_cache.analyze_many(session, [item["full_text"] for _, item in prepared])
+    for i, (raw, item) in enumerate(prepared):
+        result = classify(rules, raw.source_type, item, batch.row(i))
+        results[raw.id] = (ProcessOutcome.FILTERED if result["filtered"] else None, result)
+    return results
+
+def _sources_by_raw(session: Session, rules, raws: List[RawRecall]) -> Dict[int, List[RecallSource]]:
+    by_raw: Dict[int, List[RecallSource]] = {}
+    for source in session.exec(select(RecallSource).where(RecallSource.raw_id.in_([r.id for r in raws]))):
+        by_raw.setdefault(source.raw_id, []).append(source)
+
+    # Rows processed before sources recorded their raw id: match on url + title,
+    # only where that is unambiguous (the same story re-fetched under one link
+    # leaves several candidates, and any of them may belong to another row)
+    for raw in raws:
+        if raw.id in by_raw or raw.outcome not in KEPT:
+            continue
+        try:
+            text = raw.payload_json()
+            payload = json.loads(text)
+            title = prepare_payload(text, rules)["title"]
+        except Exception:
+            continue
+        url = payload.get("link", payload.get("url", "#"))
+        candidates = session.exec(
+            select(RecallSource)
+            .where(RecallSource.raw_id == None, RecallSource.url == url, RecallSource.title == title)  # noqa: E711
+            .limit(2)
+        ).all()
+        if len(candidates) == 1:
+            legacy = candidates[0]
+            legacy.raw_id = raw.id
+            session.add(legacy)
+            by_raw[raw.id] = [legacy]
+    return by_raw
+
+def _detach(session: Session, sources: List[RecallSource]):
+    for source in sources:
+        recall_id = source.recall_id
+        session.delete(source)
+        session.flush()
+        remaining = session.exec(select(func.count(RecallSource.id)).where(RecallSource.recall_id == recall_id)).one()
+        if not remaining:
+            session.exec(delete(Recall).where(Recall.id == recall_id))
+
+def _recall_of(session: Session, sources: List[RecallSource]) -> Optional[Recall]:
+    return session.get(Recall, sources[0].recall_id) if sources else None
+
+def _update_recall(session: Session, recall: Optional[Recall], result: Dict, version: str) -> Dict:
+    """Applies a changed classification to the Recall this row created; returns the changed fields."""
+    if recall is None:
+        return {}
+    changes = {
+        "region": result["region"],
+        "signal_type": result["signal_type"],
+        "confidence_level": result["confidence"],
+        "category": result["category"],
+    }
+    changed = {k: v for k, v in changes.items() if getattr(recall, k) != v}
+    for key, value in changed.items():
+        setattr(recall, key, value)
+    recall.rule_version = version
+    if changed:
+        recall.updated_at = datetime.utcnow()
+    session.add(recall)
+    return changed
+
+def _release_members(session: Session, recall_id: int, creator_raw_id: int) -> List[int]:
+    """Detaches the rows merged into a Recall and sends them back to pending; returns their raw ids."""
+    members = session.exec(
+        select(RecallSource)
+        .where(RecallSource.recall_id == recall_id)
+        .where(RecallSource.raw_id != None, RecallSource.raw_id != creator_raw_id)  # noqa: E711
+    ).all()
+    for source in members:
+        raw = session.get(RawRecall, source.raw_id)
+        raw.processed_at, raw.outcome, raw.rule_version = None, None, None
+        session.add(raw)
+        session.delete(source)
+    return [source.raw_id for source in members]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reclassify rows processed under older rules and apply only the differences.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--force", action="store_true", help="Run even while a worker holds the ingestion lease")
+    args = parser.parse_args()
+    job = functools.partial(reprocess, args.batch_size, args.dry_run)
+    result = asyncio.run(run_leased(job, force=args.force))
+    if result is not None:
+        logger.info(f"✅ Reprocess complete: {dict(result)}")
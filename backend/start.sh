@@ -1,8 +1,9 @@
 #!/bin/bash
 set -e
 
-# 1. Initialize DB (Creates tables if missing)
+# 1. Initialize DB (creates missing tables, applies migrations)
 python scripts/init_db.py
 
-# 2. Start Server
+# 2. Start Server (single box: the API runs the ingestion worker as a child process)
+export EMBEDDED_WORKER="${EMBEDDED_WORKER:-true}"
 exec uvicorn app.main:app --host 0.0.0.0 --port $PORT
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite file before app.core.database creates its engine
+_db_dir = tempfile.mkdtemp(prefix="redalert-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+import pytest
+from sqlmodel import SQLModel
+from app.core.database import engine
+from app.services.recall_search import FTS_TABLE
+
+# Import to register with SQLModel metadata
+from app.models.recall import Recall, RecallSource, RawRecall  # noqa: F401
+from app.models.user import User, Watchlist, WatchlistChange  # noqa: F401
+from app.models.analysis import NLPAnalysisCache  # noqa: F401
+from app.models.ingestion import HTTPValidator, SourceState, JobLease, IndexVersion  # noqa: F401
+from app.models.alert import PendingAlert, NotificationJob  # noqa: F401
+
+@pytest.fixture
+def db():
+    """Fresh, empty tables for one test."""
+    SQLModel.metadata.drop_all(engine)
+    # Not in the metadata: a search index left by an earlier test would be stale
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    SQLModel.metadata.create_all(engine)
+    # New connections: SQLite PRAGMAs (used by the inspector) can read a pooled
+    # connection's stale copy of a schema changed by the previous test
+    engine.dispose()
+    yield engine
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlmodel import Session, select
+from app.core.constants import ConfidenceLevel, Region
+from app.models.alert import NotificationJob, PendingAlert
+from app.models.recall import Recall
+from app.models.user import User, Watchlist
+from app.services import alerts
+from app.services.alerts import AlertDigester
+from app.services.watchlist_index import WatchlistIndex, record_change
+
+def seed(session: Session):
+    """Users 1 (Acme + peanut butter) and 2 (Globex); recalls 1 (Acme, confirmed) and 2 (Globex)."""
+    for email in ("a@example.com", "b@example.com"):
+        session.add(User(email=email, hashed_password="x"))
+    session.flush()
+    for user_id, kind, value in [(1, "BRAND", "acme"), (1, "PRODUCT", "peanut butter"), (2, "BRAND", "globex")]:
+        watchlist = Watchlist(user_id=user_id, type=kind, value=value)
+        session.add(watchlist)
+        session.flush()
+        record_change(session, watchlist)
+    session.add(Recall(title="Acme Foods recalls peanut butter", brand="Acme", region=Region.US,
+                       confidence_level=ConfidenceLevel.CONFIRMED))
+    session.add(Recall(title="Globex recalls space heaters", brand="Globex", region=Region.US))
+    session.commit()
+
+def pending(session: Session):
+    return [
+        (a.user_id, a.recall_id, a.match_value, a.urgent, a.sent_at is not None)
+        for a in session.exec(select(PendingAlert).order_by(PendingAlert.user_id, PendingAlert.recall_id))
+    ]
+
+def emails(session: Session):
+    return [
+        (job.user_id, json.loads(job.payload)["subject"], json.loads(job.payload)["content"])
+        for job in session.exec(select(NotificationJob).where(NotificationJob.channel == "email").order_by(NotificationJob.id))
+    ]
+
+def recalls(session: Session):
+    return session.exec(select(Recall).order_by(Recall.id)).all()
+
+def test_match_records_one_alert_per_user_and_recall(db, monkeypatch):
+    monkeypatch.setattr(alerts, "watchlist_index", WatchlistIndex())
+    digester = AlertDigester()
+    with Session(db) as session:
+        seed(session)
+        assert digester.match(session, recalls(session)) == {1, 2}
+        # Two of user 1's watchlists hit recall 1: one line, the first match
+        assert pending(session) == [(1, 1, "acme", True, False), (2, 2, "globex", False, False)]
+        # Matching again adds nothing
+        assert digester.match(session, recalls(session)) == {1, 2}
+        assert len(pending(session)) == 2
+
+def test_backfill_skips_recalls_already_pending(db, monkeypatch):
+    monkeypatch.setattr(alerts, "watchlist_index", WatchlistIndex())
+    digester = AlertDigester()
+    with Session(db) as session:
+        seed(session)
+        digester.match(session, recalls(session))
+        watchlist = Watchlist(user_id=2, type="REGION", value="US")
+        session.add(watchlist)
+        session.commit()
+        assert digester.backfill(session, watchlist, recalls(session)) == 1
+        assert pending(session)[1:] == [(2, 1, "US", False, False), (2, 2, "globex", False, False)]
+
+def test_flush_sends_one_digest_per_user_per_window(db, monkeypatch):
+    monkeypatch.setattr(alerts, "watchlist_index", WatchlistIndex())
+    digester = AlertDigester(window=3600, urgent_bypass=True)
+    with Session(db) as session:
+        seed(session)
+        digester.match(session, recalls(session))
+        watchlist = Watchlist(user_id=2, type="REGION", value="US")
+        session.add(watchlist)
+        session.commit()
+        digester.backfill(session, watchlist, recalls(session))
+
+    assert asyncio.run(digester.flush()) == 2
+    with Session(db) as session:
+        assert all(sent for *_, sent in pending(session))
+        (user_a, subject_a, content_a), (user_b, subject_b, content_b) = emails(session)
+        assert (user_a, content_a) == (1, "Recall matched: Acme Foods recalls peanut butter")
+        assert user_b == 2 and subject_b.startswith("🔴 RedAlert: 2 new recalls")
+        # In the order the hits came in
+        assert content_b.splitlines() == [
+            "- Globex recalls space heaters (matched 'globex')",
+            "- Acme Foods recalls peanut butter (matched 'US')",
+        ]
+
+        # Inside user 2's window: only urgent hits go out early
+        session.add(Recall(title="Globex recalls heater cords", brand="Globex", region=Region.IN))
+        session.add(Recall(title="Globex recalls fan heaters", brand="Globex", region=Region.IN,
+                           confidence_level=ConfidenceLevel.CONFIRMED))
+        session.commit()
+        digester.match(session, recalls(session)[2:])
+    assert asyncio.run(digester.flush([2])) == 1
+    with Session(db) as session:
+        assert emails(session)[-1][1:] == ("🔴 RedAlert: New recall for 'globex'", "Recall matched: Globex recalls fan heaters")
+        assert pending(session)[-2:] == [(2, 3, "globex", False, False), (2, 4, "globex", True, True)]
+
+        # Once the window has passed, the rest follows
+        session.execute(
+            update(PendingAlert).where(PendingAlert.sent_at != None)  # noqa: E711
+            .values(sent_at=datetime.utcnow() - timedelta(hours=2))
+        )
+        session.commit()
+    assert asyncio.run(digester.flush([2])) == 1
+    assert asyncio.run(digester.flush([])) == 0
+    with Session(db) as session:
+        assert emails(session)[-1][2] == "Recall matched: Globex recalls heater cords"
+        assert all(sent for *_, sent in pending(session))
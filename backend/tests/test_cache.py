@@ -0,0 +1,75 @@
+from sqlmodel import Session, select
+from app.models.analysis import NLPAnalysisCache
+from app.nlp.cache import AnalysisCache, LRUCache
+from app.nlp.engine import NLPEngine
+
+TEXTS = [
+    "FSSAI orders recall of adulterated ghee in Delhi",
+    "U.S. FDA: Acme Foods recalls peanut butter over Salmonella",
+]
+
+def rows(batch, count: int):
+    return [batch.row(i) for i in range(count)]
+
+def expected():
+    return rows(NLPEngine.analyze_many(TEXTS), len(TEXTS))
+
+def stored(session: Session):
+    return session.exec(select(NLPAnalysisCache.text_hash, NLPAnalysisCache.keyword_version)).all()
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c"), len(lru)) == (1, None, 3, 2)
+
+def test_second_lookup_is_served_from_memory(db, monkeypatch):
+    cache = AnalysisCache(max_size=10)
+    with Session(db) as session:
+        assert rows(cache.analyze_many(session, TEXTS), 2) == expected()
+        assert (cache.hits, cache.misses) == (0, 2)
+
+        def no_database(*args):
+            raise AssertionError("memory hits must not query the table")
+        monkeypatch.setattr(cache, "_load", no_database)
+        assert rows(cache.analyze_many(session, TEXTS), 2) == expected()
+        assert (cache.hits, cache.misses) == (2, 2)
+
+def test_new_process_is_served_from_the_table(db):
+    with Session(db) as session:
+        AnalysisCache(max_size=10).analyze_many(session, TEXTS)
+        session.commit()
+        assert len(stored(session)) == 2
+
+    # Empty LRU, as in a restarted worker
+    cache = AnalysisCache(max_size=10)
+    with Session(db) as session:
+        assert rows(cache.analyze_many(session, TEXTS + ["No keywords here"]), 3)[:2] == expected()
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert len(cache.memory) == 3
+
+def test_keyword_change_misses_and_purges_old_entries(db, monkeypatch):
+    with Session(db) as session:
+        AnalysisCache(max_size=10).analyze_many(session, TEXTS)
+        session.commit()
+    before, old = NLPEngine.keyword_version(), expected()
+
+    monkeypatch.setattr(NLPEngine, "FOOD_MED_KEYWORDS", NLPEngine.FOOD_MED_KEYWORDS | {"butter"})
+    assert NLPEngine.keyword_version() != before
+    cache = AnalysisCache(max_size=10)
+    with Session(db) as session:
+        analysis = rows(cache.analyze_many(session, TEXTS), 2)
+        session.commit()
+        assert (cache.hits, cache.misses) == (0, 2)
+        # Computed with the edited keyword set, not read back from the old entries
+        assert analysis == expected()
+        assert analysis[1]["food_med_score"] > old[1]["food_med_score"]
+
+        assert cache.purge_stale(session) == 2
+        assert {version for _, version in stored(session)} == {NLPEngine.keyword_version()}
+
+    # Later tests get the real keyword sets back
+    monkeypatch.undo()
+    NLPEngine.reload_keywords()
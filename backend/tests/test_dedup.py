@@ -0,0 +1,120 @@
+import random
+from difflib import SequenceMatcher
+from sqlmodel import Session
+from app.core.constants import Region
+from app.models.recall import Recall
+from app.services import dedup
+from app.services.dedup import DUPLICATE_RATIO, TITLE_VERSION, TitleIndex, TitleIndexRegistry, lcs_length, char_masks
+from app.services.watchlist_index import bump_version
+
+def full_scan(titles, title):
+    """The pre-index dedup: every title of the region, in id order."""
+    for rid, existing in titles:
+        if SequenceMatcher(None, title.lower(), existing.lower()).ratio() > DUPLICATE_RATIO:
+            return rid
+    return None
+
+BRANDS = "amul cipla haldiram patanjali acme globex initech hooli nestle kraft tyson dabur".split()
+PRODUCTS = ("peanut butter|baby formula|cough syrup|space heater|crib|airbag inflator|frozen chicken|ice cream|"
+            "spinach|ghee|paneer|eye drops|power bank|stroller|car seat|ground beef|protein powder|spice mix").split("|")
+HAZARDS = ("salmonella|listeria|undeclared milk|fire risk|burn hazard|choking hazard|lead contamination|"
+           "metal fragments|mislabeling|overheating|microbial contamination").split("|")
+PLACES = "Delhi|Mumbai|Texas|California|Ohio|Kerala|Ontario|London|Punjab|Gujarat".split("|")
+TEMPLATES = [
+    "{b} recalls {p} over {h} risk",
+    "FDA orders recall of {b} {p} due to {h}",
+    "{b} {p} recalled in {l} after {h} found",
+    "{l}: FSSAI seizes {b} {p} batch over {h}",
+    "{b} expands recall of {p} sold in {l}",
+]
+
+def story(rnd):
+    return dict(b=rnd.choice(BRANDS).capitalize(), p=rnd.choice(PRODUCTS), h=rnd.choice(HAZARDS), l=rnd.choice(PLACES))
+
+def same_story(rnd, title, facts):
+    """How feeds retell a story: reworded, extended, a word dropped, a detail changed, typos."""
+    edit = rnd.randrange(5)
+    if edit == 0:
+        return rnd.choice(TEMPLATES).format(**facts)
+    if edit == 1:
+        return title + rnd.choice([" - report", ", officials say", " (update)", " nationwide"])
+    if edit == 2:
+        words = title.split()
+        del words[rnd.randrange(len(words))]
+        return " ".join(words)
+    if edit == 3:
+        return title.replace(facts["p"], rnd.choice(PRODUCTS))
+    return "".join(ch for ch in title if rnd.random() > 0.1)
+
+def test_lcs_bounds_matching_blocks():
+    random.seed(3)
+    for _ in range(300):
+        a = "".join(random.choice("abcde #") for _ in range(random.randint(0, 40)))
+        b = "".join(random.choice("abcde #") for _ in range(random.randint(1, 40)))
+        matched = sum(block.size for block in SequenceMatcher(None, a, b).get_matching_blocks())
+        assert matched <= lcs_length(a, char_masks(b), len(b))
+
+def test_same_first_match_as_full_scan():
+    rnd = random.Random(7)
+    facts = [story(rnd) for _ in range(600)]
+    titles = [(rid, rnd.choice(TEMPLATES).format(**f)) for rid, f in enumerate(facts, 1)]
+    index = TitleIndex()
+    for rid, title in titles:
+        index.add(rid, title)
+
+    queries = [same_story(rnd, titles[i][1], facts[i]) for i in rnd.sample(range(len(titles)), 150)]
+    queries += [rnd.choice(TEMPLATES).format(**story(rnd)) for _ in range(100)]
+    queries += ["Stock markets rally as investors cheer rate cut hopes", "India beat Australia by six wickets", "recall", ""]
+    expected = [full_scan(titles, q) for q in queries]
+    assert sum(rid is not None for rid in expected) > 150
+    assert [index.find_duplicate(q) for q in queries] == expected
+
+def test_only_titles_sharing_trigrams_are_compared(monkeypatch):
+    rnd = random.Random(5)
+    index = TitleIndex()
+    for rid in range(1, 2001):
+        index.add(rid, rnd.choice(TEMPLATES).format(**story(rnd)))
+    compared = []
+
+    def counting_lcs(text, masks, length):
+        compared.append(text)
+        return lcs_length(text, masks, length)
+    monkeypatch.setattr(dedup, "lcs_length", counting_lcs)
+
+    assert index.find_duplicate("Monsoon rains lash coastal districts, schools shut for two days") is None
+    assert len(compared) < 20
+    # Garbling that leaves no three characters in a row intact is not looked for
+    title = "fssai recalls contaminated paneer batch from delhi dairy"
+    garbled = "".join("#" if i % 3 == 2 else ch for i, ch in enumerate(title))
+    assert SequenceMatcher(None, garbled, title).ratio() > DUPLICATE_RATIO
+    index.add(5000, title)
+    assert index.find_duplicate(garbled) is None
+    assert index.find_duplicate(title + " (update)") == 5000
+
+def test_rename_and_remove():
+    index = TitleIndex()
+    index.add(1 << 62, "Acme recalls peanut butter")
+    index.rename(1 << 62, 5)
+    assert index.find_duplicate("acme recalls peanut butter jars") == 5
+    assert index.max_id == 5
+    index.remove(5)
+    assert index.find_duplicate("acme recalls peanut butter jars") is None
+    assert len(index) == 0
+
+def test_registry_rebuilds_on_version_bump(db):
+    with Session(db) as session:
+        session.add(Recall(title="Acme recalls peanut butter", region=Region.US))
+        session.commit()
+        registry = TitleIndexRegistry()
+        assert registry.get(session, Region.US).find_duplicate("acme recalls peanut butter!") is not None
+
+        # An in-place edit (as from the admin API in another process)
+        recall = session.get(Recall, 1)
+        recall.title = "Globex recalls space heaters"
+        session.add(recall)
+        session.commit()
+        assert registry.get(session, Region.US).find_duplicate("globex recalls space heaters") is None
+
+        bump_version(session, TITLE_VERSION)
+        session.commit()
+        assert registry.get(session, Region.US).find_duplicate("globex recalls space heaters") == 1
@@ -0,0 +1,55 @@
+import asyncio
+from app.core.config import settings
+from app.ingestors import http
+from app.ingestors.cpsc import CPSCIngestor
+from app.ingestors.http import close_http_client, get_http_client, host_limit
+
+def test_client_is_shared_within_a_loop_and_replaced_for_a_new_one():
+    async def first_loop():
+        client = get_http_client()
+        assert get_http_client() is client
+        # Ingestors without an injected client go through the shared one
+        assert CPSCIngestor().http() is client
+        async with host_limit("https://api.fda.gov/food/enforcement.json"):
+            pass
+        assert list(http._host_limits) == ["api.fda.gov"]
+        return client
+
+    async def second_loop(previous):
+        client = get_http_client()
+        assert client is not previous
+        # Semaphores are bound to the old loop too
+        assert http._host_limits == {}
+        await close_http_client()
+        assert get_http_client() is not client
+        await close_http_client()
+
+    previous = asyncio.run(first_loop())
+    asyncio.run(second_loop(previous))
+
+def test_concurrency_is_capped_per_host(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_PER_HOST_LIMIT", 2)
+    in_flight = {"total": 0}
+    peaks = {}
+
+    async def request(url: str, host: str):
+        async with host_limit(url):
+            in_flight[host] = in_flight.get(host, 0) + 1
+            in_flight["total"] += 1
+            peaks[host] = max(peaks.get(host, 0), in_flight[host])
+            peaks["total"] = max(peaks.get("total", 0), in_flight["total"])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            in_flight["total"] -= 1
+
+    async def run():
+        try:
+            await asyncio.gather(*[
+                request(f"https://{host}/feed?page={n}", host)
+                for n in range(6) for host in ("a.example", "b.example")
+            ])
+        finally:
+            await close_http_client()
+    asyncio.run(run())
+    # Each host is held to the limit, while the hosts run side by side
+    assert (peaks["a.example"], peaks["b.example"], peaks["total"]) == (2, 2, 4)
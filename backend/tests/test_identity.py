@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+from app.core.constants import SourceType
+from app.core.database import insert_ignore
+from app.ingestors.identity import canonical_url, identity_key
+from app.models.recall import RawRecall
+from app.services.pipeline import IngestionPipeline
+
+def test_identity_precedence():
+    item = {"recall_number": "F-0001-2026", "link": "https://a.example/1", "guid": "g1", "summary": "v1"}
+    key = identity_key("FDA", item)
+    # Native id first: the link, guid and payload can all change
+    assert identity_key("FDA", {**item, "link": "https://a.example/2", "guid": "g2", "summary": "v2"}) == key
+    assert identity_key("FDA", {**item, "recall_number": "F-0002-2026"}) != key
+    assert identity_key("CPSC", item) != key
+
+    # Then the canonical link
+    story = {"link": "HTTPS://News.Example/story/?utm_source=x&b=2&a=1#top", "guid": "g1", "summary": "v1"}
+    key = identity_key("News", story)
+    assert identity_key("News", {**story, "link": "https://news.example/story?a=1&b=2&fbclid=y", "guid": "g2"}) == key
+    assert identity_key("News", {**story, "link": "https://news.example/story?a=2&b=2"}) != key
+
+    # Then the guid
+    entry = {"guid": "tag:feed,2026:1", "title": "Recall", "summary": "v1"}
+    assert identity_key("Feed", {**entry, "summary": "v2"}) == identity_key("Feed", entry)
+    assert identity_key("Feed", {**entry, "guid": "tag:feed,2026:2"}) != identity_key("Feed", entry)
+
+    # Else the whole payload, in any key order, without pipeline fields
+    bare = {"title": "Recall", "summary": "v1"}
+    assert identity_key("Feed", {"summary": "v1", "title": "Recall", "_source_origin": "Feed"}) == identity_key("Feed", bare)
+    assert identity_key("Feed", {**bare, "summary": "v2"}) != identity_key("Feed", bare)
+
+def test_canonical_url():
+    assert canonical_url(" https://Example.com/a/?utm_medium=rss&z=1&ref=home&a=&gclid=9#x ") == "https://example.com/a?a=&z=1"
+    assert canonical_url("https://example.com") == "https://example.com/"
+
+def raw_row(key: str, payload: str = "{}"):
+    return {"identity_key": key, "source_id": key, "source_type": SourceType.NEWS, "raw_payload": payload}
+
+def test_insert_ignore_skips_known_keys_on_sqlite(db):
+    with Session(db) as session:
+        first = insert_ignore(session, RawRecall, [raw_row("a"), raw_row("b")], ["identity_key"], return_ids=True)
+        again = insert_ignore(session, RawRecall, [raw_row("b", '{"v": 2}'), raw_row("c")], ["identity_key"], return_ids=True)
+        session.commit()
+        assert len(first) == 2 and len(again) == 1
+        rows = session.exec(select(RawRecall.id, RawRecall.identity_key, RawRecall.raw_payload).order_by(RawRecall.id)).all()
+        # The first copy is kept as it was
+        assert [(key, payload) for _, key, payload in rows] == [("a", "{}"), ("b", "{}"), ("c", "{}")]
+        assert rows[2][0] == again[0]
+
+def test_insert_ignore_statement_on_postgres():
+    executed = []
+
+    class PostgresSession:
+        def get_bind(self):
+            return SimpleNamespace(dialect=postgresql.dialect())
+
+        def execute(self, statement, rows):
+            executed.append((statement, rows))
+            return SimpleNamespace(scalars=lambda: iter([7]))
+
+    rows = [raw_row("a"), raw_row("b")]
+    assert insert_ignore(PostgresSession(), RawRecall, rows, ["identity_key"], return_ids=True) == [7]
+    [(statement, sent)] = executed
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (identity_key) DO NOTHING" in sql and "RETURNING rawrecall.id" in sql
+    # One executemany round trip for the batch
+    assert sent == rows
+
+def test_persist_dedups_within_a_batch_and_against_the_table(db):
+    pipeline = IngestionPipeline()
+    items = [
+        {"link": "https://news.example/1?utm_source=rss", "title": "Recall A"},
+        {"link": "https://news.example/1", "title": "Recall A (updated)"},
+        {"link": "https://news.example/2", "title": "Recall B"},
+    ]
+    assert len(pipeline._persist("News", SourceType.NEWS, items)) == 2
+    more = [{"link": "https://news.example/2#comments", "title": "Recall B"}, {"link": "https://news.example/3", "title": "Recall C"}]
+    assert len(pipeline._persist("News", SourceType.NEWS, more)) == 1
+    with Session(db) as session:
+        assert len(session.exec(select(RawRecall)).all()) == 3
@@ -0,0 +1,365 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from sqlmodel import Session, select
+from app.ingestors import base
+from app.ingestors.cpsc import CPSCIngestor
+from app.ingestors.fda import FDAIngestor
+from app.ingestors.http import close_http_client
+from app.ingestors.nhtsa import NHTSAIngestor
+from app.ingestors.rss import RSSIngestor
+from app.models.ingestion import HTTPValidator, SourceState
+from app.services.pipeline import IngestionPipeline
+
+def mock_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+def fetch(ingestor):
+    async def run():
+        try:
+            return await ingestor.fetch()
+        finally:
+            await close_http_client()
+    return asyncio.run(run())
+
+def set_cursor(engine, source_name: str, cursor: str):
+    with Session(engine) as session:
+        session.add(SourceState(source_name=source_name, cursor=cursor))
+        session.commit()
+
+def stored_cursor(engine, source_name: str):
+    with Session(engine) as session:
+        state = session.get(SourceState, source_name)
+        return state.cursor if state else None
+
+# --- CPSC ---
+
+def test_cpsc_cursor_advances_and_is_sent_next_time(db):
+    requests = []
+    batches = [
+        [{"RecallID": 1, "Title": "Heater recall", "RecallDate": "2026-01-03T00:00:00"},
+         {"RecallID": 2, "Title": "Crib recall", "RecallDate": "2026-01-05T00:00:00"}],
+        [{"RecallID": 3, "Title": "Toy recall", "RecallDate": "2026-01-07T00:00:00"}],
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=batches[len(requests) - 1])
+
+    first = CPSCIngestor(client=mock_client(handler))
+    items = fetch(first)
+    assert [item["title"] for item in items] == ["Heater recall", "Crib recall"]
+    initial = (datetime.utcnow() - timedelta(days=CPSCIngestor.INITIAL_DAYS)).strftime("%Y-%m-%d")
+    assert requests[0].url.params["RecallDateStart"] == initial
+    # Nothing is remembered until the caller has stored the items
+    assert stored_cursor(db, "CPSC") is None
+    first.save_state()
+    assert stored_cursor(db, "CPSC") == "2026-01-05"
+
+    second = CPSCIngestor(client=mock_client(handler))
+    assert [item["title"] for item in fetch(second)] == ["Toy recall"]
+    assert requests[1].url.params["RecallDateStart"] == "2026-01-05"
+    second.save_state()
+    assert stored_cursor(db, "CPSC") == "2026-01-07"
+
+def test_cpsc_failed_fetch_keeps_cursor(db):
+    set_cursor(db, "CPSC", "2026-01-05")
+    ingestor = CPSCIngestor(client=mock_client(lambda request: httpx.Response(503)))
+    with pytest.raises(httpx.HTTPStatusError):
+        fetch(ingestor)
+    assert stored_cursor(db, "CPSC") == "2026-01-05"
+
+def test_cpsc_keeps_one_validator_across_cursors(db):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v2"':
+            return httpx.Response(304)
+        day = len(requests) * 2 + 1
+        body = [{"RecallID": day, "Title": "Heater recall", "RecallDate": f"2026-01-{day:02d}T00:00:00"}]
+        return httpx.Response(200, json=body, headers={"ETag": f'"v{len(requests)}"'})
+
+    for expected in (1, 1, 0):
+        ingestor = CPSCIngestor(client=mock_client(handler))
+        assert len(fetch(ingestor)) == expected
+        ingestor.save_state()
+    # Each fetch asked from a new cursor, with the last validator
+    assert [r.url.params["RecallDateStart"] for r in requests[1:]] == ["2026-01-03", "2026-01-05"]
+    assert [r.headers.get("If-None-Match") for r in requests] == [None, '"v1"', '"v2"']
+    with Session(db) as session:
+        assert session.exec(select(HTTPValidator.url)).all() == [CPSCIngestor.BASE_URL]
+
+# --- FDA ---
+
+def fda_reports(count: int, start: int = 1):
+    return [
+        {"recall_number": f"F-{n:04d}-2026", "recalling_firm": "Acme Foods", "product_description": f"Product {n}",
+         "reason_for_recall": "Undeclared milk", "report_date": f"202601{n:02d}"}
+        for n in range(start, start + count)
+    ]
+
+def fda_handler(total: int, page_size: int, requests: list, in_flight: list, fail_skip: int = None):
+    reports = fda_reports(total)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        skip = int(request.url.params["skip"])
+        requests.append(request)
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        # Keep the page open long enough for the others to start
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        if skip == fail_skip:
+            return httpx.Response(500)
+        body = {"meta": {"results": {"total": total}}, "results": reports[skip:skip + page_size]}
+        return httpx.Response(200, json=body)
+    return handler
+
+def test_fda_pages_concurrently_and_advances_cursor(db, monkeypatch):
+    monkeypatch.setattr(FDAIngestor, "PAGE_SIZE", 2)
+    requests, in_flight = [], [0, 0]
+    ingestor = FDAIngestor(client=mock_client(fda_handler(7, 2, requests, in_flight)))
+    items = fetch(ingestor)
+
+    assert sorted(int(r.url.params["skip"]) for r in requests) == [0, 2, 4, 6]
+    assert sorted(item["recall_number"] for item in items) == [r["recall_number"] for r in fda_reports(7)]
+    # The pages after the first one are requested side by side
+    assert in_flight[1] > 1
+    assert all(r.url.params["sort"] == "report_date:asc" for r in requests)
+
+    ingestor.save_state()
+    assert stored_cursor(db, "FDA") == "20260107"
+
+    requests.clear()
+    fetch(FDAIngestor(client=mock_client(fda_handler(1, 2, requests, [0, 0]))))
+    assert "report_date:[20260107 TO " in requests[0].url.params["search"]
+
+def test_fda_stops_at_max_skip(db, monkeypatch):
+    monkeypatch.setattr(FDAIngestor, "PAGE_SIZE", 2)
+    monkeypatch.setattr(FDAIngestor, "MAX_SKIP", 4)
+    requests = []
+    ingestor = FDAIngestor(client=mock_client(fda_handler(20, 2, requests, [0, 0])))
+    items = fetch(ingestor)
+
+    assert sorted(int(r.url.params["skip"]) for r in requests) == [0, 2, 4]
+    assert len(items) == 6
+    # Oldest first, so the cursor stops where this cycle's sync stopped
+    ingestor.save_state()
+    assert stored_cursor(db, "FDA") == "20260106"
+
+def test_fda_failed_page_keeps_cursor(db, monkeypatch):
+    monkeypatch.setattr(FDAIngestor, "PAGE_SIZE", 2)
+    set_cursor(db, "FDA", "20260101")
+    ingestor = FDAIngestor(client=mock_client(fda_handler(6, 2, [], [0, 0], fail_skip=4)))
+
+    async def run():
+        try:
+            return await IngestionPipeline().run([("FDA", ingestor)])
+        finally:
+            await close_http_client()
+    stats = asyncio.run(run())
+
+    assert stats["errors"] == 1
+    # Pages that did arrive may be stored, but the cursor stays put so the
+    # next cycle fetches the whole range again
+    assert stored_cursor(db, "FDA") == "20260101"
+
+def test_fda_skips_an_unchanged_first_page(db, monkeypatch):
+    monkeypatch.setattr(FDAIngestor, "PAGE_SIZE", 2)
+    requests = []
+    handler = fda_handler(5, 2, requests, [0, 0])
+
+    async def with_etag(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"fda-1"':
+            requests.append(request)
+            return httpx.Response(304)
+        response = await handler(request)
+        return httpx.Response(response.status_code, content=response.content, headers={"ETag": '"fda-1"'})
+
+    first = FDAIngestor(client=mock_client(with_etag))
+    assert len(fetch(first)) == 5
+    first.save_state()
+    requests.clear()
+
+    second = FDAIngestor(client=mock_client(with_etag))
+    assert fetch(second) == [] and second.not_modified
+    # Only the first page was asked for, under the same validator row
+    assert [int(r.url.params["skip"]) for r in requests] == [0]
+    with Session(db) as session:
+        assert session.exec(select(HTTPValidator.url)).all() == [FDAIngestor.BASE_URL]
+
+def test_fda_failed_page_cancels_the_others(db, monkeypatch):
+    monkeypatch.setattr(FDAIngestor, "PAGE_SIZE", 2)
+    cancelled = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        skip = int(request.url.params["skip"])
+        if skip == 2:
+            return httpx.Response(500)
+        if skip > 2:
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(skip)
+                raise
+        return httpx.Response(200, json={"meta": {"results": {"total": 8}}, "results": fda_reports(2)})
+
+    async def run():
+        try:
+            with pytest.raises(httpx.HTTPStatusError):
+                await FDAIngestor(client=mock_client(handler)).fetch()
+            # Nothing left running once the fetch has failed
+            assert sorted(cancelled) == [4, 6]
+        finally:
+            await close_http_client()
+    asyncio.run(asyncio.wait_for(run(), 5))
+
+# --- NHTSA ---
+
+def nhtsa_campaign(number: str, received: str, year: int):
+    return {"NHTSACampaignNumber": number, "Manufacturer": "Acme Motors", "Component": "AIR BAGS",
+            "ModelYear": str(year), "ReportReceivedDate": received}
+
+def test_nhtsa_filters_by_cursor(db):
+    set_cursor(db, "NHTSA", "2026-03-01")
+    this_year = datetime.now().year
+    march_10 = int(datetime(2026, 3, 10, 12, tzinfo=timezone.utc).timestamp() * 1000)
+    results = {
+        str(this_year): [
+            nhtsa_campaign("26V001000", "01/02/2026", this_year),  # before the cursor
+            nhtsa_campaign("26V002000", "2026-03-01T00:00:00", this_year),  # on it (inclusive)
+            nhtsa_campaign("26V003000", f"/Date({march_10})/", this_year),
+        ],
+        str(this_year - 1): [
+            # Same campaign listed under the previous model year
+            nhtsa_campaign("26V003000", f"/Date({march_10})/", this_year - 1),
+            nhtsa_campaign("25V900000", "15/12/2025", this_year - 1),
+        ],
+    }
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        year_results = results[request.url.params["modelyear"]]
+        return httpx.Response(200, content=json.dumps({"Count": len(year_results), "Results": year_results}))
+
+    ingestor = NHTSAIngestor(client=mock_client(handler))
+    items = fetch(ingestor)
+
+    assert sorted(item["NHTSACampaignNumber"] for item in items) == ["26V002000", "26V003000"]
+    ingestor.save_state()
+    assert stored_cursor(db, "NHTSA") == "2026-03-10"
+
+# --- RSS ---
+
+def rss_feed(*titles: str) -> bytes:
+    items = "".join(f"<item><title>{t}</title><link>https://news.example/{n}</link></item>" for n, t in enumerate(titles))
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>News</title>{items}</channel></rss>'.encode()
+
+def test_rss_without_validators_skips_an_unchanged_body(db, monkeypatch):
+    bodies = [rss_feed("Amul ghee recall"), rss_feed("Amul ghee recall"), rss_feed("Amul ghee recall", "Cipla syrup banned")]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        # Like Google News: no ETag / Last-Modified, so never a 304
+        return httpx.Response(200, content=bodies[len(requests) - 1])
+
+    def parse_fails(self, elem):
+        raise AssertionError("an unchanged feed must not be parsed")
+
+    first = RSSIngestor("https://news.example/rss", "News", client=mock_client(handler))
+    assert [item["title"] for item in fetch(first)] == ["Amul ghee recall"]
+    first.save_state()
+
+    unchanged = RSSIngestor("https://news.example/rss", "News", client=mock_client(handler))
+    with monkeypatch.context() as m:
+        m.setattr(RSSIngestor, "_parse_item", parse_fails)
+        assert fetch(unchanged) == []
+    assert unchanged.not_modified
+    unchanged.save_state()
+
+    changed = RSSIngestor("https://news.example/rss", "News", client=mock_client(handler))
+    assert [item["title"] for item in fetch(changed)] == ["Amul ghee recall", "Cipla syrup banned"]
+    assert not changed.not_modified
+
+def test_rss_large_body_is_streamed(db, monkeypatch):
+    monkeypatch.setattr(base, "HASH_BUFFER_LIMIT", 64)
+    titles = [f"Story {n}" for n in range(20)]
+    body = rss_feed(*titles)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        async def chunks():
+            for start in range(0, len(body), 50):
+                yield body[start:start + 50]
+        return httpx.Response(200, content=chunks())
+
+    for _ in range(2):
+        ingestor = RSSIngestor("https://news.example/rss", "News", client=mock_client(handler))
+        assert [item["title"] for item in fetch(ingestor)] == titles
+        ingestor.save_state()
+    # Past the buffer the body is parsed, but still recognized as unchanged
+    assert ingestor.not_modified
+
+ATOM_FEED = b'''<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Recall notices</title>
+  <link rel="self" href="https://agency.example/feed.atom"/>
+  <entry>
+    <title>Acme peanut butter recalled</title>
+    <link rel="self" href="https://agency.example/api/1"/>
+    <link rel="enclosure" href="https://agency.example/1.pdf"/>
+    <link rel="alternate" type="text/html" href="https://agency.example/recalls/1"/>
+    <id>tag:agency.example,2026:1</id>
+    <published>2026-01-05T10:00:00Z</published>
+    <updated>2026-01-06T10:00:00Z</updated>
+    <summary>Possible Salmonella contamination.</summary>
+    <author><name>Agency</name></author>
+  </entry>
+  <entry>
+    <title type="html">Globex heater recall</title>
+    <link href="https://agency.example/recalls/2"/>
+    <link rel="related" href="https://agency.example/related/2"/>
+    <id>tag:agency.example,2026:2</id>
+    <updated>2026-01-07T10:00:00Z</updated>
+    <content type="text">Fire risk; stop use.</content>
+  </entry>
+  <entry>
+    <title>Only a related link</title>
+    <link rel="related" href="https://agency.example/related/3"/>
+    <link rel="via" href="https://agency.example/via/3"/>
+    <id>tag:agency.example,2026:3</id>
+  </entry>
+</feed>'''
+
+def test_atom_entries_are_parsed_like_rss_items(db):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # Small chunks, so elements are split across reads
+        async def chunks():
+            for start in range(0, len(ATOM_FEED), 40):
+                yield ATOM_FEED[start:start + 40]
+        return httpx.Response(200, content=chunks())
+
+    items = fetch(RSSIngestor("https://agency.example/feed.atom", "Agency", client=mock_client(handler)))
+    assert items == [
+        {"title": "Acme peanut butter recalled", "link": "https://agency.example/recalls/1",
+         "published": "2026-01-05T10:00:00Z", "summary": "Possible Salmonella contamination.",
+         "source_name": "Agency", "guid": "tag:agency.example,2026:1"},
+        # A link without rel is the alternate one
+        {"title": "Globex heater recall", "link": "https://agency.example/recalls/2",
+         "published": "2026-01-07T10:00:00Z", "summary": "Fire risk; stop use.",
+         "source_name": "Agency", "guid": "tag:agency.example,2026:2"},
+        # No alternate: the first link
+        {"title": "Only a related link", "link": "https://agency.example/related/3",
+         "published": "", "summary": "", "source_name": "Agency", "guid": "tag:agency.example,2026:3"},
+    ]
+
+def test_rss_items_keep_their_guid(db):
+    body = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>News</title>'
+            b'<item><title>Amul ghee recall</title><link>https://news.example/1</link>'
+            b'<guid isPermaLink="false">news-1</guid><pubDate>Mon, 05 Jan 2026 10:00:00 GMT</pubDate>'
+            b'<description>FSSAI order.</description></item></channel></rss>')
+    items = fetch(RSSIngestor("https://news.example/rss", "News", client=mock_client(lambda request: httpx.Response(200, content=body))))
+    assert items == [{"title": "Amul ghee recall", "link": "https://news.example/1", "published": "Mon, 05 Jan 2026 10:00:00 GMT",
+                      "summary": "FSSAI order.", "source_name": "News", "guid": "news-1"}]
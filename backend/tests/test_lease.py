@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import false, update
+from sqlmodel import Session
+from app.models.ingestion import JobLease
+from app.services import lease
+from app.services.lease import LeaseKeeper, LeaseLost, LeaseManager
+
+def row(engine, name: str) -> JobLease:
+    with Session(engine) as session:
+        return session.get(JobLease, name)
+
+def expire(engine, name: str):
+    with Session(engine) as session:
+        session.execute(update(JobLease).where(JobLease.name == name).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+
+def test_first_claim_race_has_one_winner(db, monkeypatch):
+    a, b = LeaseManager("a", ttl=60), LeaseManager("b", ttl=60)
+    assert a.acquire("job")
+
+    # b ran its UPDATE before a's row existed, so the INSERT decides
+    monkeypatch.setattr(lease, "update", lambda table: update(table).where(false()))
+    assert not b.acquire("job")
+    assert row(db, "job").holder == "a"
+
+def test_live_lease_is_not_taken(db):
+    a, b = LeaseManager("a", ttl=60), LeaseManager("b", ttl=60)
+    assert a.acquire("job")
+    before = row(db, "job")
+    assert not b.acquire("job")
+    after = row(db, "job")
+    assert (after.holder, after.expires_at, after.acquired_at) == ("a", before.expires_at, before.acquired_at)
+
+    # Renewing moves the expiry, not the acquisition time
+    assert a.renew("job")
+    renewed = row(db, "job")
+    assert renewed.acquired_at == before.acquired_at and renewed.expires_at >= before.expires_at
+
+def test_expired_lease_is_taken_over(db):
+    a, b = LeaseManager("a", ttl=60), LeaseManager("b", ttl=60)
+    assert a.acquire("job")
+    expire(db, "job")
+    assert a.holder_of("job") is None
+
+    assert b.acquire("job")
+    assert b.holder_of("job") == "b"
+    assert row(db, "job").acquired_at > datetime.utcnow() - timedelta(seconds=5)
+    # The former holder's renewal is refused
+    assert not a.renew("job")
+
+def test_release_frees_the_lease_at_once(db):
+    a, b = LeaseManager("a", ttl=60), LeaseManager("b", ttl=60)
+    assert a.acquire("job")
+    a.release("job")
+    assert b.acquire("job")
+
+def test_keeper_stops_trusting_a_lease_it_cannot_renew(db):
+    manager = LeaseManager("a", ttl=1.0)
+    keeper = LeaseKeeper("job", manager)
+    keeper.start()
+    try:
+        assert keeper.wait_first_attempt(5)
+        valid_until = keeper._valid_until
+        acquire = manager.acquire
+
+        def unreachable(name):
+            raise RuntimeError("could not connect to server")
+        manager.acquire = unreachable
+        time.sleep(max(0.0, valid_until - 0.2 - time.monotonic()))
+        # Still inside three quarters of the TTL from the last renewal
+        assert keeper.held()
+        keeper.check()
+
+        time.sleep(max(0.0, valid_until + 0.05 - time.monotonic()))
+        assert not keeper.held()
+        with pytest.raises(LeaseLost):
+            keeper.check()
+
+        # Renewals succeed again: held once more
+        manager.acquire = acquire
+        deadline = time.monotonic() + 5
+        while not keeper.held() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert keeper.held()
+    finally:
+        keeper.stop()
+    assert LeaseManager("b").acquire("job")
@@ -0,0 +1,50 @@
+from sqlalchemy import inspect, text
+from sqlmodel import SQLModel
+from app.core.database import ensure_schema
+
+# The recall tables as created before any migration existed
+BASELINE = [
+    "DROP TABLE IF EXISTS alembic_version",
+    "CREATE TABLE recall (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, brand VARCHAR, product VARCHAR, "
+    "category VARCHAR, region VARCHAR NOT NULL, hazard_summary VARCHAR, official_action VARCHAR, "
+    "confidence_level VARCHAR NOT NULL, signal_type VARCHAR, url VARCHAR, published_date DATETIME, "
+    "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)",
+    "CREATE TABLE rawrecall (id INTEGER PRIMARY KEY, source_id VARCHAR NOT NULL, source_type VARCHAR NOT NULL, "
+    "raw_payload VARCHAR NOT NULL, ingested_at DATETIME NOT NULL)",
+    "CREATE INDEX ix_rawrecall_source_id ON rawrecall (source_id)",
+    "CREATE TABLE recallsource (id INTEGER PRIMARY KEY, recall_id INTEGER REFERENCES recall (id), "
+    "source_type VARCHAR NOT NULL, url VARCHAR NOT NULL, title VARCHAR NOT NULL, published_at DATETIME)",
+    "INSERT INTO rawrecall (source_id, source_type, raw_payload, ingested_at) VALUES ('x', 'NEWS', '{}', '2025-01-06')",
+]
+
+def schema(engine):
+    inspector = inspect(engine)
+    return {
+        table: (sorted(col["name"] for col in inspector.get_columns(table)),
+                sorted(tuple(ix["column_names"]) for ix in inspector.get_indexes(table)))
+        for table in ("recall", "rawrecall", "recallsource")
+    }
+
+def revision(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+def test_baseline_database_is_migrated_to_the_model_schema(db):
+    expected = schema(db)
+    SQLModel.metadata.drop_all(db)
+    with db.begin() as conn:
+        for statement in BASELINE:
+            conn.execute(text(statement))
+
+    ensure_schema()
+    assert schema(db) == expected
+    assert revision(db) == "0002"
+    with db.connect() as conn:
+        assert conn.execute(text("SELECT processed_at FROM rawrecall")).all() == [(None,)]
+
+def test_fresh_database_is_stamped_without_changes(db):
+    expected = schema(db)
+    ensure_schema()
+    ensure_schema()
+    assert schema(db) == expected
+    assert revision(db) == "0002"
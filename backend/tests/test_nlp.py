@@ -0,0 +1,102 @@
+import random
+import re
+from app.nlp import matcher as matcher_module
+from app.nlp.engine import NLPEngine
+from app.nlp.matcher import AhoCorasick, GrowingSubstringMatcher, KeywordMatcher
+
+# Texts around the awkward keywords: prefixes of each other ("fda" / "state
+# fda"), trailing punctuation ("u.s.", "rs."), short ones inside longer words
+# ("eu", "bis", "uk"), multi-word ones split across lines
+TEXTS = [
+    "FSSAI orders recall of adulterated ghee in Delhi; state FDA seizes stock",
+    "U.S. FDA: Acme Foods recalls peanut butter over Salmonella contamination",
+    "Withdrawn: cough syrup batch issue flagged by CDSCO, drug controller warns",
+    "Rs. 5 lakh fine for selling khoya with a choking hazard in Mumbai",
+    "Europe and the EU: MHRA and TGA issue a safety alert on tablets (u.s.a)",
+    "Recalled? Not a recall: the rs.5 pill deal is a fire risk in Texas, USA.",
+    "Stop use\nof the heater: manufacturing\ndefect, consumer warning from CPSC",
+    "Bisphenol-free bottles; Ukraine and the UK; bis standards; uk-made juice",
+    "state fdas and fda's: drug-controller, pharma/pharmacy, dietary supplement",
+    "",
+    "No keywords at all here.",
+    "recall recall RECALL recall-hazard hazard_free hazard",
+]
+
+def legacy_analyze(text: str):
+    """The per-keyword regex analyze_text the matcher replaced."""
+    text_lower = text.lower()
+    found = lambda kws: [kw for kw in kws if re.search(rf'\b{re.escape(kw)}\b', text_lower)]
+    intent = found(NLPEngine.RECALL_KEYWORDS)
+    india_score = 5 * len(found(NLPEngine.INDIA_HIGH_SCORE_KEYWORDS)) + 2 * len(found(NLPEngine.INDIA_LOW_SCORE_KEYWORDS))
+    foreign_score = 5 * len(found(NLPEngine.FOREIGN_HIGH_SCORE_KEYWORDS)) + 2 * len(found(NLPEngine.FOREIGN_LOW_SCORE_KEYWORDS))
+    food_med_score = len(found(NLPEngine.FOOD_MED_KEYWORDS))
+    return {
+        "is_recall": len(intent) > 0,
+        "intent_score": len(intent),
+        "intent_keywords": intent,
+        "is_india": india_score >= 5 and india_score >= (foreign_score + 2),
+        "india_score": india_score,
+        "foreign_score": foreign_score,
+        "is_food_med": food_med_score > 0,
+        "food_med_score": food_med_score,
+    }
+
+def keywords():
+    return sorted({kw for attr in NLPEngine.KEYWORD_SETS.values() for kw in getattr(NLPEngine, attr)})
+
+def random_texts(count: int, seed: int):
+    """Keywords, their fragments and separators glued together at random."""
+    rnd = random.Random(seed)
+    pieces = keywords() + [kw[:-1] for kw in keywords()] + ["s", "'s", "x", "2"]
+    separators = [" ", "", ".", "-", "_", "\n", ", ", "/"]
+    return [
+        "".join(rnd.choice(pieces) + rnd.choice(separators) for _ in range(rnd.randint(0, 12)))
+        for _ in range(count)
+    ]
+
+def test_matcher_equals_per_keyword_regex():
+    matcher = KeywordMatcher({"all": keywords()})
+    substring = KeywordMatcher({"all": keywords()}, word_boundary=False)
+    for text in [t.lower() for t in TEXTS] + random_texts(500, seed=1):
+        assert matcher.find(text) == {kw for kw in keywords() if re.search(rf'\b{re.escape(kw)}\b', text)}, text
+        assert substring.find(text) == {kw for kw in keywords() if kw in text}, text
+
+def test_growing_matcher_equals_substring_test(monkeypatch):
+    built = []
+    class CountingAhoCorasick(AhoCorasick):
+        def __init__(self, words):
+            built.append(len(list(words)))
+            super().__init__(words)
+    monkeypatch.setattr(matcher_module, "AhoCorasick", CountingAhoCorasick)
+
+    rnd = random.Random(4)
+    words = keywords() + [kw[:-1] for kw in keywords()]
+    matcher, live = GrowingSubstringMatcher(), set()
+    texts = [t.lower() for t in TEXTS] + random_texts(50, seed=5)
+    for step in range(1500):
+        word = rnd.choice(words)
+        if rnd.random() < 0.3:
+            matcher.discard(word)
+            live.discard(word)
+        else:
+            matcher.add(word)
+            live.add(word)
+        if step % 50 == 0:
+            for text in texts:
+                assert matcher.find(text) == {w for w in live if w in text}, text
+    assert len(matcher) == len(live)
+    # Each word goes into a handful of automata, not one per added word
+    assert sum(built) < 10 * len(words)
+
+def test_analyze_text_equals_legacy():
+    for text in TEXTS + random_texts(300, seed=2):
+        assert NLPEngine.analyze_text(text) == legacy_analyze(text), text
+
+def test_analyze_many_equals_analyze_text():
+    texts = TEXTS + random_texts(300, seed=3)
+    batch = NLPEngine.analyze_many(texts)
+    assert len(batch) == len(texts)
+    for i, text in enumerate(texts):
+        row = batch.row(i)
+        assert sorted(row.pop("entities")) == sorted(NLPEngine.extract_entity_candidates(text))
+        assert row == legacy_analyze(text), text
@@ -0,0 +1,127 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlmodel import Session, select
+from app.core.constants import NotificationChannel
+from app.models.alert import NotificationJob
+from app.models.user import User
+from app.services import notifier as notifier_module
+from app.services.notifier import NotificationService, notifier
+from app.services.outbox import DEAD, PENDING, SENDING, SENT, ChannelLimiter, NotificationOutbox
+
+EMAIL = NotificationChannel.EMAIL
+
+def seed(engine, count: int = 1):
+    with Session(engine) as session:
+        user = User(email="ops@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        for n in range(count):
+            notifier.queue_alert(session, user, f"Recall {n}", "ghee")
+        session.commit()
+
+def jobs(engine):
+    with Session(engine) as session:
+        return session.exec(select(NotificationJob).order_by(NotificationJob.id)).all()
+
+def make_due(engine):
+    with Session(engine) as session:
+        session.execute(update(NotificationJob).values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+
+def test_each_job_is_claimed_once(db):
+    seed(db, 3)
+    a, b = NotificationOutbox("a"), NotificationOutbox("b")
+    assert [job.id for job in a.claim(EMAIL, 2)] == [1, 2]
+    assert [job.id for job in b.claim(EMAIL, 10)] == [3]
+    assert b.claim(EMAIL, 10) == []
+    assert [(job.status, job.locked_by, job.attempts) for job in jobs(db)] == [
+        (SENDING, "a", 1), (SENDING, "a", 1), (SENDING, "b", 1)
+    ]
+
+    # An abandoned claim is taken over once it expires
+    with Session(db) as session:
+        session.execute(update(NotificationJob).where(NotificationJob.id == 1).values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+    [job] = b.claim(EMAIL, 10)
+    assert (job.id, job.locked_by, job.attempts) == (1, "b", 2)
+    # ...and the former holder can no longer finish it
+    a.finish(job)
+    assert jobs(db)[0].status == SENDING
+
+def test_finish_sends_or_retries_with_backoff(db):
+    seed(db, 2)
+    outbox = NotificationOutbox("a", retry_base=30, retry_max=3600)
+    sent, failed = outbox.claim(EMAIL, 10)
+    assert outbox.finish(sent) == SENT
+    assert outbox.finish(failed, RuntimeError("421 try later")) == PENDING
+
+    done, retry = jobs(db)
+    assert (done.status, done.locked_by, done.last_error) == (SENT, None, None) and done.sent_at
+    assert (retry.status, retry.locked_by, retry.last_error) == (PENDING, None, "421 try later")
+    delay = (retry.next_attempt_at - datetime.utcnow()).total_seconds()
+    assert 25 < delay <= 33
+    # Not due again until then
+    assert outbox.claim(EMAIL, 10) == []
+
+def test_backoff_doubles_up_to_the_cap():
+    outbox = NotificationOutbox("a", retry_base=30, retry_max=3600)
+    for attempts, expected in [(1, 30), (2, 60), (3, 120), (6, 960), (8, 3600), (20, 3600)]:
+        delay = outbox.backoff(attempts)
+        assert expected * 0.9 <= delay <= expected * 1.1
+
+def test_dead_letter_and_requeue(db):
+    seed(db, 2)
+    outbox = NotificationOutbox("a", max_attempts=3)
+    for attempt in range(1, 4):
+        make_due(db)
+        claimed = outbox.claim(EMAIL, 1)
+        assert [job.attempts for job in claimed] == [attempt]
+        assert outbox.finish(claimed[0], RuntimeError("timeout")) == (DEAD if attempt == 3 else PENDING)
+    # Permanent errors skip the retries
+    make_due(db)
+    [job] = outbox.claim(EMAIL, 10)
+    assert outbox.finish(job, ValueError("no such mailbox"), permanent=True) == DEAD
+
+    make_due(db)
+    assert outbox.claim(EMAIL, 10) == []
+    assert outbox.requeue_dead(ids=[1]) == 1
+    assert [(job.status, job.attempts) for job in jobs(db)] == [(PENDING, 0), (DEAD, 1)]
+    assert outbox.requeue_dead() == 1
+    assert [job.id for job in outbox.claim(EMAIL, 10)] == [1, 2]
+
+def test_drain_delivers_and_retries_timeouts(db, monkeypatch):
+    seed(db, 2)
+
+    class SlowProvider:
+        def __init__(self):
+            self.sent = []
+
+        async def send_email(self, recipient_email, subject, content):
+            if content.endswith("Recall 1"):
+                await asyncio.sleep(5)
+            self.sent.append(json.dumps([recipient_email, subject, content]))
+            return True
+
+    provider = SlowProvider()
+    monkeypatch.setattr(notifier, "provider", provider)
+    monkeypatch.setattr(notifier_module, "EMAIL_TIMEOUT", 0.1)
+    outbox = NotificationOutbox("a")
+    stats = asyncio.run(outbox.drain({EMAIL: ChannelLimiter(4, 0)}))
+    assert stats == {SENT: 1, PENDING: 1}
+    assert len(provider.sent) == 1
+    timed_out = jobs(db)[1]
+    assert timed_out.status == PENDING and "timed out" in timed_out.last_error
+
+def test_digest_queues_one_email(db):
+    with Session(db) as session:
+        user = User(email="ops@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        NotificationService().queue_digest(session, user, [("Recall A", "ghee"), ("Recall B", "syrup")])
+        session.commit()
+    [job] = jobs(db)
+    payload = json.loads(job.payload)
+    assert job.channel == EMAIL.value and payload["to"] == "ops@example.com"
+    assert "Recall A (matched 'ghee')" in payload["content"] and "Recall B" in payload["content"]
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.core.constants import SourceType
+from app.ingestors.base import BaseIngestor
+from app.services.pipeline import _STOP, IngestionPipeline, _SourceRun
+
+class FakeIngestor(BaseIngestor):
+    """`batches` batches of items, each taking `delay` seconds to "download"."""
+
+    def __init__(self, batches: int, delay: float = 0.0):
+        super().__init__(SourceType.NEWS, "Fake")
+        self.batches = batches
+        self.delay = delay
+        self.saved = 0
+
+    async def fetch_latest(self) -> List[Dict[str, Any]]:
+        return [item async for item in self.stream_items()]
+
+    async def stream_items(self):
+        for n in range(self.batches):
+            await asyncio.sleep(self.delay)
+            yield {"title": f"Story {n}", "link": f"https://news.example/{n}", "summary": "", "source_name": self.source_name}
+
+    def save_state(self):
+        self.saved += 1
+
+def run(pipeline: IngestionPipeline, ingestor: BaseIngestor) -> Dict[str, int]:
+    return asyncio.run(pipeline.run([(ingestor.source_name, ingestor)]))
+
+def test_backpressure_does_not_count_against_the_fetch_timeout(db, monkeypatch):
+    monkeypatch.setattr(settings, "SOURCE_TIMEOUT", 0.3)
+    persist = IngestionPipeline._persist
+
+    def slow_persist(self, *args):
+        time.sleep(0.1)
+        return persist(self, *args)
+    monkeypatch.setattr(IngestionPipeline, "_persist", slow_persist)
+
+    # Ten one-item batches through a one-slot queue: ~1s blocked on the
+    # persist stage, almost no time fetching
+    ingestor = FakeIngestor(10)
+    stats = run(IngestionPipeline(batch_size=1, queue_size=1), ingestor)
+    assert stats["errors"] == 0
+    assert stats["saved"] == 10
+    assert ingestor.saved == 1
+
+def test_slow_fetch_times_out(db, monkeypatch):
+    monkeypatch.setattr(settings, "SOURCE_TIMEOUT", 0.3)
+    ingestor = FakeIngestor(10, delay=0.1)
+    stats = run(IngestionPipeline(batch_size=1), ingestor)
+    assert stats["errors"] == 1
+    assert ingestor.saved == 0
+
+def test_failed_state_save_counts_the_batch_once(db):
+    class FailingSave(FakeIngestor):
+        def save_state(self):
+            raise RuntimeError("database is locked")
+
+    pipeline = IngestionPipeline()
+    source_run = _SourceRun("Fake", FailingSave(1))
+    source_run.fetched, source_run.outstanding = True, 1
+    item = {"title": "Story", "link": "https://news.example/1", "summary": "", "source_name": "Fake"}
+
+    async def persist():
+        persist_q, process_q = asyncio.Queue(), asyncio.Queue()
+        persist_q.put_nowait((source_run, [item]))
+        persist_q.put_nowait(_STOP)
+        await pipeline._persist_worker(persist_q, process_q)
+        return process_q.qsize()
+
+    # The item is stored and handed on; the failed state save is reported once
+    assert asyncio.run(persist()) == 1
+    assert source_run.outstanding == 0
+    assert pipeline.stats["saved"] == 1 and pipeline.stats["errors"] == 1
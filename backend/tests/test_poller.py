@@ -0,0 +1,87 @@
+import asyncio
+from sqlmodel import Session
+from app.models.ingestion import SourceState
+from app.services.poller import GROW_ON_ERROR, GROW_ON_QUIET, SHRINK_ON_NEW, AdaptivePoller
+
+def poller(**kwargs) -> AdaptivePoller:
+    options = dict(sources=[], min_interval=60, max_interval=3600, initial_interval=600, jitter=0)
+    options.update(kwargs)
+    return AdaptivePoller(**options)
+
+def state(**kwargs) -> SourceState:
+    return SourceState(source_name="Fake", **kwargs)
+
+def test_base_interval_follows_the_new_item_rate():
+    p = poller()
+    assert p.next_interval(state(new_item_rate=3.0)) == (600 * SHRINK_ON_NEW,) * 2
+    assert p.next_interval(state(poll_interval=300, new_item_rate=0.0)) == (300 * GROW_ON_QUIET,) * 2
+    # One quiet poll after a busy spell: the average still says active
+    rate = p._ema(p._ema(None, 4), 0)
+    assert p.next_interval(state(poll_interval=300, new_item_rate=rate)) == (150, 150)
+    # In between: hold
+    assert p.next_interval(state(poll_interval=300, new_item_rate=0.3)) == (300, 300)
+    # Clamped
+    assert p.next_interval(state(poll_interval=70, new_item_rate=5.0)) == (60, 60)
+    assert p.next_interval(state(poll_interval=3000, new_item_rate=0.0)) == (3600, 3600)
+
+def test_error_backoff_starts_from_the_base():
+    p = poller(max_interval=10 ** 6)
+    for errors in range(1, 10):
+        base, interval = p.next_interval(state(poll_interval=300, new_item_rate=0.0, consecutive_errors=errors))
+        assert base == 300
+        assert interval == 300 * GROW_ON_ERROR ** min(errors, 6)
+    # Capped by the max interval
+    assert poller().next_interval(state(poll_interval=300, consecutive_errors=6)) == (300, 3600)
+
+def test_error_rate_stretches_a_recovered_source():
+    base, interval = poller().next_interval(state(poll_interval=300, new_item_rate=0.3, error_rate=0.5))
+    assert (base, interval) == (300, 450)
+
+def test_record_poll_keeps_the_base_through_failures(db):
+    p = poller()
+    p._record_poll("Fake", {"saved": 0, "errors": 1})
+    p._record_poll("Fake", {"saved": 0, "errors": 1})
+    with Session(db) as session:
+        s = session.get(SourceState, "Fake")
+        assert (s.poll_interval, s.consecutive_errors, s.error_rate) == (600, 2, 1.0)
+    p._record_poll("Fake", {"saved": 2, "errors": 0})
+    with Session(db) as session:
+        s = session.get(SourceState, "Fake")
+        assert (s.poll_interval, s.consecutive_errors) == (600 * SHRINK_ON_NEW, 0)
+        assert s.error_rate == 0.7
+
+def test_loop_survives_exceptions(db, monkeypatch):
+    p = poller(min_interval=0.01, initial_interval=0.01, max_interval=0.05)
+    calls = {"load": 0, "poll": 0, "record": 0}
+    done = asyncio.Event()
+    load_state, record_poll = p._load_state, p._record_poll
+
+    def flaky_load(source_name):
+        calls["load"] += 1
+        if calls["load"] == 1:
+            raise RuntimeError("database is locked")
+        return load_state(source_name)
+
+    def flaky_record(source_name, stats):
+        calls["record"] += 1
+        if calls["record"] == 1:
+            raise RuntimeError("database is locked")
+        return record_poll(source_name, stats)
+
+    async def poll_once(source_name, ingestor):
+        calls["poll"] += 1
+        if calls["poll"] == 3:
+            done.set()
+        return {"saved": 1, "errors": 0}
+
+    monkeypatch.setattr(p, "_load_state", flaky_load)
+    monkeypatch.setattr(p, "_record_poll", flaky_record)
+    monkeypatch.setattr(p, "poll_once", poll_once)
+
+    async def run():
+        task = asyncio.create_task(p._loop("Fake", None))
+        await asyncio.wait_for(done.wait(), 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+    assert calls["load"] == 2 and calls["record"] >= 2
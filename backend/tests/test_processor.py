@@ -0,0 +1,121 @@
+import asyncio
+import json
+from sqlmodel import Session, SQLModel, select
+from app.core.constants import ProcessOutcome
+from app.models.analysis import NLPAnalysisCache
+from app.models.recall import RawRecall, Recall, RecallSource
+from app.nlp.cache import LRUCache, analysis_cache
+from app.services import processor
+from app.services.processor import RecallProcessor, shutdown_process_pool
+
+STORIES = [
+    ("GoogleNews-IN-FSSAI", "Amul ghee recall in Delhi after FSSAI order"),
+    ("GoogleNews-IN-FSSAI", "Amul ghee recall in Delhi after FSSAI order issued"),
+    ("GoogleNews-IN-CDSCO", "Cipla cough syrup withdrawn by CDSCO over contamination"),
+    ("GoogleNews-IN-FSSAI", "Haldiram spice mix seized in Mumbai, FSSAI sample failed"),
+    ("GoogleNews-US", "Acme Foods recalls peanut butter over Salmonella, FDA says"),
+    ("GoogleNews-US", "Acme Foods recalls peanut butter over Salmonella, US FDA says"),
+    ("GoogleNews-IN-FSSAI", "Stock market rallies as Sensex hits record high"),
+    ("GoogleNews-IN-CDSCO", "Patanjali tablet recall ordered by Uttarakhand drug controller"),
+    ("GoogleNews-US", "Globex space heater recall: fire risk, stop use, CPSC warns"),
+    ("GoogleNews-IN-FSSAI", "Adulterated paneer and khoya destroyed in Telangana raid"),
+    ("GoogleNews-UK", "MHRA safety alert: London pharmacy pulls contaminated pill batch"),
+    ("GoogleNews-IN-FSSAI", "Cricket: India beat Australia in Sydney"),
+]
+
+def seed(engine):
+    with Session(engine) as session:
+        for n, (origin, title) in enumerate(STORIES):
+            payload = {"title": title, "link": f"https://news.example/{n}", "published": "Mon, 06 Jan 2025 10:00:00 GMT",
+                       "summary": f"{title}. Consumers are advised to check the batch.", "_source_origin": origin}
+            session.add(RawRecall(source_id=f"story-{n}", source_type="NEWS", raw_payload=json.dumps(payload)))
+        session.commit()
+
+def snapshot(engine):
+    with Session(engine) as session:
+        recalls = [
+            (r.id, r.title, r.brand, r.category, r.region, r.confidence_level, r.signal_type, r.rule_version)
+            for r in session.exec(select(Recall).order_by(Recall.id))
+        ]
+        sources = [(s.recall_id, s.raw_id, s.title) for s in session.exec(select(RecallSource).order_by(RecallSource.id))]
+        raws = [(r.id, r.outcome, r.rule_version) for r in session.exec(select(RawRecall).order_by(RawRecall.id))]
+    return recalls, sources, raws
+
+def test_pool_gives_the_serial_result(db, monkeypatch):
+    seed(db)
+    asyncio.run(RecallProcessor(workers=0).process_pending())
+    serial = snapshot(db)
+    assert serial[0] and all(outcome for _, outcome, _ in serial[2])
+
+    SQLModel.metadata.drop_all(db)
+    SQLModel.metadata.create_all(db)
+    seed(db)
+    # Several chunks per worker, and no silent fallback to the serial path
+    monkeypatch.setattr(processor, "PARALLEL_MIN_ROWS", 1)
+    monkeypatch.setattr(processor, "PARALLEL_CHUNK", 3)
+
+    def serial_fails(self, *args):
+        raise AssertionError("the batch must be analyzed in the pool")
+    monkeypatch.setattr(RecallProcessor, "_analyze_serial", serial_fails)
+    try:
+        asyncio.run(RecallProcessor(workers=2).process_pending())
+    finally:
+        shutdown_process_pool()
+    assert snapshot(db) == serial
+
+def test_pool_is_served_from_the_analysis_cache(db, monkeypatch):
+    # The serial run computes every analysis and persists it
+    monkeypatch.setattr(analysis_cache, "memory", LRUCache(100))
+    seed(db)
+    asyncio.run(RecallProcessor(workers=0).process_pending())
+    serial = snapshot(db)
+
+    # Fresh recall tables, the persisted analysis cache kept, the LRU emptied
+    tables = [t for t in SQLModel.metadata.sorted_tables if t.name != NLPAnalysisCache.__tablename__]
+    SQLModel.metadata.drop_all(db, tables=tables)
+    SQLModel.metadata.create_all(db, tables=tables)
+    seed(db)
+    analysis_cache.memory.clear()
+    monkeypatch.setattr(analysis_cache, "hits", 0)
+    monkeypatch.setattr(analysis_cache, "misses", 0)
+    monkeypatch.setattr(processor, "PARALLEL_MIN_ROWS", 1)
+    monkeypatch.setattr(processor, "PARALLEL_CHUNK", 3)
+
+    def serial_fails(self, *args):
+        raise AssertionError("the batch must be analyzed in the pool")
+    monkeypatch.setattr(RecallProcessor, "_analyze_serial", serial_fails)
+    try:
+        asyncio.run(RecallProcessor(workers=2).process_pending())
+    finally:
+        shutdown_process_pool()
+    assert snapshot(db) == serial
+    assert analysis_cache.hits > 0 and analysis_cache.misses == 0
+
+def test_failed_item_only_rolls_back_its_own_savepoint(db, monkeypatch):
+    seed(db)
+    asyncio.run(RecallProcessor(workers=0).process_pending())
+    clean = snapshot(db)
+    assert clean[2][2][1] == ProcessOutcome.CREATED
+
+    SQLModel.metadata.drop_all(db)
+    SQLModel.metadata.create_all(db)
+    seed(db)
+    write_plan = RecallProcessor._write_plan
+
+    def cipla_fails(self, session, plan, id_map, version):
+        created = write_plan(self, session, plan, id_map, version)
+        # After its rows are flushed, so the SAVEPOINT has something to undo
+        if any(item["raw"].source_id == "story-2" for item in plan):
+            raise RuntimeError("constraint violated")
+        return created
+    monkeypatch.setattr(RecallProcessor, "_write_plan", cipla_fails)
+    asyncio.run(RecallProcessor(workers=0).process_pending())
+    recalls, sources, raws = snapshot(db)
+
+    cipla = STORIES[2][1]
+    assert [title for title in (r[1] for r in recalls) if "Cipla" in title] == []
+    assert [s for s in sources if s[2] == cipla] == []
+    assert raws[2][1] == ProcessOutcome.ERROR
+    # Everything else is written as in a clean run
+    assert sorted(r[1:] for r in recalls) == sorted(r[1:] for r in clean[0] if "Cipla" not in r[1])
+    assert [r[1] for r in raws[:2] + raws[3:]] == [r[1] for r in clean[2][:2] + clean[2][3:]]
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy import inspect
+from sqlmodel import Session, select
+from app.models.alert import PendingAlert
+from app.models.recall import RawRecall, Recall, RecallSource
+from app.models.user import User
+from app.services.processor import RecallProcessor
+from app.services import rebuild as rebuild_module
+from app.services.rebuild import ShadowRebuild
+
+STORIES = [
+    "Amul ghee recall in Delhi after FSSAI order",
+    "Cipla cough syrup banned by CDSCO over contamination",
+    "Haldiram spice mix seized in Mumbai, FSSAI sample failed",
+    "Patanjali tablet recall ordered by Uttarakhand drug regulator",
+]
+
+def seed(engine):
+    with Session(engine) as session:
+        for n, title in enumerate(STORIES):
+            payload = {"title": title, "link": f"https://news.example/{n}", "published": "Mon, 06 Jan 2025 10:00:00 GMT",
+                       "summary": f"{title}: food safety recall", "_source_origin": "GoogleNews-IN-FSSAI"}
+            session.add(RawRecall(source_id=f"story-{n}", source_type="NEWS", raw_payload=json.dumps(payload)))
+        session.add(User(email="reader@example.com", hashed_password="x"))
+        session.commit()
+    asyncio.run(RecallProcessor().process_pending())
+
+def titles_by_id(engine):
+    with Session(engine) as session:
+        return {recall.id: recall.title for recall in session.exec(select(Recall))}
+
+def test_rebuild_keeps_recall_ids(db):
+    seed(db)
+    before = titles_by_id(db)
+    assert len(before) == len(STORIES)
+
+    with Session(db) as session:
+        # A deleted recall comes back in the rebuild, so its rows would be
+        # renumbered into the gap without the id plan
+        first = min(before)
+        for source in session.exec(select(RecallSource).where(RecallSource.recall_id == first)):
+            session.delete(source)
+        session.delete(session.get(Recall, first))
+        user = session.exec(select(User)).one()
+        for recall_id in sorted(before)[1:]:
+            session.add(PendingAlert(user_id=user.id, recall_id=recall_id, match_value="x"))
+        session.commit()
+    live = titles_by_id(db)
+
+    asyncio.run(ShadowRebuild().run())
+
+    after = titles_by_id(db)
+    for recall_id, title in live.items():
+        assert after[recall_id] == title
+    # The revived recall gets a new id, above every old one
+    (revived,) = set(after) - set(live)
+    assert revived > max(before) and after[revived] == before[first]
+    with Session(db) as session:
+        alerted = {a.recall_id for a in session.exec(select(PendingAlert))}
+        sources = session.exec(select(RecallSource)).all()
+    assert alerted == set(live)
+    assert {s.recall_id for s in sources} == set(after)
+
+def live_state(engine):
+    with Session(engine) as session:
+        return (
+            titles_by_id(engine),
+            sorted((s.recall_id, s.raw_id) for s in session.exec(select(RecallSource))),
+            sorted((r.id, r.outcome, r.rule_version) for r in session.exec(select(RawRecall))),
+            sorted((a.user_id, a.recall_id) for a in session.exec(select(PendingAlert))),
+        )
+
+def test_alerts_follow_merged_recalls(db):
+    seed(db)
+    with Session(db) as session:
+        # Live: two recalls for one story; the rebuild merges them
+        source = session.exec(select(RecallSource).where(RecallSource.recall_id == max(titles_by_id(db)))).one()
+        split = Recall(title=source.title)
+        session.add(split)
+        session.flush()
+        keep_id = source.recall_id
+        session.add(RawRecall(source_id="story-dup", source_type="NEWS", raw_payload=json.dumps({
+            "title": source.title + " today", "link": "https://news.example/dup", "published": "Mon, 06 Jan 2025 10:00:00 GMT",
+            "summary": f"{source.title}: food safety recall", "_source_origin": "GoogleNews-IN-FSSAI",
+        })))
+        session.flush()
+        dup = session.exec(select(RawRecall).where(RawRecall.source_id == "story-dup")).one()
+        session.add(RecallSource(recall_id=split.id, source_type="NEWS", url="https://news.example/dup", title=source.title, raw_id=dup.id))
+        # User 1 watched only the split-off recall, user 2 both
+        other = User(email="other@example.com", hashed_password="x")
+        session.add(other)
+        session.flush()
+        reader = session.exec(select(User).where(User.email == "reader@example.com")).one()
+        session.add(PendingAlert(user_id=reader.id, recall_id=split.id, match_value="x"))
+        session.add(PendingAlert(user_id=other.id, recall_id=split.id, match_value="x"))
+        session.add(PendingAlert(user_id=other.id, recall_id=keep_id, match_value="y"))
+        session.commit()
+        split_id, dup_id, reader_id, other_id = split.id, dup.id, reader.id, other.id
+
+    asyncio.run(ShadowRebuild().run())
+
+    after = titles_by_id(db)
+    assert split_id not in after and keep_id in after
+    with Session(db) as session:
+        assert sorted(s.raw_id for s in session.exec(select(RecallSource).where(RecallSource.recall_id == keep_id)))[-1] == dup_id
+        alerts = sorted((a.user_id, a.recall_id, a.match_value) for a in session.exec(select(PendingAlert)))
+    # Moved to the successor; where the user already had one there, that one stays
+    assert alerts == [(reader_id, keep_id, "x"), (other_id, keep_id, "y")]
+
+def test_failure_before_the_swap_leaves_live_tables_alone(db, monkeypatch):
+    seed(db)
+    with Session(db) as session:
+        user = session.exec(select(User)).one()
+        session.add(PendingAlert(user_id=user.id, recall_id=min(titles_by_id(db)), match_value="x"))
+        session.commit()
+    before = live_state(db)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    for target in ("create_search_indexes", "_remap_alerts"):
+        rebuild = ShadowRebuild(suffix=target.strip("_"))
+        if target == "_remap_alerts":
+            # Inside the swap transaction, after the renumbering
+            monkeypatch.setattr(rebuild, target, broken)
+        else:
+            monkeypatch.setattr(rebuild_module, target, broken)
+        with pytest.raises(RuntimeError):
+            asyncio.run(rebuild.run())
+        monkeypatch.undo()
+
+        assert live_state(db) == before
+        tables = set(inspect(db).get_table_names())
+        assert not {rebuild.recall.name, rebuild.source.name} & tables
+        assert {"recall", "recallsource"} <= tables
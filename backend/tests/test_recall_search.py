@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+from app.api import routes_watchlists
+from app.api.deps import get_current_user
+from app.core.constants import Region
+from app.models.alert import PendingAlert
+from app.models.recall import Recall
+from app.models.user import User, Watchlist
+from app.services.recall_search import FTS_TABLE, RecallSearch, create_search_indexes, ensure_search_index
+
+def seed(session: Session):
+    """Recalls 1-5, published 1, 10, 40, 200 and 400 days ago."""
+    now = datetime.utcnow()
+    for days, title, brand, region, category in [
+        (1, "Globex recalls space heaters", "Globex", Region.US, "Appliance"),
+        (10, "Acme Foods recalls peanut butter", "Acme Foods, Inc.", Region.US, "Food"),
+        (40, "Acmeco recalls TV remotes", "Acmeco", Region.IN, "Electronics"),
+        (200, "Initech recalls car seats", "Initech", Region.IN, "Vehicle"),
+        (400, "Globex recalls heater cords", "Globex", Region.US, "Appliance"),
+    ]:
+        session.add(Recall(title=title, brand=brand, region=region, category=category,
+                           published_date=now - timedelta(days=days)))
+    session.commit()
+
+def search(session: Session, kind: str, value: str, days: int = 365, limit: int = 50, fts: bool = True):
+    finder = RecallSearch()
+    if not fts:
+        finder._fts_ready = False
+    return [recall.id for recall in finder.for_watchlist(session, Watchlist(user_id=1, type=kind, value=value), days, limit)]
+
+def test_fts_serves_substring_lookups_on_sqlite(db):
+    ensure_search_index()
+    with Session(db) as session:
+        seed(session)
+        statements = []
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db, "before_cursor_execute", capture)
+        try:
+            assert search(session, "PRODUCT", "Heater") == [1]
+        finally:
+            event.remove(db, "before_cursor_execute", capture)
+        assert any(FTS_TABLE in statement for statement in statements)
+
+        # The triggers keep the index in step with the live table
+        session.get(Recall, 3).title = "Acmeco recalls space heaters"
+        session.commit()
+        assert search(session, "PRODUCT", "space heater") == [3, 1]
+        session.delete(session.get(Recall, 1))
+        session.commit()
+        assert search(session, "PRODUCT", "space heater") == [3]
+
+    # A second call finds the index in place
+    with db.begin() as conn:
+        assert create_search_indexes(conn)
+
+def test_fts_and_like_scans_agree(db):
+    ensure_search_index()
+    with Session(db) as session:
+        seed(session)
+        for kind, value in [("PRODUCT", "recalls"), ("PRODUCT", "tv"), ("PRODUCT", "50%"), ("PRODUCT", "heater cord"),
+                            ("BRAND", "acme"), ("BRAND", "acme foods"), ("BRAND", "globex"), ("BRAND", "co")]:
+            assert search(session, kind, value) == search(session, kind, value, fts=False), (kind, value)
+
+def test_brand_backfill_matches_whole_words(db):
+    with Session(db) as session:
+        seed(session)
+        assert search(session, "BRAND", "Acme") == [2]
+        assert search(session, "BRAND", "foods inc") == [2]
+        assert search(session, "BRAND", "acmeco") == [3]
+        assert search(session, "BRAND", "co") == []
+        # Candidates that fail the word check do not eat into the limit
+        for n in range(5):
+            session.add(Recall(title="Remote recall", brand=f"Acmeco {n}", published_date=datetime.utcnow()))
+        session.commit()
+        assert search(session, "BRAND", "acme", limit=1) == [2]
+
+def test_region_and_category_aliases(db):
+    with Session(db) as session:
+        seed(session)
+        assert search(session, "REGION", "USA") == [2, 1]
+        assert search(session, "REGION", "india") == [4, 3]
+        assert search(session, "REGION", "in") == [4, 3]
+        assert search(session, "REGION", "mars") == []
+        assert search(session, "CATEGORY", "cars") == [4]
+        assert search(session, "CATEGORY", "Food") == [2]
+        assert search(session, "CATEGORY", "home appliances") == [1]
+        assert search(session, "CATEGORY", "toys") == []
+        assert search(session, "SOMETHING", "globex") == []
+
+def test_window_and_limit(db):
+    with Session(db) as session:
+        seed(session)
+        assert search(session, "PRODUCT", "recalls", days=30) == [2, 1]
+        assert search(session, "PRODUCT", "recalls", days=365) == [4, 3, 2, 1]
+        assert search(session, "PRODUCT", "recalls", limit=2) == [4, 3]
+        # No published date: the row's age counts
+        session.add(Recall(title="Undated recalls", created_at=datetime.utcnow() - timedelta(days=50)))
+        session.commit()
+        assert search(session, "PRODUCT", "undated", days=30) == []
+        assert search(session, "PRODUCT", "undated", days=60) == [6]
+
+def client_for(user_id: int) -> TestClient:
+    app = FastAPI()
+    app.include_router(routes_watchlists.router, prefix="/watchlists")
+    app.dependency_overrides[get_current_user] = lambda: User(id=user_id, email=f"{user_id}@example.com", hashed_password="x")
+    return TestClient(app)
+
+def test_matches_endpoint(db, monkeypatch):
+    monkeypatch.setattr(routes_watchlists, "recall_search", RecallSearch())
+    with Session(db) as session:
+        seed(session)
+        session.add(User(email="1@example.com", hashed_password="x"))
+        session.add(User(email="2@example.com", hashed_password="x"))
+        session.add(Watchlist(user_id=1, type="PRODUCT", value="heater"))
+        session.commit()
+
+    client = client_for(1)
+    response = client.get("/watchlists/1/matches")
+    assert response.status_code == 200
+    assert [recall["id"] for recall in response.json()] == [1]
+    assert [r["id"] for r in client.get("/watchlists/1/matches", params={"days": 365, "limit": 200}).json()] == [1]
+    for params in ({"days": 0}, {"days": 366}, {"limit": 0}, {"limit": 201}):
+        assert client.get("/watchlists/1/matches", params=params).status_code == 422, params
+    assert client.get("/watchlists/9/matches").status_code == 404
+    # Someone else's watchlist
+    assert client_for(2).get("/watchlists/1/matches").status_code == 404
+
+def test_backfill_days_on_create(db, monkeypatch):
+    monkeypatch.setattr(routes_watchlists, "recall_search", RecallSearch())
+    with Session(db) as session:
+        seed(session)
+        session.add(User(email="1@example.com", hashed_password="x"))
+        session.commit()
+
+    client = client_for(1)
+    body = {"user_id": 1, "type": "BRAND", "value": "Globex"}
+    for days in (0, 366):
+        assert client.post("/watchlists/", json=body, params={"backfill_days": days}).status_code == 422
+    with Session(db) as session:
+        assert session.exec(select(Watchlist)).all() == []
+
+    # Opt-in only
+    response = client.post("/watchlists/", json={**body, "value": "Acme"})
+    assert response.status_code == 200
+    response = client.post("/watchlists/", json=body, params={"backfill_days": 365})
+    assert response.status_code == 200
+    with Session(db) as session:
+        assert [(a.recall_id, a.match_value, a.urgent) for a in session.exec(select(PendingAlert))] == [(1, "Globex", False)]
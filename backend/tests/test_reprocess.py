@@ -0,0 +1,107 @@
+import asyncio
+import importlib.util
+import json
+import os
+from sqlmodel import Session, select
+from app.core.constants import ConfidenceLevel, Region
+from app.models.recall import RawRecall, Recall, RecallSource
+from app.rules.engine import rule_engine
+from app.services import processor
+from app.services.dedup import TITLE_VERSION
+from app.services.processor import RecallProcessor
+from app.services.watchlist_index import current_version
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "reprocess.py")
+spec = importlib.util.spec_from_file_location("reprocess_script", SCRIPT)
+reprocess_script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(reprocess_script)
+
+STORY = "Amul ghee recall in Delhi after FSSAI order"
+FOLLOW_UP = "Amul ghee recall in Delhi after FSSAI order issued"
+
+def seed(engine):
+    with Session(engine) as session:
+        for n, title in enumerate([STORY, FOLLOW_UP]):
+            payload = {"title": title, "link": f"https://news.example/{n}", "published": "Mon, 06 Jan 2025 10:00:00 GMT",
+                       "summary": f"{title}: food safety recall", "_source_origin": "GoogleNews-IN-FSSAI"}
+            session.add(RawRecall(source_id=f"story-{n}", source_type="NEWS", raw_payload=json.dumps(payload)))
+        session.commit()
+    asyncio.run(RecallProcessor().process_pending())
+
+def layout(engine):
+    """{recall region: sorted source titles}"""
+    with Session(engine) as session:
+        return {
+            recall.region: sorted(s.title for s in session.exec(select(RecallSource).where(RecallSource.recall_id == recall.id)))
+            for recall in session.exec(select(Recall))
+        }
+
+def new_rules(monkeypatch, title: str, **changes):
+    """New rules under which `title` classifies with `changes`."""
+    classify = reprocess_script.classify
+
+    def patched(rules, source_type, item, analysis):
+        result = classify(rules, source_type, item, analysis)
+        if item["title"] == title:
+            result = {**result, **changes}
+        return result
+    for module in (reprocess_script, processor):
+        monkeypatch.setattr(module, "classify", patched)
+        monkeypatch.setattr(module, "rule_version", lambda rules=None: "next")
+
+def move_to_us(monkeypatch, title: str):
+    new_rules(monkeypatch, title, region=Region.US)
+
+def title_version(engine):
+    with Session(engine) as session:
+        return current_version(session, TITLE_VERSION)
+
+def test_merged_row_changing_region_is_deduplicated_again(db, monkeypatch):
+    seed(db)
+    assert layout(db) == {Region.IN: sorted([STORY, FOLLOW_UP])}
+
+    move_to_us(monkeypatch, FOLLOW_UP)
+    stats = asyncio.run(reprocess_script.reprocess())
+
+    assert stats["remerged"] == 1
+    assert layout(db) == {Region.IN: [STORY], Region.US: [FOLLOW_UP]}
+
+def test_creator_changing_region_releases_its_merged_rows(db, monkeypatch):
+    seed(db)
+    move_to_us(monkeypatch, STORY)
+    stats = asyncio.run(reprocess_script.reprocess())
+
+    assert stats["updated"] == 1 and stats["remerged"] == 1
+    assert layout(db) == {Region.US: [STORY], Region.IN: [FOLLOW_UP]}
+
+def test_title_indexes_are_only_invalidated_by_region_moves(db, monkeypatch):
+    seed(db)
+    version = title_version(db)
+    new_rules(monkeypatch, STORY, confidence=ConfidenceLevel.PROBABLE, signal_type="Advisory")
+    stats = asyncio.run(reprocess_script.reprocess())
+    assert stats["updated"] == 1
+    assert title_version(db) == version
+
+    move_to_us(monkeypatch, STORY)
+    monkeypatch.setattr(reprocess_script, "rule_version", lambda rules=None: "next-2")
+    asyncio.run(reprocess_script.reprocess())
+    assert title_version(db) == version + 1
+
+def test_legacy_sources_are_only_linked_when_unambiguous(db):
+    seed(db)
+    with Session(db) as session:
+        # Sources from before raw ids were recorded; the follow-up's link
+        # and title also appear on a second source
+        for source in session.exec(select(RecallSource)):
+            source.raw_id = None
+            session.add(source)
+            if source.title == FOLLOW_UP:
+                session.add(RecallSource(recall_id=source.recall_id, source_type="NEWS", url=source.url, title=source.title))
+        session.commit()
+
+        raws = session.exec(select(RawRecall).order_by(RawRecall.id)).all()
+        sources = reprocess_script._sources_by_raw(session, rule_engine.current(), raws)
+        story, follow_up = raws
+        assert [s.title for s in sources[story.id]] == [STORY]
+        assert sources[story.id][0].raw_id == story.id
+        assert follow_up.id not in sources
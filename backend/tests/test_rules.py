@@ -0,0 +1,180 @@
+import json
+import os
+import random
+import re
+from app.core.constants import ConfidenceLevel, Region
+from app.rules.engine import DEFAULT_RULES_PATH, RuleEngine
+
+# The hard-coded checks the rule file replaced (processor.py before rules
+# were configurable)
+LEGACY_NOISE = [
+    "funding alert", "raised", "series a", "series b", "series c", "bags $", "mn round",
+    "reviewed", "review:", "tested and reviewed", "best medical alert", "top 10", "buying guide",
+    "how it works", "how to", "feature update", "eligible for this", "watch face", "ios", "android",
+]
+
+def legacy_is_noise(lower_text: str) -> bool:
+    return any(re.search(rf'\b{re.escape(nk)}\b', lower_text) for nk in LEGACY_NOISE)
+
+def legacy_is_india_source(source_origin: str) -> bool:
+    o = source_origin.strip().lower()
+    return (
+        bool(re.search(r'(?<![a-z0-9])india(?![a-z0-9])', o)) or
+        bool(re.search(r'(?<![a-z0-9])in(?![a-z0-9])', o)) or
+        bool(re.search(r'\bgooglenews[-_ ]?in\b', o)) or
+        bool(re.search(r'\bgnews[-_ ]?in\b', o))
+    )
+
+def legacy_region(source_origin: str, india_score: int, foreign_score: int) -> Region:
+    if legacy_is_india_source(source_origin):
+        india_score += 2
+    if source_origin.strip() == "GoogleNews-US":
+        foreign_score += 5
+    if india_score >= 5 and india_score >= (foreign_score + 2):
+        return Region.IN
+    if foreign_score >= 3:
+        return Region.US
+    return Region.GLOBAL
+
+def legacy_signal(lower_text: str):
+    if any(k in lower_text for k in ["ban", "banned", "cancelled", "suspended", "seized", "ordered to withdraw"]):
+        return "Regulatory Action", ConfidenceLevel.CONFIRMED
+    if any(k in lower_text for k in ["sample failed", "substandard", "not of standard quality", "adulterated", "unsafe"]):
+        return "Sample Failure", ConfidenceLevel.PROBABLE
+    if any(k in lower_text for k in ["probe", "investigation", "complaint", "show cause"]):
+        return "Investigation", ConfidenceLevel.WATCH
+    if "recall" in lower_text:
+        return "Recall", ConfidenceLevel.CONFIRMED
+    return "Investigation", ConfidenceLevel.WATCH
+
+def rules():
+    return RuleEngine(DEFAULT_RULES_PATH).current()
+
+# (text, noise rule or None): word boundaries on both sides, keywords ending
+# in punctuation, prefixes and overlaps
+NOISE_CASES = [
+    ("startup raised $5m for recall tracking", "noise.finance:raised"),
+    ("chef praised the recalled ghee", None),
+    ("raised.", "noise.finance:raised"),
+    ("fundraised", None),
+    ("acme bags $20m", "noise.finance:bags $"),
+    ("acme bags $ 20m", None),
+    # \b after ":" needs a word character next, as it always did
+    ("review:heater", "noise.reviews:review:"),
+    ("review: the new heater", None),
+    ("reviews:heater", None),
+    ("top 10 heaters", "noise.reviews:top 10"),
+    ("top 100 heaters", None),
+    ("ios 17 update", "noise.tech:ios"),
+    ("bios and iostream", None),
+    ("android_phone", None),
+    ("series b", "noise.finance:series b"),
+    ("series bb", None),
+    ("how to\nrecall", "noise.tech:how to"),
+    ("recall of tablets", None),
+    ("", None),
+]
+
+# (lowercased text, signal): the ladder has always been plain substring tests
+SIGNAL_CASES = [
+    ("fssai banned the brand", "Regulatory Action"),
+    ("banana shipment recalled", "Regulatory Action"),
+    ("sample failed for ghee", "Sample Failure"),
+    ("unsafe and seized", "Regulatory Action"),
+    ("cdsco probe into syrup", "Investigation"),
+    ("recalled", "Recall"),
+    ("nothing here", "Investigation"),
+]
+
+def random_texts(count: int, seed: int):
+    rnd = random.Random(seed)
+    rs = rules()
+    pieces = sorted({kw for kws in rs.config["noise"].values() for kw in kws} | {kw for rung in rs.ladder for kw in rung["keywords"]})
+    pieces += [kw[1:] for kw in pieces] + ["p", "s", "0", "$", ":", "ghee"]
+    separators = [" ", "", ".", "-", "_", "\n", ": ", "/"]
+    return [
+        "".join(rnd.choice(pieces) + rnd.choice(separators) for _ in range(rnd.randint(0, 8)))
+        for _ in range(count)
+    ]
+
+def test_noise_table():
+    rs = rules()
+    for text, expected in NOISE_CASES:
+        assert rs.noise_rule(rs.scan(text)) == expected, text
+        assert (expected is not None) == legacy_is_noise(text), text
+
+def test_noise_equals_legacy():
+    rs = rules()
+    for text in random_texts(2000, seed=1):
+        assert (rs.noise_rule(rs.scan(text)) is not None) == legacy_is_noise(text), text
+
+def test_signal_ladder_equals_legacy():
+    rs = rules()
+    for text, expected in SIGNAL_CASES:
+        signal, _, _ = rs.india_signal(rs.scan(text))
+        assert signal == expected, text
+    for text in [t for t, _ in SIGNAL_CASES] + random_texts(2000, seed=2):
+        signal, confidence, _ = rs.india_signal(rs.scan(text))
+        assert (signal, confidence) == legacy_signal(text), text
+
+def test_region_equals_legacy_at_the_thresholds():
+    rs = rules()
+    origins = ["GoogleNews-IN-FSSAI", "India Today", "gnews_in", "Times of India ", "GoogleNews-US", " GoogleNews-US ",
+               "Indiana Gazette", "Bin Feed", "GoogleNews-UK", "", "IN"]
+    for origin in origins:
+        assert rs.is_india_source(origin) == legacy_is_india_source(origin), origin
+        for india in range(0, 9):
+            for foreign in range(0, 9):
+                region, _ = rs.region(origin, india, foreign)
+                assert region == legacy_region(origin, india, foreign), (origin, india, foreign)
+    # Agency feeds added to the US list since
+    assert rs.region("CPSC", 0, 0)[0] == Region.US
+
+def test_category_keywords_respect_word_boundaries():
+    rs = rules()
+    for text, expected in [
+        ("car seat recall", "Vehicle"),
+        ("cart recall", None),
+        ("e. coli in cheese", "Food"),
+        ("lithium-ion battery fire", "Electronics"),
+        ("space heater and car", "Vehicle"),
+        ("heaters", None),
+    ]:
+        assert rs.category(rs.scan(text))[0] == expected, text
+
+def test_rules_file_is_reloaded_when_it_changes(tmp_path):
+    path = tmp_path / "rules.json"
+    with open(DEFAULT_RULES_PATH) as f:
+        config = json.load(f)
+    path.write_text(json.dumps(config))
+    engine = RuleEngine(str(path))
+    engine.CHECK_INTERVAL = 0
+    first = engine.current()
+    assert engine.current() is first
+    assert first.noise_rule(first.scan("acme praised")) is None
+
+    config["noise"]["finance"].append("praised")
+    path.write_text(json.dumps(config))
+    os.utime(path, (1, os.path.getmtime(path) + 10))
+    second = engine.current()
+    assert second is not first and second.version != first.version
+    assert second.noise_rule(second.scan("acme praised")) == "noise.finance:praised"
+
+    # A broken edit or a missing file keeps the last good rules
+    path.write_text("{not json")
+    os.utime(path, (1, os.path.getmtime(path) + 20))
+    assert engine.current() is second
+    path.unlink()
+    assert engine.current() is second
+
+def test_mtime_is_checked_at_most_every_interval(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"version": 1}))
+    engine = RuleEngine(str(path))
+    first = engine.current()
+    path.write_text(json.dumps({"version": 2}))
+    os.utime(path, (1, os.path.getmtime(path) + 10))
+    # Within CHECK_INTERVAL of the last check
+    assert engine.current() is first
+    engine._checked_at -= engine.CHECK_INTERVAL
+    assert engine.current().version.startswith("2.")
@@ -0,0 +1,118 @@
+from sqlmodel import Session, select
+from app.core.constants import Region
+from app.models.recall import Recall
+from app.models.user import User, Watchlist, WatchlistChange
+from app.nlp import matcher as matcher_module
+from app.nlp.matcher import AhoCorasick
+from app.services import watchlist_index as module
+from app.services.watchlist_index import WatchlistIndex, brand_matches, bump_version, record_change
+
+HEATER = Recall(title="Globex recalls space heaters", brand="Globex", region=Region.US)
+
+def add_watchlist(session: Session, user_id: int, kind: str, value: str) -> Watchlist:
+    """What the API does on create."""
+    watchlist = Watchlist(user_id=user_id, type=kind, value=value)
+    session.add(watchlist)
+    session.flush()
+    record_change(session, watchlist)
+    session.commit()
+    return watchlist
+
+def matched(index: WatchlistIndex, session: Session):
+    return [value for _, _, value in index.match(session, HEATER)]
+
+def test_changes_from_another_process_are_applied_without_a_reload(db, monkeypatch):
+    with Session(db) as session:
+        user = User(email="reader@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        add_watchlist(session, user.id, "BRAND", "Acme")
+
+        worker = WatchlistIndex()
+        assert matched(worker, session) == []
+
+        def reload_fails(self, session):
+            raise AssertionError("logged changes must not trigger a full reload")
+        monkeypatch.setattr(WatchlistIndex, "reload", reload_fails)
+
+        brand = add_watchlist(session, user.id, "BRAND", "globex")
+        add_watchlist(session, user.id, "PRODUCT", "space heater")
+        assert matched(worker, session) == ["globex", "space heater"]
+
+        session.delete(brand)
+        record_change(session, brand, removed=True)
+        session.commit()
+        assert matched(worker, session) == ["space heater"]
+        assert worker.version == 4
+
+def test_gap_in_the_log_falls_back_to_a_reload(db):
+    with Session(db) as session:
+        worker = WatchlistIndex()
+        add_watchlist(session, 1, "BRAND", "Acme")
+        worker.sync(session)
+
+        # A stamp without a logged change (or one pruned from the log)
+        session.add(Watchlist(user_id=1, type="REGION", value="usa"))
+        bump_version(session)
+        session.commit()
+        add_watchlist(session, 1, "BRAND", "globex")
+        assert matched(worker, session) == ["usa", "globex"]
+        assert worker.version == 3
+
+def test_log_is_pruned(db, monkeypatch):
+    monkeypatch.setattr(module, "CHANGE_LOG_SIZE", 2)
+    with Session(db) as session:
+        for n in range(5):
+            add_watchlist(session, 1, "BRAND", f"brand {n}")
+        assert session.exec(select(WatchlistChange.version)).all() == [4, 5]
+
+def test_brand_values_match_whole_words(db):
+    with Session(db) as session:
+        for value in ("acme", "Acme Foods", "foods inc", "globex", "me"):
+            add_watchlist(session, 1, "BRAND", value)
+        index = WatchlistIndex()
+        for brand, expected in [
+            ("Acme Foods, Inc.", ["acme", "Acme Foods", "foods inc"]),
+            ("ACME-foods", ["acme", "Acme Foods"]),
+            ("Acmeco", []),
+            ("Foods Acme", ["acme"]),
+            ("Globex Corporation", ["globex"]),
+        ]:
+            recall = Recall(title="Recall", brand=brand)
+            assert [value for _, _, value in index.match(session, recall)] == expected, brand
+            assert [v for v in ("acme", "Acme Foods", "foods inc", "globex", "me") if brand_matches(v, brand)] == expected
+
+def test_new_products_do_not_rebuild_the_matcher(db, monkeypatch):
+    built = []
+    class CountingAhoCorasick(AhoCorasick):
+        def __init__(self, words):
+            built.append(len(list(words)))
+            super().__init__(words)
+    monkeypatch.setattr(matcher_module, "AhoCorasick", CountingAhoCorasick)
+
+    with Session(db) as session:
+        index = WatchlistIndex()
+        index.sync(session)
+        for n in range(100):
+            add_watchlist(session, 1, "PRODUCT", f"heater model {n}")
+            index.sync(session)
+        assert len(index._product_matcher) == 100
+        # Three buffer flushes (one merged), not one automaton per new value
+        assert built == [32, 64, 32]
+        recall = Recall(title="Globex recalls heater model 42 and heater model 7")
+        assert [value for _, _, value in index.match(session, recall)] == ["heater model 4", "heater model 7", "heater model 42"]
+
+def test_region_and_category_aliases(db):
+    with Session(db) as session:
+        for kind, value in [("REGION", "USA"), ("REGION", "united states"), ("REGION", "india"), ("REGION", "Global"),
+                            ("CATEGORY", "cars"), ("CATEGORY", "Appliance"), ("CATEGORY", "home appliances"), ("CATEGORY", "toys")]:
+            add_watchlist(session, 1, kind, value)
+        index = WatchlistIndex()
+        for region, category, expected in [
+            (Region.US, "Appliance", ["USA", "united states", "Appliance", "home appliances"]),
+            (Region.IN, "Vehicle", ["india", "cars"]),
+            (Region.GLOBAL, "Food", ["Global"]),
+            (Region.UNKNOWN, None, []),
+        ]:
+            recall = Recall(title="Recall", region=region, category=category)
+            assert [value for _, _, value in index.match(session, recall)] == expected, (region, category)
@@ -24,6 +24,10 @@ if (-Not (Test-Path ".\backend\venv")) {
 Write-Host "[*] Starting FastAPI Backend..." -ForegroundColor Yellow
 Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd backend; .\venv\Scripts\activate; uvicorn app.main:app --host 127.0.0.1 --port 8000 --reload"
 
+# 3. Start Ingestion Worker in a new window
+Write-Host "[*] Starting Ingestion Worker..." -ForegroundColor Yellow
+Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd backend; .\venv\Scripts\activate; python -m app.worker"
+
 # Ensure frontend node_modules exists
 if (-Not (Test-Path ".\frontend\node_modules")) {
     Write-Host "[*] Installing Frontend Dependencies..." -ForegroundColor Yellow
@@ -32,7 +36,7 @@ if (-Not (Test-Path ".\frontend\node_modules")) {
     Pop-Location
 }
 
-# 3. Start Frontend in a new window
+# 4. Start Frontend in a new window
 Write-Host "[*] Starting Next.js Frontend..." -ForegroundColor Yellow
 Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd frontend; npm run dev"
 